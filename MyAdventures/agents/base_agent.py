@@ -18,6 +18,12 @@ class AgentState(Enum):
 class BaseAgent(ABC):
     """Classe base abstracta per a tots els agents."""
 
+    # Política de les cues de l'agent al bus. Els missatges de control i
+    # d'estat (`CONTROL_TYPES`) no es descarten mai; "block" només fa esperar
+    # el publicador un temps acotat (pot tenir el state_lock que el
+    # lliurament espera) i després la cua creix en lloc de perdre'ls.
+    bus_policy = "block"
+
     def __init__(self, name, system_flags=None):
         # Inicialitza l'agent amb un nom i configura el logger
         self.name = name
@@ -28,6 +34,7 @@ class BaseAgent(ABC):
         self.log.info(f"{self.name} inicialitzat en estat {self.state.name}")
         self._stop_event = threading.Event()
         self._thread = None
+        self._scheduler = None  # Planificador central (opcional)
         self._tick_interval = 0.2
         self.wait_quietly = False
         self.state_lock = threading.RLock()
@@ -55,6 +62,13 @@ class BaseAgent(ABC):
             self._release_locks()  # Alliberar recursos si l'agent s'atura
             self._stop_event.set()
 
+        self.wake()
+
+    def wake(self):
+        """Avisa el planificador (si n'hi ha) que l'agent pot tenir feina."""
+        if self._scheduler is not None:
+            self._scheduler.wake(self)
+
     def _release_locks(self):
         pass
 
@@ -106,10 +120,26 @@ class BaseAgent(ABC):
         self.decide()
         self.act()
 
+    def attach_scheduler(self, scheduler):
+        """Fa que start_loop registri l'agent al planificador en lloc de crear un fil."""
+        self._scheduler = scheduler
+
+    def is_loop_active(self) -> bool:
+        """Retorna True si l'agent té el bucle en marxa (fil o planificador)."""
+        if self._scheduler is not None:
+            return self._scheduler.is_scheduled(self)
+        return bool(self._thread and self._thread.is_alive())
+
     # Thread-based execution
     def start_loop(self, tick_interval: float = 0.2):
-        """Inicia un fil que executa `tick` periòdicament. (0,2s)"""
+        """Inicia un fil que executa `tick` periòdicament. (0,2s)
+
+        Si l'agent té un planificador assignat, s'hi registra en lloc de crear el fil.
+        """
         self._tick_interval = tick_interval
+        if self._scheduler is not None:
+            self._scheduler.add(self, tick_interval)
+            return
         if self._thread and self._thread.is_alive():
             return
 
@@ -143,5 +173,7 @@ class BaseAgent(ABC):
     def stop_loop(self):
         """Atura el fil de l'agent i espera la seva finalització."""
         self._stop_event.set()
+        if self._scheduler is not None:
+            self._scheduler.remove(self)
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=2)
@@ -1,13 +1,21 @@
 from .base_agent import BaseAgent, AgentState
-from utils.communication import MessageProtocol
+from utils.communication import MessageProtocol, RateLimiter
 from utils.visuals import mark_bot
 from mcpi import block as mcblock
 import time
 import logging
 from utils.discovery import discover_build_plans
+from strategies.build_plans.streaming import BuildCursor
 
 logger = logging.getLogger(__name__)
 
+# IDs de bloc per material (per defecte terra)
+MATERIAL_BLOCK_IDS = {
+    "dirt": mcblock.DIRT.id,
+    "stone": mcblock.STONE.id,
+    "sandstone": mcblock.SANDSTONE.id,
+}
+
 
 class BuilderBot(BaseAgent):
     """Agent que construeix qualsevol dels planols generats."""
@@ -28,23 +36,53 @@ class BuilderBot(BaseAgent):
         self.bom = self.current_plan.bom
 
         self.inventory = {"dirt": 0, "stone": 0, "sandstone": 0}
+        # Últim inventari rebut del MinerBot i materials ja col·locats d'aquella
+        # mineria: l'inventari disponible és la diferència
+        self.received_inventory = {}
+        self.consumed = {}
         self.target_zone = None
-        self.build_plan = []
-        self.build_index = 0
+        self.alternative_zones = []  # Llocs de recanvi rebuts amb map.v1
+        # Cursor en streaming sobre el pla (None: cap construcció en curs)
+        self.build_cursor = None
+        self.chunk_size = self.system_flags.get("build_chunk_size", 4096)
+        self.max_blocks_per_tick = None  # None: tants com permeti l'inventari
         self.last_request_time = 0
-
-        self.message_bus.subscribe(self.on_message)
+        # Missatges de progrés build.v1 per segon (0: sense límit)
+        self.progress_limiter = RateLimiter(
+            self.system_flags.get("progress_rate", 5.0)
+        )
+        # Blocs entre checkpoints, a més del final de cada tros i del pla
+        self.checkpoint_every = self.system_flags.get("checkpoint_every", 1024)
+        self._checkpoint_position = 0
+
+        self.message_bus.subscribe(
+            self.on_message,
+            types=["map.v1", "inventory.v1", "build.checkpoint.v1", "workflow.reset"],
+            target=self.name,
+            policy=self.bus_policy,
+        )
         self.set_state(AgentState.IDLE)
 
+    @property
+    def build_index(self):
+        """Blocs col·locats de la construcció en curs."""
+        return self.build_cursor.position if self.build_cursor else 0
+
+    @property
+    def build_complete(self):
+        """Cert si la construcció en curs ja ha col·locat tots els blocs."""
+        return self.build_cursor is not None and self.build_cursor.done
+
     def _load_plans(self):
         """Descobreix i carrega els plans dinàmicament."""
         plan_classes = discover_build_plans()
         for name, cls in plan_classes.items():
             try:
-                plan_instance = cls()
-                # Utilitza el nom definit en la propietat de la classe
-                self.plans[plan_instance.name] = plan_instance
-                self.log.info(f"Pla carregat: {plan_instance.name}")
+                # Una classe pot aportar diversos plans (p. ex. un per fitxer)
+                for plan_instance in cls.instances():
+                    # Utilitza el nom definit en la propietat de la classe
+                    self.plans[plan_instance.name] = plan_instance
+                    self.log.info(f"Pla carregat: {plan_instance.name}")
             except Exception as e:
                 self.log.error(f"Error carregant pla {name}: {e}")
 
@@ -64,7 +102,25 @@ class BuilderBot(BaseAgent):
                     self.inventory[mat] = 0
 
             self.log.info(f"Pla canviat a '{plan_name}'. Nous requisits: {self.bom}")
-            return True
+        self._publish_plan_selected()
+        return True
+
+    def _publish_plan_selected(self):
+        """Informa l'ExplorerBot de la planta del pla per triar el lloc."""
+        if not self.current_plan:
+            return
+        try:
+            footprint = list(self.current_plan.footprint())
+        except Exception as e:
+            self.log.error(f"No s'ha pogut calcular la planta del pla: {e}")
+            return
+        msg = MessageProtocol.create_message(
+            msg_type="plan.selected.v1",
+            source=self.name,
+            target="ExplorerBot",
+            payload={"plan": self.current_plan_name, "footprint": footprint},
+        )
+        self.message_bus.publish(msg)
 
     def cycle_plan(self):
         """Rota al següent pla disponible."""
@@ -81,11 +137,17 @@ class BuilderBot(BaseAgent):
 
     def on_message(self, msg):
         """Gestiona missatges rebuts."""
+        msg_type = msg.get("type")
+        if msg_type == "build.checkpoint.v1":
+            # Només els checkpoints propis reproduïts del diari
+            if msg.get("replayed") and msg.get("source") == self.name:
+                self._handle_replayed_checkpoint(msg)
+            return
+
         # Filtrar missatges propis
         if msg.get("source") == self.name:
             return
 
-        msg_type = msg.get("type")
         target = msg.get("target")
 
         # Acceptar missatges específics
@@ -101,19 +163,25 @@ class BuilderBot(BaseAgent):
 
     def _handle_map_v1(self, msg):
         with self.state_lock:
-            self.target_zone = msg.get("payload", {}).get("zone")
-            self.log.info(f"Zona de construcció rebuda: {self.target_zone}")
+            payload = msg.get("payload", {})
+            self.target_zone = payload.get("zone")
+            self.alternative_zones = list(payload.get("alternatives", []))
+            self.log.info(
+                f"Zona de construcció rebuda: {self.target_zone} "
+                f"({len(self.alternative_zones)} alternatives)"
+            )
 
             # Reseteja l'estat del builder per a la nova tasca
-            self.build_plan = []
-            self.build_index = 0
+            self.build_cursor = None
 
             # Comprova el flag del workflow
             if self.system_flags.get("workflow_mode", False):
                 self.set_state(
                     AgentState.WAITING, "Zona rebuda, esperant materials (Workflow)"
                 )
-                self._request_materials()
+                # En reproduir el diari, la petició original ja es reprodueix
+                if not msg.get("replayed"):
+                    self._request_materials()
             else:
                 self.set_state(
                     AgentState.WAITING,
@@ -125,15 +193,23 @@ class BuilderBot(BaseAgent):
         with self.state_lock:
             received_inventory = msg.get("payload", {}).get("inventory", {})
 
-            for k, v in received_inventory.items():
-                self.inventory[k] = v
+            self.received_inventory = dict(received_inventory)
+            self._apply_consumed()
             self.log.info(f"Inventari actualitzat: {self.inventory}")
             self._check_readiness()
 
+    def _apply_consumed(self):
+        """Recalcula l'inventari: el rebut del MinerBot menys el ja col·locat."""
+        for k, v in self.received_inventory.items():
+            self.inventory[k] = max(0, v - self.consumed.get(k, 0))
+
     def _request_materials(self):
         """Envia una petició de materials al MinerBot."""
         current_time = time.time()
         if current_time - self.last_request_time > 5.0:  # Evita spam
+            # El BOM es recalcula si la font del pla ha canviat
+            if self.current_plan:
+                self.bom = self.current_plan.bom
             msg = MessageProtocol.create_message(
                 msg_type="materials.requirements.v1",
                 source=self.name,
@@ -180,11 +256,13 @@ class BuilderBot(BaseAgent):
             return
 
         with self.state_lock:
-            if not self.build_plan:
+            if self.build_cursor is None:
                 self._create_build_plan()
+                if self.build_cursor is None:
+                    return
 
-            if self.build_index < len(self.build_plan):
-                self._build_next_block()
+            if not self.build_cursor.done:
+                self._build_next_blocks()
             else:
                 self._finalize_build()
 
@@ -193,6 +271,20 @@ class BuilderBot(BaseAgent):
         if not self.target_zone:
             return
 
+        if not self.current_plan:
+            self.log.error("No hi ha cap pla seleccionat!")
+            return
+
+        # Si el terreny ha canviat des de l'exploració, passem al següent lloc
+        while not self._site_is_clear(self.target_zone):
+            if not self.alternative_zones:
+                self.log.warning("Cap lloc de construcció vàlid. Esperant un nou mapa.")
+                self.target_zone = None
+                self.set_state(AgentState.WAITING, "Cap lloc de construcció vàlid")
+                return
+            self.target_zone = self.alternative_zones.pop(0)
+            self.log.info(f"Provant lloc alternatiu: {self.target_zone}")
+
         x, y, z = self.target_zone["x"], self.target_zone["y"], self.target_zone["z"]
 
         if self.mc_lock:
@@ -203,54 +295,121 @@ class BuilderBot(BaseAgent):
             if self.mc_lock:
                 self.mc_lock.release()
 
-        if not self.current_plan:
-            self.log.error("No hi ha cap pla seleccionat!")
-            return
-
-        self.build_plan = self.current_plan.generate(x, y, z)
+        # La zona és la cantonada de la planta: l'ancoratge en descompta el
+        # desplaçament si el pla té blocs a dx o dz negatius
+        offset_x, offset_z = self.current_plan.footprint_offset()
+        # Els blocs es generen i s'agrupen per trossos a mesura que es construeix
+        self.build_cursor = self.current_plan.open_cursor(
+            x - offset_x, y, z - offset_z, chunk_size=self.chunk_size
+        )
+        self._checkpoint_position = 0
 
         self.log.info(
-            f"Pla de construcció '{self.current_plan_name}' creat amb {len(self.build_plan)} blocs."
+            f"Pla de construcció '{self.current_plan_name}' creat amb "
+            f"{self.build_cursor.total} blocs (trossos de {self.chunk_size})."
         )
-        self.build_index = 0
 
-    def _build_next_block(self):
-        """Construeix el següent bloc del pla."""
-        bx, by, bz, material = self.build_plan[self.build_index]
+    def _site_is_clear(self, zone):
+        """Comprova que la planta del pla continua plana a l'alçada de la zona."""
+        width, depth = self.current_plan.footprint()
+        columns = [
+            (zone["x"] + dx, zone["z"] + dz)
+            for dx in range(width)
+            for dz in range(depth)
+        ]
+        if not columns:
+            return True
 
-        if self.inventory.get(material, 0) > 0:
+        if self.mc_lock:
+            self.mc_lock.acquire()
+        try:
+            heights = self.mc.getHeights(columns)
+        except Exception as e:
+            self.log.error(f"Error comprovant el lloc {zone}: {e}")
+            return False
+        finally:
             if self.mc_lock:
-                self.mc_lock.acquire()
-            try:
-                block_id = mcblock.DIRT.id
-                if material == "stone":
-                    block_id = mcblock.STONE.id
-                elif material == "sandstone":
-                    block_id = mcblock.SANDSTONE.id
-
-                self.mc.setBlock(bx, by, bz, block_id)
-            finally:
-                if self.mc_lock:
-                    self.mc_lock.release()
-
-            self.inventory[material] -= 1
-            self.log.debug(
-                f"Bloc de {material} col·locat a ({bx},{by},{bz}). Restants: {self.inventory[material]}"
-            )
+                self.mc_lock.release()
+
+        if any(h != zone["y"] for h in heights):
+            self.log.warning(f"El lloc {zone} ja no és pla.")
+            return False
+        return True
+
+    def _build_next_blocks(self):
+        """Construeix tants cuboides del pla com permeti l'inventari en aquest tick."""
+        cursor = self.build_cursor
+        placed = 0
+        missing = None
+
+        if self.mc_lock:
+            self.mc_lock.acquire()
+        try:
+            while True:
+                if self.max_blocks_per_tick and placed >= self.max_blocks_per_tick:
+                    break
+
+                run = cursor.peek()
+                if run is None:
+                    break
+                available = self.inventory.get(run.material, 0)
+
+                if available < run.size:
+                    if available > 0 and run.size > 1:
+                        # Partim el cuboide per col·locar el que es pugui
+                        cursor.split()
+                        continue
+                    missing = run.material
+                    break
+
+                block_id = MATERIAL_BLOCK_IDS.get(run.material, mcblock.DIRT.id)
+                if run.size == 1:
+                    self.mc.setBlock(run.x0, run.y0, run.z0, block_id)
+                else:
+                    self.mc.setBlocks(
+                        run.x0, run.y0, run.z0, run.x1, run.y1, run.z1, block_id
+                    )
 
-            # Publicar progrés
+                self.inventory[run.material] -= run.size
+                self.consumed[run.material] = (
+                    self.consumed.get(run.material, 0) + run.size
+                )
+                cursor.advance()
+                placed += run.size
+                self.log.debug(
+                    f"{run.size} blocs de {run.material} col·locats a "
+                    f"({run.x0},{run.y0},{run.z0})-({run.x1},{run.y1},{run.z1}). "
+                    f"Restants: {self.inventory[run.material]}"
+                )
+        finally:
+            if self.mc_lock:
+                self.mc_lock.release()
+
+        finished = cursor.done
+        if placed and self.progress_limiter.allow(force=finished):
+            # Publicar progrés (com a molt un missatge per tick, amb límit de freqüència)
             progress_msg = MessageProtocol.create_message(
                 "build.v1",
                 self.name,
                 "Monitor",
-                {"progress": (self.build_index + 1) / len(self.build_plan) * 100},
+                {"progress": cursor.progress},
             )
             self.message_bus.publish(progress_msg)
 
-            self.build_index += 1
-        else:
-            self.log.warning(f"Material insuficient '{material}'. Pausant construcció.")
-            self.set_state(AgentState.WAITING, f"Falta {material}")
+        # El checkpoint no depèn del límit de progrés: cada `checkpoint_every`
+        # blocs, en acabar un tros, en acabar el pla i en pausar per materials
+        last = self._checkpoint_position
+        if placed and (
+            finished
+            or missing
+            or cursor.position - last >= self.checkpoint_every
+            or cursor.position // cursor.chunk_size > last // cursor.chunk_size
+        ):
+            self._publish_checkpoint()
+
+        if missing:
+            self.log.warning(f"Material insuficient '{missing}'. Pausant construcció.")
+            self.set_state(AgentState.WAITING, f"Falta {missing}")
             self._request_materials()
 
     def _finalize_build(self):
@@ -262,12 +421,71 @@ class BuilderBot(BaseAgent):
             "build.complete.v1", self.name, "MinerBot", {}
         )
         self.message_bus.publish(complete_msg)
+        # El MinerBot es reseteja: el proper inventari que enviï serà nou
+        self.received_inventory = {}
+        self.consumed = {}
 
         self.set_state(
             AgentState.WAITING, "Construcció completada, esperant nova tasca"
         )
         # No resetejem l'estat intern aquí per si es vol inspeccionar
 
+    def save_checkpoint(self):
+        """Guarda l'estat i la posició de la construcció en curs."""
+        super().save_checkpoint()
+        with self.state_lock:
+            if self.build_cursor is not None:
+                self.checkpoint["build"] = self.build_cursor.checkpoint()
+                self.checkpoint["zone"] = self.target_zone
+                self.checkpoint["consumed"] = dict(self.consumed)
+                self._checkpoint_position = self.build_cursor.position
+
+    def _publish_checkpoint(self):
+        """Publica la posició de la construcció perquè el diari la conservi."""
+        self.save_checkpoint()
+        msg = MessageProtocol.create_message(
+            "build.checkpoint.v1",
+            self.name,
+            self.name,
+            {
+                "build": self.checkpoint["build"],
+                "zone": self.checkpoint["zone"],
+                "consumed": self.checkpoint["consumed"],
+            },
+        )
+        self.message_bus.publish(msg)
+
+    def _handle_replayed_checkpoint(self, msg):
+        """Reprèn la construcció des del checkpoint enregistrat al diari."""
+        with self.state_lock:
+            self.checkpoint = dict(msg.get("payload", {}))
+            self.restore_checkpoint()
+
+    def restore_checkpoint(self):
+        """Reprèn la construcció des de la posició guardada al checkpoint."""
+        super().restore_checkpoint()
+        build = self.checkpoint.get("build")
+        if not build:
+            return
+        with self.state_lock:
+            plan = self.plans.get(build["plan"])
+            if plan is None:
+                self.log.error(f"Pla desconegut al checkpoint: {build['plan']}")
+                return
+            self.current_plan_name, self.current_plan = build["plan"], plan
+            self.bom = plan.bom
+            self.target_zone = self.checkpoint.get("zone")
+            self.build_cursor = BuildCursor.from_checkpoint(plan, build)
+            self._checkpoint_position = self.build_cursor.position
+            # L'inventari del MinerBot (reproduït abans o després) encara
+            # inclou els materials dels blocs ja col·locats
+            self.consumed = dict(self.checkpoint.get("consumed", {}))
+            self._apply_consumed()
+        self.log.info(
+            f"Construcció represa a {self.build_cursor.position}/"
+            f"{self.build_cursor.total} blocs"
+        )
+
     def reset(self):
         """Reseteja l'estat del BuilderBot per a un nou workflow."""
         self.log.info("Resetejant BuilderBot...")
@@ -278,11 +496,14 @@ class BuilderBot(BaseAgent):
                 self.inventory = {k: 0 for k in self.bom}
             else:
                 self.inventory = {}
+            self.received_inventory = {}
+            self.consumed = {}
             self.target_zone = None
-            self.build_plan = []
-            self.build_index = 0
+            self.alternative_zones = []
+            self.build_cursor = None
 
         self.set_state(AgentState.IDLE, "Resetejat per a nou workflow")
+        self._publish_plan_selected()
 
     def start(self):
         """Inicia el bot (en aquest cas, simplement el posa a IDLE esperant un mapa)."""
@@ -1,6 +1,8 @@
 from .base_agent import BaseAgent, AgentState
 from utils.communication import MessageProtocol
-from utils.visuals import mark_bot
+from utils.heightmap import fetch_heightmap
+from utils.site_index import SiteIndex
+from utils.visuals import mark_bot, visuals_enabled
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,9 +24,20 @@ class ExplorerBot(BaseAgent):
         # Rangs de exploració
         self.exploration_ranges = [40, 20, 80]
         self.current_range_index = 0
+        # Costat de la zona plana quadrada que es busca (si no es coneix el pla)
+        self.flat_zone_size = 7
+        # Planta del pla seleccionat pel BuilderBot (plan.selected.v1)
+        self.site_footprint = None
+        # Llocs alternatius que s'envien amb el mapa
+        self.max_sites = 5
 
         # Subscripció als missatges importants
-        self.message_bus.subscribe(self.on_message)
+        self.message_bus.subscribe(
+            self.on_message,
+            types=["workflow.reset", "plan.selected.v1"],
+            target=self.name,
+            policy=self.bus_policy,
+        )
 
     def cycle_range(self):
         """Cicle al següent rang d exploració."""
@@ -56,6 +69,12 @@ class ExplorerBot(BaseAgent):
         msg_type = message.get("type")
         if msg_type == "workflow.reset":
             self.reset()
+        elif msg_type == "plan.selected.v1":
+            footprint = message.get("payload", {}).get("footprint")
+            if footprint:
+                with self.state_lock:
+                    self.site_footprint = tuple(footprint)
+                self.log.info(f"Planta del pla seleccionat: {self.site_footprint}")
         # Altres missatges específics per a ExplorerBot si cal
 
     def perceive(self):
@@ -68,94 +87,76 @@ class ExplorerBot(BaseAgent):
                 self.mc_lock.acquire()
             try:
                 p = self.mc.player.getTilePos()
-                base_x, base_z = int(p.x), int(p.z)
-
-                # Cerca de zona plana en 4 direccions: (+x, +z, -x, -z)
-                directions = [(1, 0), (0, 1), (-1, 0), (0, -1)]
-                found_zone = None
-
-                from utils.visuals import mark_bot
-
-                current_range = self.exploration_ranges[self.current_range_index]
-
-                for dx, dz in directions:
-                    consecutive_count = 0
-                    last_y = None
-
-                    # Recorre 'current_range' blocs en la direcció actual
-                    for i in range(1, current_range + 1):
-                        check_x = base_x + (dx * i)
-                        check_z = base_z + (dz * i)
-                        y = self.mc.getHeight(check_x, check_z)
-
-                        # Marquem cada bloc inspeccionat
-                        mark_bot(self.mc, check_x, y, check_z, wool_color=11)
-
-                        if last_y is not None and y == last_y:
-                            consecutive_count += 1
-                        else:
-                            consecutive_count = 1
-                            last_y = y
-
-                        # Si trobem 7 blocs seguits al mateix nivell
-                        if consecutive_count >= 7:
-                            # Calculem el centre de la zona (retrocedim 3 posicions). 7 blocs -> el 4t és el centre (i-3)
-                            center_offset = i - 3
-                            center_x = base_x + (dx * center_offset)
-                            center_z = base_z + (dz * center_offset)
-
-                            # Ara comprovem els eixos perpendiculars
-                            # Si ens movem en X (dx!=0), comprovem Z. Si ens movem en Z (dz!=0), comprovem X.
-                            perp_dx, perp_dz = (0, 1) if abs(dx) > 0 else (1, 0)
-
-                            is_valid_cross = True
-                            for k in range(-3, 4):
-                                if k == 0:
-                                    continue  # El centre ja sabem que esta a l'altura
-
-                                px = center_x + (k * perp_dx)
-                                pz = center_z + (k * perp_dz)
-                                py = self.mc.getHeight(px, pz)
-
-                                # Marcatge visual de la comprovació extra
-                                mark_bot(self.mc, px, py, pz, wool_color=11)
-
-                                if py != y:
-                                    is_valid_cross = False
-                                    break
-
-                            if is_valid_cross:
-                                found_zone = (center_x, center_z, y)
-                                # Si finalment la zona es valida la marquem amb un bloc extra
-                                mark_bot(
-                                    self.mc, center_x, y + 1, center_z, wool_color=11
-                                )
-                                break
-                            else:
-                                # Si falla la comprovació lateral, resetegem el comptador
-                                consecutive_count = 0
-
-                    if found_zone:
-                        break
-
-                if found_zone:
-                    with self.state_lock:
-                        self.terrain_map = {"flat_zones": [found_zone]}
-                    self.log.debug(f"Terreny percebut: {self.terrain_map}")
-                else:
-                    msg = "No s'ha trobat cap zona plana en les direccions explorades."
-                    self.log.info(msg)
-                    self.mc.postToChat(f"[{self.name}] {msg}")
-                    # Aturem el workflow ja que no s'ha trobat zona
-                    self.set_state(AgentState.STOPPED, reason="Zona plana no trobada")
-
             finally:
                 if self.mc_lock:
                     self.mc_lock.release()
+            base_x, base_z = int(p.x), int(p.z)
+
+            current_range = self.exploration_ranges[self.current_range_index]
+
+            # Finestra d'alçades al voltant del jugador, llegida per trossos:
+            # el lock de la connexió s'allibera entre tros i tros
+            heightmap = fetch_heightmap(
+                self.mc, base_x, base_z, current_range, mc_lock=self.mc_lock
+            )
+            if visuals_enabled("full"):
+                self._mark_probes(heightmap)
+            footprint = self.site_footprint or (
+                self.flat_zone_size,
+                self.flat_zone_size,
+            )
+            # Tots els llocs candidats, puntuats; ens quedem els millors disjunts
+            sites = SiteIndex(heightmap, (base_x, base_z), footprint).best(
+                self.max_sites
+            )
+            flat_zones = [(site.x, site.z, site.y) for site in sites]
+
+            if flat_zones:
+                # Marquem el millor lloc (la seva cantonada) amb un bloc extra
+                site_x, site_z, y = flat_zones[0]
+                if self.mc_lock:
+                    self.mc_lock.acquire()
+                try:
+                    mark_bot(self.mc, site_x, y + 1, site_z, wool_color=11)
+                finally:
+                    if self.mc_lock:
+                        self.mc_lock.release()
+
+                with self.state_lock:
+                    self.terrain_map = {"flat_zones": flat_zones}
+                self.log.debug(f"Terreny percebut: {self.terrain_map}")
+            else:
+                msg = "No s'ha trobat cap zona plana en el rang explorat."
+                self.log.info(msg)
+                if self.mc_lock:
+                    self.mc_lock.acquire()
+                try:
+                    self.mc.postToChat(f"[{self.name}] {msg}")
+                finally:
+                    if self.mc_lock:
+                        self.mc_lock.release()
+                # Aturem el workflow ja que no s'ha trobat zona
+                self.set_state(AgentState.STOPPED, reason="Zona plana no trobada")
         except Exception as e:
             self.set_state(AgentState.ERROR, reason=f"Error al percebre: {e}")
             self.log.error(f"Error en perceive: {e}", exc_info=True)
 
+    def _mark_probes(self, heightmap):
+        """Marca cada columna inspeccionada (només en nivell de visualització full)."""
+        for row in range(heightmap.depth):
+            z = heightmap.origin_z + row
+            for col in range(heightmap.width):
+                x = heightmap.origin_x + col
+                mark_bot(
+                    self.mc,
+                    x,
+                    heightmap.get(x, z),
+                    z,
+                    wool_color=11,
+                    detail=True,
+                    mc_lock=self.mc_lock,
+                )
+
     def decide(self):
         """Selecciona la zona objectiu si està en mode RUNNING."""
         if self.state != AgentState.RUNNING or self.map_sent:
@@ -163,7 +164,7 @@ class ExplorerBot(BaseAgent):
 
         with self.state_lock:
             if self.terrain_map.get("flat_zones"):
-                # agafem la primera zona trobada
+                # agafem el lloc amb millor puntuació
                 self.target_zone = self.terrain_map["flat_zones"][0]
                 self.log.debug(f"Zona plana seleccionada: {self.target_zone}")
 
@@ -176,6 +177,10 @@ class ExplorerBot(BaseAgent):
             if not self.target_zone or self.map_sent:
                 return
             x, z, y = self.target_zone
+            alternatives = [
+                {"x": ax, "y": ay, "z": az}
+                for ax, az, ay in self.terrain_map.get("flat_zones", [])[1:]
+            ]
 
         if self.mc_lock:
             self.mc_lock.acquire()
@@ -191,7 +196,10 @@ class ExplorerBot(BaseAgent):
                 msg_type="map.v1",
                 source=self.name,
                 target="BuilderBot",
-                payload={"zone": {"x": x, "y": y, "z": z}},
+                payload={
+                    "zone": {"x": x, "y": y, "z": z},
+                    "alternatives": alternatives,
+                },
                 context={"state": self.state.name},
             )
             self.message_bus.publish(msg)
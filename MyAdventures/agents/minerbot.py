@@ -1,7 +1,9 @@
 from .base_agent import BaseAgent, AgentState
 from utils.communication import MessageProtocol
-from utils.discovery import discover_strategies
+from utils.discovery import LazyInstances, discover_strategies
 from utils.visuals import mark_bot
+from strategies.sharding import MiningShard, split_requirements, split_shards
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,7 +21,6 @@ class MinerBot(BaseAgent):
         self.color = 1
 
         # Carrega les estratègies dinàmicament
-        self.strategies = []
         self._load_strategies()
         self.current_strategy_index = 0
 
@@ -27,26 +28,43 @@ class MinerBot(BaseAgent):
         self.requirements = None
         self.anchor_pos = None
 
-        self.message_bus.subscribe(self.on_message)
+        # Mineria incremental: pressupost per tick de cada fragment
+        self.blocks_per_tick = 64
+        self.tick_budget_ms = 50
+
+        # Mineria en paral·lel: un fragment de la regió per treballador
+        self.num_workers = max(1, int(self.system_flags.get("miner_workers", 1)))
+        self.connection_factory = None
+        self.shards = []
+        self._executor = None
+
+        # Una sola cua: l'inventari propi reproduït del diari (adreçat al
+        # BuilderBot) es recupera abans d'aplicar els requeriments
+        self.message_bus.subscribe(
+            self.on_message,
+            types=[
+                "materials.requirements.v1",
+                "inventory.v1",
+                "build.complete.v1",
+                "workflow.reset",
+            ],
+            policy=self.bus_policy,
+        )
         self.set_state(AgentState.IDLE)
 
     def _load_strategies(self):
-        """Carrega les estratègies dinàmicament ."""
+        """Registra les estratègies descobertes; cada una es crea quan es tria."""
         strategy_classes = discover_strategies()
         # Ordenem les estratègies
-        sorted_names = sorted(strategy_classes.keys())
-
-        for name in sorted_names:
-            cls = strategy_classes[name]
-            instance = cls()
-            self.strategies.append(instance)
-            self.log.info(f"Estratègia carregada: {name}")
+        self.strategies = LazyInstances(strategy_classes, sorted(strategy_classes))
+        self.log.info(f"Estratègies disponibles: {self.strategies.names}")
 
     def set_strategy(self, index: int):
         """S'estableix l'estratègia segons l'índex."""
         if 0 <= index < len(self.strategies):
+            self._close_shards()
             self.current_strategy_index = index
-            strategy_name = self.strategies[index].__class__.__name__
+            strategy_name = self.strategies.names[index]
             self.log.info(f"Estratègia canviada a l'índex {index}: {strategy_name}")
             return True, strategy_name
         else:
@@ -60,25 +78,92 @@ class MinerBot(BaseAgent):
 
     def switch_strategy_by_name(self, name: str) -> bool:
         """Canvia l'estratègia buscant-la pel nom de la classe."""
-        for i, strategy in enumerate(self.strategies):
-            if strategy.__class__.__name__ == name:
-                return self.set_strategy(i)
+        if name in self.strategies.names:
+            return self.set_strategy(self.strategies.names.index(name))
         self.log.warning(f"Estratègia no trobada: {name}")
         return False, None
 
+    def set_workers(self, num_workers: int, connection_factory=None):
+        """
+        Configura quants fragments de la regió es minen en paral·lel.
+
+        Args:
+            num_workers: Nombre de treballadors (fragments) de mineria
+            connection_factory: Funció índex -> (mc, mc_lock) que dona una
+                connexió pròpia a cada fragment addicional. Sense ella, tots
+                els fragments comparteixen la connexió de l'agent.
+        """
+        with self.state_lock:
+            # _close_shards també tanca l'executor: es tornarà a crear amb la nova mida
+            self._close_shards()
+            self.num_workers = max(1, num_workers)
+            self.connection_factory = connection_factory
+        self.log.info(f"Treballadors de mineria: {self.num_workers}")
+        return True
+
+    def _create_shards(self):
+        """Reparteix la regió sota l'anchor entre els treballadors."""
+        strategy = self.strategies[self.current_strategy_index]
+        anchors = split_shards(
+            self.anchor_pos, self.num_workers, getattr(strategy, "grid_size", 4)
+        )
+        self.shards = []
+        for index, anchor in enumerate(anchors):
+            if index == 0:
+                # El primer fragment és la mineria de sempre des de l'anchor
+                shard_strategy, mc, mc_lock = strategy, self.mc, self.mc_lock
+            else:
+                shard_strategy = strategy.spawn()
+                if self.connection_factory:
+                    mc, mc_lock = self.connection_factory(index)
+                else:
+                    mc, mc_lock = self.mc, self.mc_lock
+            self.shards.append(
+                MiningShard(index, anchor, shard_strategy, mc, mc_lock)
+            )
+        if len(self.shards) > 1:
+            self.log.info(
+                f"Regió repartida en {len(self.shards)} fragments: "
+                f"{[shard.anchor for shard in self.shards]}"
+            )
+
+    def _close_shards(self):
+        """Abandona les passades en curs i descarta els fragments i els seus fils."""
+        for shard in self.shards:
+            shard.close()
+        self.shards = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _active_strategies(self):
+        """Estratègies a les quals s'han d'enviar les comandes de control."""
+        strategies = []
+        if self.strategies and 0 <= self.current_strategy_index < len(self.strategies):
+            strategies.append(self.strategies[self.current_strategy_index])
+        for shard in self.shards:
+            if shard.strategy not in strategies:
+                strategies.append(shard.strategy)
+        return strategies
+
     def _release_locks(self):
-        """Allibera bloquejos espacials (anchor_pos)."""
+        """Allibera bloquejos espacials (anchor_pos i anchors dels fragments)."""
         if self.anchor_pos:
             self.log.info(f"Alliberant lock espacial a {self.anchor_pos}")
             self.anchor_pos = None
+        self._close_shards()
 
     def on_message(self, msg):
         """Gestiona missatges rebuts."""
+        msg_type = msg.get("type")
+        if msg_type == "inventory.v1":
+            self._on_replayed_inventory(msg)
+            return
+
         # Filtrar missatges propis
         if msg.get("source") == self.name:
             return
 
-        msg_type = msg.get("type")
         target = msg.get("target")
 
         # Acceptar missatges específics
@@ -94,6 +179,15 @@ class MinerBot(BaseAgent):
         elif msg_type == "workflow.reset":
             self.reset()
 
+    def _on_replayed_inventory(self, msg):
+        """Recupera l'inventari que aquest agent havia publicat abans de caure."""
+        if not msg.get("replayed") or msg.get("source") != self.name:
+            return
+        with self.state_lock:
+            for k, v in msg.get("payload", {}).get("inventory", {}).items():
+                self.inventory[k] = max(self.inventory.get(k, 0), v)
+        self.log.info(f"Inventari recuperat del diari: {self.inventory}")
+
     def _handle_requirements(self, msg):
         with self.state_lock:
             self.requirements = msg.get("payload", {}).get("needs")
@@ -167,6 +261,7 @@ class MinerBot(BaseAgent):
 
     def _finalize_mining(self):
         """Finalitza la mineria i envia l'inventari."""
+        self._close_shards()
         self.log.info(f"Mineria completada. Requeriments complerts: {self.inventory}")
         self._publish_inventory(final=True)
         self.set_state(
@@ -174,74 +269,157 @@ class MinerBot(BaseAgent):
         )
 
     def _mine_resources(self):
-        """Executa una passada de mineria amb una estratègia."""
+        """Avança la passada de mineria de cada fragment dins del pressupost del tick."""
         if not self.strategies:
             self.log.error("No hi ha estratègies carregades.")
             return
 
-        strategy = self.strategies[self.current_strategy_index]
+        if not self.shards:
+            self._create_shards()
 
-        # Bloc a bloc i no bloquejem per tota l'estratègia
-        collected = strategy.mine(
-            self.mc,
-            self.anchor_pos,
-            self.inventory,
-            self.requirements,
-            mc_lock=self.mc_lock,
-        )
+        self._assign_shares()
 
-        if strategy.is_stopped:
-            self.log.info("Estratègia parada. Parant MinerBot.")
-            self.stop()
+        # Cada tick mina un tram acotat i la passada es reprèn al següent
+        active = [
+            shard
+            for shard in self.shards
+            if not shard.exhausted and shard.cursor is not None
+        ]
+        results = self._step_shards(active)
+
+        if self.state == AgentState.STOPPED:
             return
 
         progress_made = False
-        if collected:
+        for collected in results:
             for k, v in collected.items():
                 if v > 0:
                     progress_made = True
                 self.inventory[k] = self.inventory.get(k, 0) + v
-            if progress_made:
-                self.log.info(
-                    f"Recol·lectat: {collected}. Inventari actual: {self.inventory}"
-                )
-                self._publish_inventory()
-
-            # Si s'ha acabat la passada pero encara falten coses -> Baixar
-        if not self._check_requirements_fulfilled():
-            # Per si anchor deixa de ser valid
-            if self.anchor_pos is None:
-                self.log.warning(
-                    "Ultima posicio d'ancoratge perduda, race condition, abortant."
-                )
-                return
-
-            # Moure anchor cap baix
+        if progress_made:
             self.log.info(
-                "Passada de mineria completada sense cobrir requeriments. Baixant nivell de mineria..."
+                f"Recol·lectat: {self._merge(results)}. Inventari actual: {self.inventory}"
+            )
+            # Un sol inventory.v1 amb el total de tots els fragments
+            self._publish_inventory()
+
+        for shard in active:
+            if shard.strategy.is_stopped:
+                self.log.info(f"Estratègia parada al fragment {shard.index}.")
+                shard.close()
+                shard.exhausted = True
+                continue
+
+            if shard.cursor is None or not shard.cursor.done:
+                continue
+            fulfilled = shard.fulfilled
+            shard.cursor = None
+            shard.requirements = None
+
+            # Si s'ha acabat la passada sense cobrir la seva part -> Baixar
+            if not fulfilled and not self._check_requirements_fulfilled():
+                self._descend_shard(shard)
+
+        if all(shard.exhausted for shard in self.shards):
+            self.log.warning(
+                "S'ha arribat al límit de profunditat (Y=6) sense trobar els materials requerits. Abandonant mineria."
             )
-            # Baixar segons la mida del strategy grid  - 4 de moment !!
-            descent_step = getattr(strategy, "grid_size", 4)
-            new_y = self.anchor_pos[1] - descent_step
+            self.stop()
 
-            if new_y <= 6:
-                self.log.warning(
-                    "S'ha arribat al límit de profunditat (Y=6) sense trobar els materials requerits. Abandonant mineria."
-                )
-                self.stop()
-                return
+    def _assign_shares(self):
+        """
+        Obre una passada a cada fragment lliure amb una part de la necessitat.
+
+        La necessitat pendent és el que falta a l'inventari menys el que
+        encara han de minar les passades obertes, i es reparteix entre els
+        fragments lliures: la suma de totes les parts mai supera el que falta.
+        Un fragment sense part es queda esperant fins al tick següent.
+        """
+        idle = [s for s in self.shards if not s.exhausted and s.cursor is None]
+        if not idle:
+            return
+        if not self.requirements:
+            for shard in idle:
+                shard.open(None)
+            return
 
-            self.anchor_pos = (self.anchor_pos[0], new_y, self.anchor_pos[2])
+        pending = {}
+        for material, needed in self.requirements.items():
+            outstanding = sum(shard.outstanding(material) for shard in self.shards)
+            pending[material] = needed - self.inventory.get(material, 0) - outstanding
+        for shard, share in zip(idle, split_requirements(pending, len(idle))):
+            if share:
+                shard.open(share)
+
+    def _step_shards(self, shards):
+        """Avança els fragments actius, en paral·lel si n'hi ha més d'un."""
+
+        def advance(shard):
+            return shard.step(
+                max_blocks=self.blocks_per_tick,
+                max_ms=self.tick_budget_ms,
+            )
+
+        if len(shards) <= 1:
+            return [advance(shard) for shard in shards]
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.num_workers, thread_name_prefix=f"{self.name}-shard"
+            )
+        return list(self._executor.map(advance, shards))
+
+    def _descend_shard(self, shard):
+        """Baixa l'anchor d'un fragment després d'una passada incompleta."""
+        # Per si anchor deixa de ser valid
+        if self.anchor_pos is None:
+            self.log.warning(
+                "Ultima posicio d'ancoratge perduda, race condition, abortant."
+            )
+            return
+
+        self.log.info(
+            "Passada de mineria completada sense cobrir requeriments. Baixant nivell de mineria..."
+        )
+        # Baixar segons la mida del strategy grid  - 4 de moment !!
+        new_y = shard.anchor[1] - shard.descent_step
+
+        if new_y <= 6:
+            self.log.warning(
+                f"El fragment {shard.index} ha arribat al límit de profunditat (Y=6)."
+            )
+            shard.exhausted = True
+            return
+
+        shard.anchor = (shard.anchor[0], new_y, shard.anchor[2])
+        if shard.index == 0:
+            self.anchor_pos = shard.anchor
+        # Els altres fragments poden estar fent servir la mateixa connexió
+        if self.mc_lock:
+            self.mc_lock.acquire()
+        try:
             mark_bot(
                 self.mc,
-                self.anchor_pos[0],
-                self.anchor_pos[1] + 4,
-                self.anchor_pos[2],
+                shard.anchor[0],
+                shard.anchor[1] + 4,
+                shard.anchor[2],
                 wool_color=self.color,
                 label=f"{self.name}_Anchor",
             )
-            self.log.info(f"Nova posició d'anchor: {self.anchor_pos}")
-            # El bucle torna a cridar _mine_resources en el següent cicle act() des de la nova posicio
+        finally:
+            if self.mc_lock:
+                self.mc_lock.release()
+        self.log.info(f"Nova posició d'anchor del fragment {shard.index}: {shard.anchor}")
+        # El bucle torna a cridar _mine_resources en el següent cicle act() des de la nova posicio
+
+    @staticmethod
+    def _merge(results):
+        """Suma els materials col·lectats per diversos fragments."""
+        merged = {}
+        for collected in results:
+            for k, v in collected.items():
+                merged[k] = merged.get(k, 0) + v
+        return merged
 
     def _publish_inventory(self, final=False):
         """Publica l'estat actual de l'inventari."""
@@ -271,22 +449,22 @@ class MinerBot(BaseAgent):
 
     def stop(self):
         """Atura la mineria."""
+        for strategy in self._active_strategies():
+            strategy.handle_stop()
         self.set_state(AgentState.STOPPED, "Aturat per comanda")
-        if self.strategies and 0 <= self.current_strategy_index < len(self.strategies):
-            self.strategies[self.current_strategy_index].handle_stop()
         self.log.info("Mineria aturada.")
 
     def pause(self):
         """Pausa el MinerBot i la seva estratègia actual."""
         super().pause()
-        if self.strategies and 0 <= self.current_strategy_index < len(self.strategies):
-            self.strategies[self.current_strategy_index].handle_pause()
+        for strategy in self._active_strategies():
+            strategy.handle_pause()
 
     def resume(self):
         """Repren el MinerBot i la seva estratègia actual."""
         super().resume()
-        if self.strategies and 0 <= self.current_strategy_index < len(self.strategies):
-            self.strategies[self.current_strategy_index].handle_resume()
+        for strategy in self._active_strategies():
+            strategy.handle_resume()
 
     def reset(self):
         """Reseteja l'estat del MinerBot."""
@@ -296,10 +474,10 @@ class MinerBot(BaseAgent):
             self.inventory = {}
             self.requirements = None
             self.anchor_pos = None
+            self._close_shards()
 
-            # Reset estrategies
-            if self.strategies:
-                for strategy in self.strategies:
-                    strategy.reset()
+            # Reset estrategies (les que encara no s'han creat ja són noves)
+            for strategy in self.strategies.loaded():
+                strategy.reset()
 
         self.set_state(AgentState.IDLE, "Resetejat per a nou workflow")
@@ -0,0 +1,89 @@
+"""
+BENCHMARK D'ARRENCADA: temps fins a tenir els agents de run.py creats
+
+Compara un arrencament en fred (sense manifest de descobriment) amb un
+arrencament amb el manifest ja desat. Cada mesura és un procés nou, com
+`run.py` o un subprocés de workflow.
+
+Ús:
+    python bench_startup.py [--runs N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Codi que s'executa a cada procés fill: les mateixes importacions que run.py
+# i la creació dels agents, sense connectar-se a Minecraft
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import run
+from utils import discovery
+if sys.argv[1] == "cold":
+    discovery.clear_manifest()
+
+
+class Bus:
+    def subscribe(self, callback, **options):
+        pass
+
+    def publish(self, msg):
+        pass
+
+
+t1 = time.perf_counter()
+agents = discovery.discover_agents()
+created = [agents[name](name, Bus(), None) for name in agents]
+t2 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "discovery": t2 - t1}))
+"""
+
+
+def measure(mode: str) -> dict:
+    """Executa un procés fill i retorna els seus temps (en segons)."""
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, mode],
+        cwd=HERE,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings["process"] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark d'arrencada")
+    parser.add_argument("--runs", type=int, default=10, help="Processos per mode")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("cold", "warm"):
+        measure(mode)  # escalfa la memòria cau de fitxers del sistema
+        runs = [measure(mode) for _ in range(args.runs)]
+        results[mode] = {
+            key: statistics.median(run[key] for run in runs)
+            for key in ("import", "discovery", "process")
+        }
+
+    print(f"{'mode':<6} {'import':>10} {'descobriment':>14} {'procés':>10}")
+    for mode, timing in results.items():
+        print(
+            f"{mode:<6} {timing['import'] * 1000:>8.1f}ms "
+            f"{timing['discovery'] * 1000:>12.1f}ms {timing['process'] * 1000:>8.1f}ms"
+        )
+    saved = results["cold"]["process"] - results["warm"]["process"]
+    print(f"Estalvi per arrencament amb manifest: {saved * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import asyncio
+from collections import deque
+from .connection import Connection, RequestError
+from .event import ChatEvent
+from .minecraft import intFloor
+from .util import flatten_parameters_to_bytestring
+from .vec3 import Vec3
+
+""" asyncio client for the Minecraft Pi / RaspberryJuice protocol.
+
+    Same method surface as the blocking Minecraft class, but every call is a
+    coroutine. The server answers requests in order, so each connection
+    keeps a FIFO of futures that a reader task resolves as reply lines come
+    in: any number of requests can be in flight on one connection, and many
+    agents can share one event loop instead of one thread each.
+
+    Requests spread over several connections are not ordered relative to
+    each other; use a single connection when a read must observe a write."""
+
+
+class AsyncConnection:
+    """Connection to a Minecraft Pi game over asyncio streams"""
+
+    # Longest reply line accepted. asyncio's default (64 KiB) is smaller than
+    # a world.getBlocks reply for a mining region of ~30k blocks.
+    ReadLimit = 64 * 1024 * 1024
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = deque()
+        self.readerTask = asyncio.get_running_loop().create_task(self._readLoop())
+
+    @staticmethod
+    async def open(address="localhost", port=4711):
+        reader, writer = await asyncio.open_connection(
+            address, port, limit=AsyncConnection.ReadLimit
+        )
+        return AsyncConnection(reader, writer)
+
+    @staticmethod
+    def _encode(f, data):
+        return b"".join([f, b"(", flatten_parameters_to_bytestring(data), b")", b"\n"])
+
+    async def send(self, f, *data):
+        """Sends a request that has no reply"""
+        self.writer.write(self._encode(f, data))
+        await self.writer.drain()
+
+    async def sendReceive(self, f, *data):
+        """Sends a request and waits for its reply (other requests may be in flight)"""
+        request = self._encode(f, data)
+        future = asyncio.get_running_loop().create_future()
+        # Queue the future and write with no await in between, so the FIFO
+        # order always matches the order on the wire
+        self.pending.append((future, request))
+        self.writer.write(request)
+        await self.writer.drain()
+        return await future
+
+    async def _readLoop(self):
+        error = ConnectionError("Connection closed")
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                future, request = self.pending.popleft()
+                if future.cancelled():
+                    continue
+                s = line.decode("utf-8", errors="replace").rstrip("\n")
+                if s == Connection.RequestFailed:
+                    future.set_exception(RequestError("%s failed" % request.strip()))
+                else:
+                    future.set_result(s)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            while self.pending:
+                future, _ = self.pending.popleft()
+                if not future.done():
+                    future.set_exception(error)
+
+    async def close(self):
+        """Closes the connection and stops the reader task"""
+        self.readerTask.cancel()
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except Exception:
+            pass
+
+
+class AsyncCmdPlayer:
+    """Methods for the host player"""
+
+    def __init__(self, connection):
+        self.conn = connection
+
+    async def getPos(self):
+        s = await self.conn.sendReceive(b"player.getPos")
+        return Vec3(*list(map(float, s.split(","))))
+
+    async def getTilePos(self):
+        s = await self.conn.sendReceive(b"player.getTile")
+        return Vec3(*list(map(int, s.split(","))))
+
+    async def setTilePos(self, *args):
+        await self.conn.send(b"player.setTile", intFloor(*args))
+
+
+class AsyncCmdEvents:
+    """Events"""
+
+    def __init__(self, connection):
+        self.conn = connection
+
+    async def clearAll(self):
+        await self.conn.send(b"events.clear")
+
+    async def pollChatPosts(self):
+        """Triggered by posts to chat => [ChatEvent]"""
+        s = await self.conn.sendReceive(b"events.chat.posts")
+        events = [e for e in s.split("|") if e]
+        return [
+            ChatEvent.Post(int(e[: e.find(",")]), e[e.find(",") + 1 :]) for e in events
+        ]
+
+
+class AsyncMinecraft:
+    """asyncio counterpart of Minecraft over one or more AsyncConnections"""
+
+    def __init__(self, connections):
+        self.connections = list(connections)
+        self._next = 0
+        # Events and the player are per session on the server: keep them on
+        # the first connection
+        self.conn = self.connections[0]
+        self.player = AsyncCmdPlayer(self.conn)
+        self.events = AsyncCmdEvents(self.conn)
+
+    def _pick(self):
+        """Round-robin over the connections for world requests"""
+        conn = self.connections[self._next]
+        self._next = (self._next + 1) % len(self.connections)
+        return conn
+
+    async def getBlock(self, *args):
+        """Get block (x,y,z) => id:int"""
+        return int(await self._pick().sendReceive(b"world.getBlock", intFloor(args)))
+
+    async def getBlocks(self, *args):
+        """Get a cuboid of blocks (x0,y0,z0,x1,y1,z1) => [id:int]"""
+        s = await self._pick().sendReceive(b"world.getBlocks", intFloor(args))
+        return list(map(int, s.split(",")))
+
+    async def getHeight(self, *args):
+        """Get the height of the world (x,z) => int"""
+        return int(await self._pick().sendReceive(b"world.getHeight", intFloor(args)))
+
+    async def getHeights(self, columns):
+        """Get the heights of many columns concurrently ([(x,z)]) => [int]"""
+        return list(await asyncio.gather(*(self.getHeight(c) for c in columns)))
+
+    async def setBlock(self, *args):
+        """Set block (x,y,z,id,[data])"""
+        await self._pick().send(b"world.setBlock", intFloor(args))
+
+    async def setBlocks(self, *args):
+        """Set a cuboid of blocks (x0,y0,z0,x1,y1,z1,id,[data])"""
+        await self._pick().send(b"world.setBlocks", intFloor(args))
+
+    async def postToChat(self, msg):
+        """Post a message to the game chat"""
+        await self.conn.send(b"chat.post", msg)
+
+    async def close(self):
+        """Closes every connection"""
+        await asyncio.gather(*(c.close() for c in self.connections))
+
+    @staticmethod
+    async def create(address="localhost", port=4711, connections=1):
+        conns = await asyncio.gather(
+            *(AsyncConnection.open(address, port) for _ in range(connections))
+        )
+        return AsyncMinecraft(conns)
@@ -1,6 +1,7 @@
 import socket
 import select
 import sys
+import time
 from .util import flatten_parameters_to_bytestring
 
 """ @author: Aron Nieminen, Mojang AB"""
@@ -15,10 +16,42 @@ class Connection:
 
     RequestFailed = "Fail"
 
+    # Maximum number of requests written before reading their replies back.
+    # Bounds the unread replies so neither side blocks on a full socket buffer.
+    MaxPipelineDepth = 1024
+
     def __init__(self, address, port):
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.connect((address, port))
+        self.address = address
+        self.port = port
+        self._connect()
         self.lastSent = ""
+        self.stats = {
+            "batches": 0,
+            "requests": 0,
+            "last_batch_latency": 0.0,
+            "max_batch_latency": 0.0,
+            "total_batch_latency": 0.0,
+        }
+
+    def _connect(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.connect((self.address, self.port))
+        # One persistent buffered reader: a new makefile() per read could
+        # discard bytes already buffered by the previous wrapper
+        self.reader = self.socket.makefile("r")
+
+    def close(self):
+        """Closes the reader and the socket"""
+        try:
+            self.reader.close()
+            self.socket.close()
+        except OSError:
+            pass
+
+    def reconnect(self):
+        """Drops the current socket and connects again to the same endpoint"""
+        self.close()
+        self._connect()
 
     def drain(self):
         """Drains the socket of incoming data"""
@@ -55,7 +88,7 @@ class Connection:
 
     def receive(self):
         """Receives data. Note that the trailing newline '\n' is trimmed"""
-        s = self.socket.makefile("r").readline().rstrip("\n")
+        s = self.reader.readline().rstrip("\n")
         if s == Connection.RequestFailed:
             raise RequestError("%s failed" % self.lastSent.strip())
         return s
@@ -64,3 +97,85 @@ class Connection:
         """Sends and receive data"""
         self.send(*data)
         return self.receive()
+
+    def sendMany(self, requests):
+        """Sends many encoded requests that have no reply with one socket write"""
+        if requests:
+            self._send(b"".join(requests))
+
+    def pipeline(self):
+        """Returns a Pipeline that batches requests over this connection"""
+        return Pipeline(self)
+
+    def sendReceiveMany(self, requests):
+        """
+        Sends already encoded requests pipelined and returns the replies in order.
+
+        Requests are written in chunks of at most MaxPipelineDepth with a single
+        sendall each, then the replies of the chunk are read back from the
+        persistent reader. All replies are consumed before a failure is raised
+        so the stream stays aligned for the next request.
+        """
+        replies = []
+        failed = None
+        for start in range(0, len(requests), Connection.MaxPipelineDepth):
+            chunk = requests[start : start + Connection.MaxPipelineDepth]
+            t0 = time.perf_counter()
+            self._send(b"".join(chunk))
+            for request in chunk:
+                s = self.reader.readline().rstrip("\n")
+                if s == Connection.RequestFailed and failed is None:
+                    failed = request
+                replies.append(s)
+            self._recordBatch(len(chunk), time.perf_counter() - t0)
+
+        if failed is not None:
+            raise RequestError("%s failed" % failed.strip())
+        return replies
+
+    def _recordBatch(self, size, latency):
+        """Updates the pipelined batch metrics"""
+        self.stats["batches"] += 1
+        self.stats["requests"] += size
+        self.stats["last_batch_latency"] = latency
+        self.stats["total_batch_latency"] += latency
+        if latency > self.stats["max_batch_latency"]:
+            self.stats["max_batch_latency"] = latency
+
+    def getStats(self):
+        """Returns the pipelined batch metrics, with the mean batch latency"""
+        stats = dict(self.stats)
+        batches = stats["batches"]
+        stats["avg_batch_latency"] = (
+            stats["total_batch_latency"] / batches if batches else 0.0
+        )
+        return stats
+
+
+class Pipeline:
+    """Queues requests to be flushed together over one Connection"""
+
+    def __init__(self, connection):
+        self.conn = connection
+        self.requests = []
+
+    def __len__(self):
+        return len(self.requests)
+
+    def queue(self, f, *data):
+        """Queues a request (same arguments as Connection.send)"""
+        self.requests.append(
+            b"".join([f, b"(", flatten_parameters_to_bytestring(data), b")", b"\n"])
+        )
+
+    def send(self):
+        """Sends every queued request that has no reply in one write"""
+        requests, self.requests = self.requests, []
+        self.conn.sendMany(requests)
+
+    def flush(self):
+        """Sends every queued request and returns the replies in order"""
+        requests, self.requests = self.requests, []
+        if not requests:
+            return []
+        return self.conn.sendReceiveMany(requests)
@@ -188,10 +188,31 @@ class Minecraft:
         """Set a cuboid of blocks (x0,y0,z0,x1,y1,z1,id,[data])"""
         self.conn.send(b"world.setBlocks", intFloor(args))
 
+    def setBlockList(self, blocks):
+        """Set many single blocks with one socket write ([(x,y,z,id,[data])])"""
+        pipeline = self.conn.pipeline()
+        for block in blocks:
+            pipeline.queue(b"world.setBlock", intFloor(block))
+        pipeline.send()
+
     def getHeight(self, *args):
         """Get the height of the world (x,z) => int"""
         return int(self.conn.sendReceive(b"world.getHeight", intFloor(args)))
 
+    def getHeights(self, columns):
+        """Get the heights of many columns pipelined ([(x,z)]) => [int]"""
+        pipeline = self.conn.pipeline()
+        for column in columns:
+            pipeline.queue(b"world.getHeight", intFloor(column))
+        return [int(h) for h in pipeline.flush()]
+
+    def getBlockList(self, positions):
+        """Get the blocks at many positions pipelined ([(x,y,z)]) => [id:int]"""
+        pipeline = self.conn.pipeline()
+        for position in positions:
+            pipeline.queue(b"world.getBlock", intFloor(position))
+        return [int(b) for b in pipeline.flush()]
+
     def getPlayerEntityIds(self):
         """Get the entity ids of the connected players => [id:int]"""
         ids = self.conn.sendReceive(b"world.getPlayerIds")
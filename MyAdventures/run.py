@@ -7,10 +7,11 @@ import time
 import logging
 import threading
 import argparse
-from utils.communication import MessageBus
+from utils.communication import MessageBus, MessageProtocol
 from utils.discovery import discover_agents
 from utils.logging_config import setup_logging
 from utils.chat_commands import create_default_handlers
+from utils.visuals import flush_markers, get_marker_stats, set_visual_level
 
 logger = logging.getLogger(__name__)
 
@@ -24,15 +25,83 @@ def safe_mc_post(mc, lock, message):
         mc.postToChat(message)
 
 
-def main():
-    """Inicialitza el sistema i manté un bucle esperant comandes."""
-
+def configure_workflow(
+    agents_dict, miner_strategy=None, builder_plan=None, explorer_range=None
+):
+    """Aplica la configuració d'un workflow als agents d'aquest procés."""
+    # Configurar Miner
+    if miner_strategy:
+        miner = agents_dict.get("MinerBot")
+        if miner:
+            if miner.switch_strategy_by_name(miner_strategy):
+                logger.info(f"WORKFLOW CONFIG: MinerBot estrategia: {miner_strategy}")
+            else:
+                logger.error(
+                    f"WORKFLOW CONFIG: No s'ha pogut posar l'estratègia {miner_strategy}"
+                )
+
+    # Configurar Builder
+    if builder_plan:
+        builder = agents_dict.get("BuilderBot")
+        if builder:
+            if builder.switch_plan(builder_plan):
+                logger.info(f"WORKFLOW CONFIG: BuilderBot pla: {builder_plan}")
+            else:
+                logger.error(
+                    f"WORKFLOW CONFIG: No s'ha pogut posar el pla {builder_plan}"
+                )
+
+    # Configurar Explorer
+    if explorer_range:
+        explorer_agent = agents_dict.get("ExplorerBot")
+        if explorer_agent:
+            if explorer_agent.set_range(explorer_range):
+                logger.info(f"WORKFLOW CONFIG: ExplorerBot rang: {explorer_range}")
+            else:
+                logger.error(
+                    f"WORKFLOW CONFIG: No s'ha pogut posar el rang {explorer_range}"
+                )
+
+
+def parse_args(argv=None):
+    """Llegeix les opcions de la línia de comandes."""
     parser = argparse.ArgumentParser(description="Sistema Multi-Agent per Minecraft")
     parser.add_argument(
         "--workflow",
         action="store_true",
         help="Executa en mode workflow automàtic (subprocess)",
     )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help=(
+            "Procés treballador: executa els workflows que rep pel bus compartit "
+            "(cal --agents)"
+        ),
+    )
+    parser.add_argument(
+        "--bus-address",
+        type=str,
+        help="Socket local del bus compartit (el procés interactiu l'obre)",
+    )
+    parser.add_argument(
+        "--agents",
+        type=str,
+        help=(
+            "Agents que executa aquest procés, separats per comes (per defecte "
+            "tots; cap al concentrador del bus compartit; obligatori amb --worker)"
+        ),
+    )
+    parser.add_argument(
+        "--journal",
+        type=str,
+        help="Carpeta del diari persistent dels missatges d'estat del bus",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reprèn l'estat enregistrat al diari en lloc de començar de nou",
+    )
     parser.add_argument(
         "--miner-strategy", type=str, help="Nom de l'estratègia de mineria a utilitzar"
     )
@@ -42,109 +111,291 @@ def main():
     parser.add_argument(
         "--explorer-range", type=int, help="Rang d'exploració per a ExplorerBot"
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--scheduler-workers",
+        type=int,
+        default=4,
+        help="Fils del planificador d'agents (0: un fil per agent)",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=0,
+        help="Nombre de connexions del pool (0: una sola connexió compartida)",
+    )
+    parser.add_argument(
+        "--miner-workers",
+        type=int,
+        default=1,
+        help="Fragments de la regió que el MinerBot mina en paral·lel",
+    )
+    parser.add_argument(
+        "--visuals",
+        choices=["off", "summary", "full"],
+        default="summary",
+        help="Marcadors al món: cap, només els principals o totes les sondes",
+    )
+    parser.add_argument(
+        "--progress-rate",
+        type=float,
+        default=5.0,
+        help="Missatges de progrés de construcció per segon (0: sense límit)",
+    )
+    parser.add_argument(
+        "--build-chunk-size",
+        type=int,
+        default=4096,
+        help="Blocs del pla que el BuilderBot genera i agrupa de cop",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=1024,
+        help="Blocs col·locats entre checkpoints de construcció (a més de cada tros)",
+    )
+    parser.add_argument(
+        "--world-cache",
+        action="store_true",
+        help="Activa la memòria cau de lectures del món (blocs i alçades)",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=5.0,
+        help="Segons de validesa de les entrades de la memòria cau del món",
+    )
+    args = parser.parse_args(argv)
+    if args.worker and args.agents is None:
+        # Dos treballadors amb tots els agents els duplicarien al bus compartit
+        parser.error("--worker necessita --agents (cada agent en un sol procés)")
+    return args
+
+
+def build_system_flags(args):
+    """Flags del sistema compartits per tots els agents del procés."""
+    return {
+        # Els treballadors només executen workflows: sempre en mode workflow
+        "workflow_mode": args.workflow or args.worker,
+        "pool_size": args.pool_size,
+        "miner_workers": args.miner_workers,
+        "visuals": args.visuals,
+        "progress_rate": args.progress_rate,
+        "build_chunk_size": args.build_chunk_size,
+        "checkpoint_every": args.checkpoint_every,
+        "bus_address": args.bus_address,
+    }
+
+
+def select_agents(agent_classes, args):
+    """
+    Agents que executa aquest procés.
+
+    Amb el bus compartit cada agent ha de viure en un sol procés: si el
+    concentrador (procés interactiu amb `--bus-address`) no rep `--agents`,
+    no n'executa cap, i els treballadors sempre diuen quins agents executen.
+    """
+    if args.agents is None:
+        if args.bus_address and not args.workflow:
+            logger.info(
+                "Bus compartit: el concentrador no executa agents "
+                "(fes servir --agents per triar-ne)"
+            )
+            return {}
+        return agent_classes
+    hosted = {name.strip() for name in args.agents.split(",") if name.strip()}
+    # Només s'importen els mòduls dels agents d'aquest procés
+    return {name: agent_classes[name] for name in agent_classes if name in hosted}
+
+
+def main():
+    """Inicialitza el sistema i manté un bucle esperant comandes."""
+    args = parse_args()
 
     setup_logging()
     logger.info("=" * 60)
-    mode_str = "WORKFLOW AUTOMATITZAT" if args.workflow else "INTERACTIU"
+    if args.workflow:
+        mode_str = "WORKFLOW AUTOMATITZAT"
+    elif args.worker:
+        mode_str = "TREBALLADOR"
+    else:
+        mode_str = "INTERACTIU"
     logger.info(f"Sistema Multi-Agent per Minecraft - Mode {mode_str}")
     logger.info("=" * 60)
 
+    set_visual_level(args.visuals)
+
     # Connectar a Minecraft
+    pool = None
+    world_cache = None
     try:
         from mcpi.minecraft import Minecraft
 
-        mc = Minecraft.create()
-        logger.info("[OK] Connectat a Minecraft correctament")
+        if args.pool_size > 0:
+            from utils.connection_pool import ConnectionPool
+
+            pool = ConnectionPool(size=args.pool_size)
+            pool.start_health_checks()
+            mc, mc_lock = pool.lease("System")
+            logger.info(f"[OK] Pool de {args.pool_size} connexions a Minecraft")
+        else:
+            mc = Minecraft.create()
+            mc_lock = threading.RLock()
+            logger.info("[OK] Connectat a Minecraft correctament")
+
+        if args.world_cache:
+            from utils.world_cache import CachedMinecraft, WorldCache
+
+            world_cache = WorldCache(ttl=args.cache_ttl)
+            mc = CachedMinecraft(mc, world_cache)
+            logger.info(f"[OK] Memòria cau del món activada (TTL {args.cache_ttl}s)")
     except Exception as e:
         logger.error(f"[ERROR] No s'ha pogut connectar a Minecraft: {e}")
         logger.error("Assegura't que el servidor estigui executant-se")
         raise SystemExit(1)
 
-    mc_lock = threading.RLock()
+    def agent_connection(name):
+        """Retorna la connexió (mc, lock) que ha de fer servir un agent."""
+        if pool is None:
+            return mc, mc_lock
+        agent_mc, agent_lock = pool.lease(name)
+        if world_cache is not None:
+            agent_mc = CachedMinecraft(agent_mc, world_cache)
+        return agent_mc, agent_lock
 
     # Inicialitzar Bus de Missatges
-    bus = MessageBus()
-    logger.info("[OK] Bus de missatges inicialitzat (Mode Broadcast)")
+    # El progrés, el checkpoint i l'inventari són valors absoluts: només cal
+    # l'últim pendent
+    bus = MessageBus(
+        coalesce_types=("build.v1", "build.checkpoint.v1", "inventory.v1")
+    )
+    logger.info("[OK] Bus de missatges inicialitzat (encaminament per tipus)")
+
+    # Bus compartit: el procés interactiu l'obre i els altres s'hi connecten
+    bus_hub = bus_bridge = None
+    if args.bus_address:
+        from utils.bus_transport import BusBridge, BusHub
+
+        try:
+            if args.workflow or args.worker:
+                bus_bridge = BusBridge(bus, args.bus_address)
+                bus_bridge.start()
+            else:
+                bus_hub = BusHub(bus, args.bus_address)
+                bus_hub.start()
+        except OSError as e:
+            logger.error(f"[ERROR] Bus compartit no disponible: {e}")
+            if args.worker:
+                raise SystemExit(1)
+
+    # Diari persistent: permet reprendre el workflow després d'una caiguda
+    journal = None
+    if args.journal:
+        from utils.journal import MessageJournal
+
+        journal = MessageJournal(args.journal)
+        journal.compact()
+        journal.attach(bus)
+        logger.info(f"[OK] Diari de missatges a {args.journal}")
 
     # Inicialitza Flags del Sistema
-    system_flags = {"workflow_mode": args.workflow}
+    system_flags = build_system_flags(args)
 
     # Descobrir i inicialitzar agents
     agents_dict = {}
-    agent_classes = discover_agents()
+    agent_classes = select_agents(discover_agents(), args)
 
     for name, agent_cls in agent_classes.items():
         # inicialitza agent
-        agent_instance = agent_cls(name, bus, mc, mc_lock, system_flags)
+        agent_mc, agent_lock = agent_connection(name)
+        agent_instance = agent_cls(name, bus, agent_mc, agent_lock, system_flags)
         agents_dict[name] = agent_instance
         logger.info(f"[OK] Agent inicialitzat: {name}")
 
     logger.info(f"[OK] Total agents creats: {len(agents_dict)}")
 
-    # Iniciar Threads
+    # Cada fragment addicional del MinerBot té la seva pròpia connexió del pool
+    def shard_connection(index):
+        """Retorna la connexió del fragment `index` del MinerBot."""
+        return agent_connection(f"MinerBot-{index}")
+
+    miner = agents_dict.get("MinerBot")
+    if miner and args.miner_workers > 1:
+        miner.set_workers(
+            args.miner_workers, shard_connection if pool is not None else None
+        )
+
+    # Iniciar el planificador d'agents (o un fil per agent)
+    scheduler = None
+    if args.scheduler_workers > 0:
+        from utils.scheduler import AgentScheduler
+
+        scheduler = AgentScheduler(workers=args.scheduler_workers)
+        for agent in agents_dict.values():
+            agent.attach_scheduler(scheduler)
+
     for agent in agents_dict.values():
         agent.start_loop(tick_interval=0.2)
-    logger.info("[OK] Fils d'agents en execució")
+
+    if scheduler is not None:
+        scheduler.start()
+        logger.info("[OK] Agents en execució al planificador central")
+    else:
+        logger.info("[OK] Fils d'agents en execució")
 
     # Si estem en mode workflow, apliquem configuracions inicials
     if args.workflow:
-        # Configurar Miner
-        if args.miner_strategy:
-            miner = agents_dict.get("MinerBot")
-            if miner:
-                if miner.switch_strategy_by_name(args.miner_strategy):
-                    logger.info(
-                        f"WORKFLOW CONFIG: MinerBot estrategia: {args.miner_strategy}"
-                    )
-                else:
-                    logger.error(
-                        f"WORKFLOW CONFIG: No s'ha pogut posar l'estratègia {args.miner_strategy}"
-                    )
-
-        # Configurar Builder
-        if args.builder_plan:
-            builder = agents_dict.get("BuilderBot")
-            if builder:
-                if builder.switch_plan(args.builder_plan):
-                    logger.info(f"WORKFLOW CONFIG: BuilderBot pla: {args.builder_plan}")
-                else:
-                    logger.error(
-                        f"WORKFLOW CONFIG: No s'ha pogut posar el pla {args.builder_plan}"
-                    )
-
-        # Configurar Explorer
-        if args.explorer_range:
-            explorer_agent = agents_dict.get("ExplorerBot")
-            if explorer_agent:
-                if explorer_agent.set_range(args.explorer_range):
-                    logger.info(
-                        f"WORKFLOW CONFIG: ExplorerBot rang: {args.explorer_range}"
-                    )
-                else:
-                    logger.error(
-                        f"WORKFLOW CONFIG: No s'ha pogut posar el rang {args.explorer_range}"
-                    )
+        configure_workflow(
+            agents_dict, args.miner_strategy, args.builder_plan, args.explorer_range
+        )
+
+    # Reprendre l'estat del diari (zona, requeriments, inventari) un cop
+    # configurats els agents, perquè canviar el pla no el desfaci
+    resumed = 0
+    if journal is not None and args.resume:
+        resumed = journal.replay(bus)
+        logger.info(f"[OK] Estat reprès del diari: {resumed} missatges")
 
+    if args.workflow:
         # Iniciar Workflow
-        logger.info("WORKFLOW: Iniciant seqüència automàtica...")
         explorer = agents_dict.get("ExplorerBot")
-        # reset per netejar tot
-        from utils.communication import MessageProtocol
-
-        rst_msg = MessageProtocol.create_message("workflow.reset", "System", "all", {})
-        bus.publish(rst_msg)
-
-        time.sleep(1)
-
-        # Iniciar Explorer
-        explorer.start()
-        logger.info("WORKFLOW: ExplorerBot iniciat.")
+        if resumed:
+            logger.info("WORKFLOW: Continuant des de l'estat del diari.")
+        else:
+            logger.info("WORKFLOW: Iniciant seqüència automàtica...")
+            # reset per netejar tot
+            rst_msg = MessageProtocol.create_message(
+                "workflow.reset", "System", "all", {}
+            )
+            bus.publish(rst_msg)
+
+            time.sleep(1)
+
+            # Iniciar Explorer (si s'executa en aquest procés)
+            if explorer:
+                explorer.start()
+                logger.info("WORKFLOW: ExplorerBot iniciat.")
+
+    # Els treballadors executen els workflows que arriben pel bus compartit
+    if args.worker:
+
+        def on_workflow_start(msg):
+            configure_workflow(agents_dict, **msg["payload"])
+            time.sleep(1)  # que el workflow.reset arribi abans a tots els agents
+            explorer = agents_dict.get("ExplorerBot")
+            if explorer:
+                explorer.start()
+                logger.info("WORKFLOW: ExplorerBot iniciat.")
+
+        bus.subscribe(on_workflow_start, types=["workflow.start.v1"])
+        logger.info("[OK] Treballador esperant workflows pel bus compartit")
 
     # Configurar Gestor de Comandes (en workflow no escoltem xat)
-    cmd_handler = create_default_handlers(agents_dict, mc, mc_lock, system_flags)
+    cmd_handler = create_default_handlers(
+        agents_dict, mc, mc_lock, system_flags, message_bus=bus, bus_hub=bus_hub
+    )
+    listen_chat = not (args.workflow or args.worker)
 
-    if not args.workflow:
+    if listen_chat:
         logger.info("[OK] Sistema de comandes de xat inicialitzat")
         safe_mc_post(
             mc,
@@ -162,12 +413,7 @@ def main():
             if args.workflow:
                 builder = agents_dict.get("BuilderBot")
                 # Comprovar si s'ha completat la construcció (tots els blocs colocats)
-                if (
-                    builder
-                    and builder.inventory
-                    and builder.build_plan
-                    and builder.build_index >= len(builder.build_plan)
-                ):
+                if builder and builder.inventory and builder.build_complete:
                     logger.info("WORKFLOW: Construcció completada. Tancant procés...")
                     time.sleep(2)  # Donar temps a logs finals
                     break
@@ -175,6 +421,11 @@ def main():
                 time.sleep(1)
                 continue
 
+            # MODE TREBALLADOR: els workflows arriben pel bus
+            if args.worker:
+                time.sleep(1)
+                continue
+
             # MODE INTERACTIU: Escoltar Xat
             current_time = time.time()
             if current_time - last_check >= check_interval:
@@ -207,9 +458,39 @@ def main():
             agent.stop()
             agent.stop_loop()
 
-        if not args.workflow:
+        logger.info(f"Estadístiques del bus de missatges: {bus.get_stats()}")
+        for endpoint in (bus_hub, bus_bridge):
+            if endpoint is not None:
+                logger.info(f"Estadístiques del bus compartit: {endpoint.get_stats()}")
+                endpoint.stop()
+        if journal is not None:
+            journal.close()
+            logger.info(f"Estadístiques del diari: {journal.get_stats()}")
+        bus.stop()
+
+        if scheduler is not None:
+            scheduler.stop()
+            logger.info(f"Estadístiques del planificador: {scheduler.get_stats()}")
+
+        # Escriure els marcadors de detall que encara són al buffer
+        flush_markers()
+        if args.visuals == "full":
+            logger.info(f"Estadístiques dels marcadors: {get_marker_stats()}")
+
+        if world_cache is not None:
+            logger.info(
+                f"Estadístiques de la memòria cau del món: {world_cache.get_stats()}"
+            )
+
+        if pool is not None:
+            logger.info(f"Estadístiques del pool de connexions: {pool.get_stats()}")
+
+        if listen_chat:
             safe_mc_post(mc, mc_lock, "Sistema Multi-Agent parat")
 
+        if pool is not None:
+            pool.close()
+
 
 if __name__ == "__main__":
     main()
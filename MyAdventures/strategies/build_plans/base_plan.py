@@ -1,8 +1,7 @@
 from abc import ABC, abstractmethod
-import csv
-import os
 import logging
-from utils.validators import es_fila_valida
+from .compiled import CompiledPlan, compile_csv
+from .streaming import DEFAULT_CHUNK_SIZE, BuildCursor
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +9,20 @@ logger = logging.getLogger(__name__)
 class BuildPlan(ABC):
     """Classe base per a tots els plans de construcció."""
 
+    # Fitxer CSV de `data/plans` amb els blocs del pla (None: es generen en codi)
+    csv_file = None
+
+    # Desar també en disc (format binari) els plans CSV compilats
+    disk_cache = True
+
+    # Construir en l'ordre de `CompiledPlan.build_order` (capes, material, Morton)
+    optimise_order = True
+
+    @classmethod
+    def instances(cls):
+        """Plans que aporta aquesta classe (per defecte, una instància sense args)."""
+        return [cls()]
+
     @property
     @abstractmethod
     def name(self):
@@ -17,27 +30,72 @@ class BuildPlan(ABC):
         pass
 
     @property
-    @abstractmethod
     def bom(self):
-        """Llista de materials necessaris (Bill of Materials)."""
-        pass
+        """
+        Llista de materials necessaris (Bill of Materials).
+
+        Es compta a partir dels blocs del pla compilat, de manera que sempre
+        coincideix amb `generate()`. El recompte queda memoritzat al pla
+        compilat: mentre la font del pla no canviï no es torna a fer.
+        """
+        return dict(self.compiled().bom())
 
     @abstractmethod
     def generate(self, x, y, z):
         """Genera la llista de blocs a construir relatius a (x, y, z)."""
         pass
 
-    def load_from_csv(self, filename, x, y, z):
-        """Mètode d'ajuda per carregar plans des de CSV."""
+    def footprint(self):
+        """Planta (amplada x, fondària z) del rectangle que ocupa el pla."""
+        min_dx, min_dz, max_dx, max_dz = self.compiled().bounds()
+        return (max_dx - min_dx + 1, max_dz - min_dz + 1)
+
+    def footprint_offset(self):
+        """Cantonada mínima (dx, dz) de la planta respecte del punt d'ancoratge."""
+        min_dx, min_dz, _, _ = self.compiled().bounds()
+        return (min_dx, min_dz)
+
+    def compiled(self):
+        """
+        Pla compilat (desplaçaments relatius a l'origen).
+
+        Els plans CSV fan servir el pla compartit de `compile_csv`, que es
+        torna a compilar quan el CSV canvia; la resta es compilen un sol cop i
+        només en conserven la còpia en ordre de construcció (si
+        `optimise_order`), sense la llista de blocs de `generate()`.
+        """
+        if self.csv_file:
+            return compile_csv(self.csv_file, self.disk_cache)
+        if getattr(self, "_compiled", None) is None:
+            compiled = CompiledPlan.from_blocks(self.generate(0, 0, 0))
+            if self.optimise_order:
+                compiled = compiled.build_order()
+            self._compiled = compiled
+        return self._compiled
 
-        csv_path = os.path.join("data", "plans", filename)
+    def size(self):
+        """Nombre total de blocs del pla."""
+        return len(self.compiled())
 
-        def to_absolute_block(row):
-            dx, dy, dz = int(row["dx"]), int(row["dy"]), int(row["dz"])
-            material = row["material"]
-            return (x + dx, y + dy, z + dz, material)
+    def iter_chunks(self, x, y, z, chunk_size=DEFAULT_CHUNK_SIZE, start=0):
+        """
+        Genera els blocs absoluts del pla en trossos de `chunk_size`.
 
-        with open(csv_path, mode="r", newline="") as f:
-            reader = csv.DictReader(f)
-            valid_rows = filter(es_fila_valida, reader)
-            return list(map(to_absolute_block, valid_rows))
+        Args:
+            x, y, z: Punt d'ancoratge
+            chunk_size: Blocs per tros
+            start: Primer bloc (en l'ordre de construcció) que s'ha de generar
+        """
+        compiled = self.compiled()
+        if self.optimise_order:
+            compiled = compiled.build_order()
+        for begin in range(start, len(compiled), chunk_size):
+            yield compiled.translate(x, y, z, begin, begin + chunk_size)
+
+    def open_cursor(self, x, y, z, chunk_size=DEFAULT_CHUNK_SIZE, position=0):
+        """Cursor de construcció en streaming ancorat a (x, y, z)."""
+        return BuildCursor(self, x, y, z, chunk_size=chunk_size, position=position)
+
+    def load_from_csv(self, filename, x, y, z):
+        """Mètode d'ajuda per carregar plans des de CSV (compilat un sol cop)."""
+        return compile_csv(filename, self.disk_cache).translate(x, y, z)
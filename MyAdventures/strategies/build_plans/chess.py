@@ -2,13 +2,11 @@ from .base_plan import BuildPlan
 
 
 class ChessPlan(BuildPlan):
+    csv_file = "chess.csv"
+
     @property
     def name(self):
         return "chess"
 
-    @property
-    def bom(self):
-        return {"stone": 18, "dirt": 18}
-
     def generate(self, x, y, z):
-        return self.load_from_csv("chess.csv", x, y, z)
+        return self.load_from_csv(self.csv_file, x, y, z)
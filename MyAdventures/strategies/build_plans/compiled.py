@@ -0,0 +1,334 @@
+"""
+Plans compilats: desplaçaments relatius empaquetats i paleta de materials.
+
+Un `CompiledPlan` guarda els blocs d'un pla com a desplaçaments (dx, dy, dz)
+enters de 16 bits i, per a cada bloc, l'índex del seu material dins d'una
+paleta. Així un pla es llegeix i valida un sol cop i `translate(x, y, z)`
+només ha de sumar l'origen a tots els desplaçaments (vectoritzat amb NumPy
+si està instal·lat).
+
+Els plans CSV es compilen una vegada per procés (memòria cau en memòria) i
+es poden desar en un format binari al costat del CSV, invalidat quan el CSV
+canvia de data o de mida.
+
+Format binari (little-endian)::
+
+    "MAPL" | versió u16 | mtime_ns del CSV u64 | mida del CSV u64
+    | nombre de blocs u32 | nombre de materials u16
+    | per material: longitud u8 + nom UTF-8
+    | desplaçaments int16 x 3 x blocs | índexs de material u16 x blocs
+"""
+
+import csv
+import logging
+import os
+import struct
+import sys
+import threading
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.validators import es_fila_valida
+
+try:
+    import numpy as np
+except ImportError:  # NumPy és opcional
+    np = None
+
+logger = logging.getLogger(__name__)
+
+PLANS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data",
+    "plans",
+)
+CACHE_DIR = os.path.join(PLANS_DIR, ".compiled")
+
+MAGIC = b"MAPL"
+VERSION = 1
+_HEADER = struct.Struct("<4sHQQIH")
+_INT16 = (-(1 << 15), (1 << 15) - 1)
+
+
+class CompiledPlan:
+    """Blocs d'un pla en forma de desplaçaments int16 i paleta de materials."""
+
+    def __init__(self, offsets, materials, palette: Sequence[str]):
+        """
+        Args:
+            offsets: Desplaçaments aplanats [dx0, dy0, dz0, dx1, ...]
+            materials: Índex de paleta de cada bloc
+            palette: Noms dels materials
+        """
+        self.palette = tuple(palette)
+        offsets = array("h", offsets)
+        materials = array("H", materials)
+        if len(offsets) != 3 * len(materials):
+            raise ValueError("Cal un material per cada desplaçament (dx, dy, dz)")
+        if np is not None:
+            self.offsets = np.frombuffer(offsets, dtype=np.int16).reshape(-1, 3)
+            self.materials = np.frombuffer(materials, dtype=np.uint16)
+        else:
+            self.offsets = offsets
+            self.materials = materials
+        self._bom = None
+        self._bounds = None
+        self._build_order = None
+
+    @classmethod
+    def from_blocks(cls, blocks) -> "CompiledPlan":
+        """Compila una llista de blocs (dx, dy, dz, material) relatius a l'origen."""
+        palette: Dict[str, int] = {}
+        offsets = array("h")
+        materials = array("H")
+        for dx, dy, dz, material in blocks:
+            for value in (dx, dy, dz):
+                if not _INT16[0] <= value <= _INT16[1]:
+                    raise ValueError(f"Desplaçament fora de rang int16: {value}")
+            offsets.extend((dx, dy, dz))
+            materials.append(palette.setdefault(material, len(palette)))
+        return cls(offsets, materials, list(palette))
+
+    def __len__(self) -> int:
+        return len(self.materials)
+
+    def bom(self) -> Dict[str, int]:
+        """Blocs de cada material (el pla és immutable: es compta un sol cop)."""
+        if self._bom is None:
+            if np is not None:
+                counts = np.bincount(self.materials, minlength=len(self.palette))
+            else:
+                counts = [0] * len(self.palette)
+                for index in self.materials:
+                    counts[index] += 1
+            self._bom = {
+                name: int(count) for name, count in zip(self.palette, counts) if count
+            }
+        return self._bom
+
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """Planta del pla: (dx mínim, dz mínim, dx màxim, dz màxim)."""
+        if self._bounds is None:
+            if not len(self):
+                self._bounds = (0, 0, -1, -1)
+            elif np is not None:
+                low = self.offsets.min(axis=0)
+                high = self.offsets.max(axis=0)
+                self._bounds = (int(low[0]), int(low[2]), int(high[0]), int(high[2]))
+            else:
+                dxs = self.offsets[0::3]
+                dzs = self.offsets[2::3]
+                self._bounds = (min(dxs), min(dzs), max(dxs), max(dzs))
+        return self._bounds
+
+    def build_order(self) -> "CompiledPlan":
+        """
+        El mateix pla en ordre de construcció (calculat un sol cop).
+
+        Els blocs queden de baix a dalt per capes, perquè cada bloc tingui
+        suport quan es col·loca; dins de cada capa, agrupats per material
+        (ordre de la paleta) i, dins de cada material, seguint una corba de
+        Morton sobre (dx, dz). Així els trossos consecutius del cursor són
+        regions compactes d'un sol material i s'agrupen en cuboides llargs.
+        Si una posició es repeteix, totes les còpies s'ordenen amb el material
+        de l'última (cada una conserva el seu): queden juntes i en el mateix
+        ordre relatiu, de manera que l'última continua guanyant.
+        """
+        if self._build_order is None:
+            offsets = self._flat_offsets()
+            materials = self._material_indices()
+            positions = list(zip(offsets[0::3], offsets[1::3], offsets[2::3]))
+            last = dict(zip(positions, materials))
+            keys = [
+                (dy, last[(dx, dy, dz)], _morton(dx, dz)) for dx, dy, dz in positions
+            ]
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            plan = CompiledPlan(
+                [offsets[3 * i + k] for i in order for k in range(3)],
+                [materials[i] for i in order],
+                self.palette,
+            )
+            plan._bom = self._bom
+            plan._build_order = plan
+            self._build_order = plan
+        return self._build_order
+
+    def translate(
+        self, x: int, y: int, z: int, start: int = 0, stop: Optional[int] = None
+    ) -> List[Tuple[int, int, int, str]]:
+        """
+        Blocs absoluts (x, y, z, material) amb el pla ancorat a (x, y, z).
+
+        `start` i `stop` limiten el resultat a un tros del pla. Els noms dels
+        materials i els desplaçaments de 64 bits només es calculen per al tros.
+        """
+        palette = self.palette
+        if np is not None:
+            # En int64 perquè sumar l'origen no desbordi
+            coords = (self.offsets[start:stop].astype(np.int64) + (x, y, z)).tolist()
+            names = [palette[i] for i in self.materials[start:stop].tolist()]
+            return [(c[0], c[1], c[2], m) for c, m in zip(coords, names)]
+        o = self.offsets
+        return [
+            (x + o[3 * i], y + o[3 * i + 1], z + o[3 * i + 2], palette[m])
+            for i, m in enumerate(self.materials[start:stop], start)
+        ]
+
+    def to_bytes(self, source_mtime: int = 0, source_size: int = 0) -> bytes:
+        """Serialitza el pla en el format binari."""
+        offsets = array("h", self._flat_offsets())
+        materials = array("H", self._material_indices())
+        if sys.byteorder == "big":
+            offsets.byteswap()
+            materials.byteswap()
+        parts = [
+            _HEADER.pack(
+                MAGIC,
+                VERSION,
+                source_mtime,
+                source_size,
+                len(materials),
+                len(self.palette),
+            )
+        ]
+        for name in self.palette:
+            encoded = name.encode("utf-8")
+            parts.append(struct.pack("<B", len(encoded)) + encoded)
+        parts.append(offsets.tobytes())
+        parts.append(materials.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Tuple["CompiledPlan", int, int]:
+        """
+        Llegeix un pla del format binari.
+
+        Returns:
+            tuple: (pla, mtime_ns del CSV d'origen, mida del CSV d'origen)
+        """
+        magic, version, mtime, size, count, palette_size = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Format de pla compilat desconegut")
+        pos = _HEADER.size
+        palette = []
+        for _ in range(palette_size):
+            length = data[pos]
+            palette.append(data[pos + 1 : pos + 1 + length].decode("utf-8"))
+            pos += 1 + length
+        offsets = array("h")
+        offsets.frombytes(data[pos : pos + 6 * count])
+        pos += 6 * count
+        materials = array("H")
+        materials.frombytes(data[pos : pos + 2 * count])
+        if len(materials) != count:
+            raise ValueError("Pla compilat truncat")
+        if sys.byteorder == "big":
+            offsets.byteswap()
+            materials.byteswap()
+        return cls(offsets, materials, palette), mtime, size
+
+    def _flat_offsets(self):
+        if np is not None:
+            return self.offsets.ravel().tolist()
+        return self.offsets
+
+    def _material_indices(self):
+        if np is not None:
+            return self.materials.tolist()
+        return self.materials
+
+
+def _spread(value: int) -> int:
+    """Intercala zeros entre els 16 bits de `value`."""
+    result = 0
+    for bit in range(16):
+        result |= ((value >> bit) & 1) << (2 * bit)
+    return result
+
+
+_SPREAD = [_spread(i) for i in range(256)]
+
+
+def _morton(a: int, b: int) -> int:
+    """Índex de la corba de Morton (ordre Z) de dos desplaçaments int16."""
+    a -= _INT16[0]
+    b -= _INT16[0]
+    return (
+        _SPREAD[a & 0xFF]
+        | _SPREAD[a >> 8] << 16
+        | _SPREAD[b & 0xFF] << 1
+        | _SPREAD[b >> 8] << 17
+    )
+
+
+# Plans CSV ja compilats en aquest procés: camí -> (mtime_ns, mida, pla)
+_compiled: Dict[str, Tuple[int, int, CompiledPlan]] = {}
+_compiled_lock = threading.Lock()
+
+
+def _parse_csv(csv_path: str) -> CompiledPlan:
+    with open(csv_path, mode="r", newline="") as f:
+        reader = csv.DictReader(f)
+        valid_rows = filter(es_fila_valida, reader)
+        return CompiledPlan.from_blocks(
+            (int(row["dx"]), int(row["dy"]), int(row["dz"]), row["material"])
+            for row in valid_rows
+        )
+
+
+def _cache_path(csv_path: str) -> str:
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(CACHE_DIR, f"{name}.plan")
+
+
+def _load_cached(csv_path: str, mtime: int, size: int) -> Optional[CompiledPlan]:
+    try:
+        with open(_cache_path(csv_path), "rb") as f:
+            plan, cached_mtime, cached_size = CompiledPlan.from_bytes(f.read())
+    except (OSError, ValueError, struct.error):
+        return None
+    if (cached_mtime, cached_size) != (mtime, size):
+        return None
+    return plan
+
+
+def _store_cached(csv_path: str, plan: CompiledPlan, mtime: int, size: int) -> None:
+    path = _cache_path(csv_path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(plan.to_bytes(mtime, size))
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.debug(f"No s'ha pogut desar el pla compilat {path}: {e}")
+
+
+def compile_csv(filename: str, disk_cache: bool = True) -> CompiledPlan:
+    """
+    Retorna el pla compilat d'un CSV de `data/plans`.
+
+    Args:
+        filename: Nom del fitxer CSV (o camí absolut)
+        disk_cache: Llegir i desar també la versió binària en disc
+
+    Returns:
+        CompiledPlan: Pla compilat (compartit entre crides mentre el CSV no canviï)
+    """
+    csv_path = os.path.join(PLANS_DIR, filename)
+    stat = os.stat(csv_path)
+    mtime, size = stat.st_mtime_ns, stat.st_size
+
+    with _compiled_lock:
+        cached = _compiled.get(csv_path)
+        if cached and cached[:2] == (mtime, size):
+            return cached[2]
+
+        plan = _load_cached(csv_path, mtime, size) if disk_cache else None
+        if plan is None:
+            plan = _parse_csv(csv_path)
+            logger.info(f"Pla {filename} compilat: {len(plan)} blocs")
+            if disk_cache:
+                _store_cached(csv_path, plan, mtime, size)
+        _compiled[csv_path] = (mtime, size, plan)
+        return plan
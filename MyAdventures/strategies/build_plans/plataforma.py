@@ -6,10 +6,6 @@ class PlataformaPlan(BuildPlan):
     def name(self):
         return "plataforma"
 
-    @property
-    def bom(self):
-        return {"dirt": 8, "stone": 8}
-
     def generate(self, x, y, z):
         plan = []
         platform_y = y + 1
@@ -0,0 +1,274 @@
+"""
+Plans esquemàtics: estructures grans en un format binari compacte.
+
+Un fitxer `.mschem` de `data/plans` descriu una estructura com una graella
+d'amplada x alçada x fondària. Cada capa horitzontal (una y) es codifica
+per separat en runs (repeticions, índex de paleta) i es comprimeix amb zlib;
+l'índex 0 és aire (no s'hi construeix res). La capçalera porta una taula
+amb la mida comprimida i el nombre de blocs de cada capa, de manera que:
+
+- `size()` i `footprint()` es llegeixen sense descomprimir res;
+- `iter_chunks()` descomprimeix les capes una a una, només quan calen, i
+  salta sense llegir-les les capes anteriors al bloc d'inici;
+- la llista de materials (BOM) es compta capa a capa a mesura que es
+  descodifiquen, sense expandir mai els runs en blocs.
+
+La capçalera i el BOM queden en memòria mentre el fitxer no canviï de data
+o de mida, com els plans CSV compilats.
+
+Format (little-endian)::
+
+    "MASC" | versió u16 | amplada u16 | alçada u16 | fondària u16
+    | nombre de blocs u32 | nombre de materials u16
+    | per material: longitud u8 + nom UTF-8
+    | per capa: mida comprimida u32 + blocs u32
+    | per capa: zlib(runs (repeticions u16, índex u16) en ordre dx, dz)
+"""
+
+import glob
+import logging
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from . import compiled
+from .base_plan import BuildPlan
+from .streaming import DEFAULT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+SCHEMATIC_SUFFIX = ".mschem"
+MAGIC = b"MASC"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHHHIH")
+_LAYER = struct.Struct("<II")
+_MAX_RUN = (1 << 16) - 1
+
+
+def _read_runs(data: bytes) -> array:
+    runs = array("H")
+    runs.frombytes(zlib.decompress(data))
+    if sys.byteorder == "big":
+        runs.byteswap()
+    return runs
+
+
+class SchematicPlan(BuildPlan):
+    """Pla llegit d'un fitxer `.mschem`, descodificat capa a capa."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Fitxer `.mschem` (relatiu a `data/plans` o absolut)
+        """
+        self.path = os.path.join(compiled.PLANS_DIR, path)
+        self._name = os.path.splitext(os.path.basename(path))[0]
+        self._lock = threading.Lock()
+        # (mtime_ns, mida) del fitxer quan se'n va llegir la capçalera
+        self._stamp = None
+        # Materials comptats de cada capa ja descodificada
+        self._layer_bom: Dict[int, Counter] = {}
+        self._bom = None
+        self._refresh()
+
+    @classmethod
+    def instances(cls) -> List["SchematicPlan"]:
+        """Un pla per cada fitxer `.mschem` de `data/plans`."""
+        plans = []
+        pattern = os.path.join(compiled.PLANS_DIR, f"*{SCHEMATIC_SUFFIX}")
+        for path in sorted(glob.glob(pattern)):
+            try:
+                plans.append(cls(path))
+            except (OSError, ValueError, struct.error) as e:
+                logger.error(f"No s'ha pogut llegir l'esquemàtic {path}: {e}")
+        return plans
+
+    def _refresh(self) -> None:
+        """Torna a llegir la capçalera si el fitxer ha canviat de data o de mida."""
+        stat = os.stat(self.path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return
+        self._read_header()
+        with self._lock:
+            self._layer_bom = {}
+            self._bom = None
+            self._stamp = stamp
+
+    def _read_header(self) -> None:
+        with open(self.path, "rb") as f:
+            header = f.read(_HEADER.size)
+            magic, version, width, height, depth, count, palette_size = (
+                _HEADER.unpack(header)
+            )
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("Format d'esquemàtic desconegut")
+            palette = []
+            for _ in range(palette_size):
+                length = f.read(1)[0]
+                palette.append(f.read(length).decode("utf-8"))
+            layers = []
+            offset = f.tell() + _LAYER.size * height
+            for _ in range(height):
+                length, blocks = _LAYER.unpack(f.read(_LAYER.size))
+                layers.append((offset, length, blocks))
+                offset += length
+        if sum(blocks for _, _, blocks in layers) != count:
+            raise ValueError("Taula de capes inconsistent")
+        self.width, self.height, self.depth = width, height, depth
+        self.palette = tuple(palette)
+        self._layers = layers
+        self._count = count
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def bom(self):
+        """Materials de tot el pla, sumant el recompte de cada capa."""
+        self._refresh()
+        if self._bom is None:
+            with open(self.path, "rb") as f:
+                for layer in range(self.height):
+                    if layer not in self._layer_bom:
+                        self._decode_layer(f, layer)
+            total = Counter()
+            for counts in self._layer_bom.values():
+                total.update(counts)
+            self._bom = dict(total)
+        return self._bom
+
+    def size(self):
+        self._refresh()
+        return self._count
+
+    def footprint(self):
+        self._refresh()
+        return (self.width, self.depth)
+
+    def footprint_offset(self):
+        return (0, 0)
+
+    def generate(self, x, y, z):
+        blocks = []
+        for chunk in self.iter_chunks(x, y, z, chunk_size=DEFAULT_CHUNK_SIZE):
+            blocks.extend(chunk)
+        return blocks
+
+    def _decode_layer(self, f, layer: int) -> array:
+        """Runs d'una capa; de pas en compta els materials."""
+        offset, length, _ = self._layers[layer]
+        f.seek(offset)
+        runs = _read_runs(f.read(length))
+        if layer not in self._layer_bom:
+            counts = Counter()
+            for i in range(0, len(runs), 2):
+                if runs[i + 1]:
+                    counts[self.palette[runs[i + 1] - 1]] += runs[i]
+            with self._lock:
+                self._layer_bom[layer] = counts
+        return runs
+
+    def _layer_blocks(self, f, layer: int, x: int, y: int, z: int) -> Iterator:
+        runs = self._decode_layer(f, layer)
+        palette = self.palette
+        depth = self.depth
+        cell = 0
+        for i in range(0, len(runs), 2):
+            count, index = runs[i], runs[i + 1]
+            if index:
+                material = palette[index - 1]
+                for c in range(cell, cell + count):
+                    yield (x + c // depth, y + layer, z + c % depth, material)
+            cell += count
+
+    def iter_chunks(self, x, y, z, chunk_size=DEFAULT_CHUNK_SIZE, start=0):
+        """Blocs absoluts en trossos, descomprimint només les capes necessàries."""
+        self._refresh()
+        chunk: List[Tuple[int, int, int, str]] = []
+        skip = start
+        with open(self.path, "rb") as f:
+            for layer, (_, _, blocks) in enumerate(self._layers):
+                if skip >= blocks:
+                    skip -= blocks
+                    continue
+                for block in self._layer_blocks(f, layer, x, y, z):
+                    if skip:
+                        skip -= 1
+                        continue
+                    chunk.append(block)
+                    if len(chunk) == chunk_size:
+                        yield chunk
+                        chunk = []
+        if chunk:
+            yield chunk
+
+
+def encode_schematic(blocks: Iterable[Tuple[int, int, int, str]]) -> bytes:
+    """
+    Codifica blocs relatius (dx, dy, dz, material) en format `.mschem`.
+
+    Els desplaçaments han de ser no negatius; si hi ha blocs repetits a la
+    mateixa posició, guanya l'últim.
+    """
+    cells: Dict[Tuple[int, int, int], str] = {}
+    for dx, dy, dz, material in blocks:
+        if min(dx, dy, dz) < 0:
+            raise ValueError(f"Desplaçament negatiu: {(dx, dy, dz)}")
+        cells[(dx, dy, dz)] = material
+    width = max((c[0] for c in cells), default=-1) + 1
+    height = max((c[1] for c in cells), default=-1) + 1
+    depth = max((c[2] for c in cells), default=-1) + 1
+    if max(width, height, depth) > _MAX_RUN:
+        raise ValueError("Estructura massa gran per al format")
+
+    palette: Dict[str, int] = {}
+    table = []
+    layers = []
+    for dy in range(height):
+        runs = array("H")
+        blocks_in_layer = 0
+        current, count = 0, 0
+        for dx in range(width):
+            for dz in range(depth):
+                material = cells.get((dx, dy, dz))
+                index = 0
+                if material:
+                    index = palette.setdefault(material, len(palette) + 1)
+                if index:
+                    blocks_in_layer += 1
+                if index == current and count < _MAX_RUN:
+                    count += 1
+                    continue
+                if count:
+                    runs.extend((count, current))
+                current, count = index, 1
+        if count:
+            runs.extend((count, current))
+        if sys.byteorder == "big":
+            runs.byteswap()
+        data = zlib.compress(runs.tobytes(), 9)
+        table.append(_LAYER.pack(len(data), blocks_in_layer))
+        layers.append(data)
+
+    parts = [
+        _HEADER.pack(
+            MAGIC, VERSION, width, height, depth, len(cells), len(palette)
+        )
+    ]
+    for name in palette:
+        encoded = name.encode("utf-8")
+        parts.append(struct.pack("<B", len(encoded)) + encoded)
+    return b"".join(parts + table + layers)
+
+
+def write_schematic(path: str, blocks: Iterable[Tuple[int, int, int, str]]) -> None:
+    """Desa blocs relatius en un fitxer `.mschem`."""
+    with open(path, "wb") as f:
+        f.write(encode_schematic(blocks))
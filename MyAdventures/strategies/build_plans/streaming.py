@@ -0,0 +1,129 @@
+"""
+Construcció en streaming: cursor sobre els blocs d'un pla per trossos.
+
+El `BuildCursor` no guarda mai el pla sencer. Demana els blocs al pla en
+trossos de `chunk_size` (`BuildPlan.iter_chunks`), agrupa cada tros en
+cuboides i només conserva els cuboides del tros actual. El progrés és un
+sol enter, `position` (blocs ja col·locats), de manera que el punt de
+control d'una construcció ocupa el mateix sigui quin sigui el pla.
+
+Dins d'un tros l'ordre dels cuboides és determinista; per això, per
+reprendre des de `position`, n'hi ha prou amb tornar a generar el tros on
+cau i saltar-ne els blocs ja col·locats.
+"""
+
+from typing import Optional
+
+from utils.build_batching import Cuboid, coalesce_cuboids, expand_cuboid
+
+DEFAULT_CHUNK_SIZE = 4096
+
+
+class BuildCursor:
+    """Posició d'una construcció dins d'un pla, amb el tros actual en cuboides."""
+
+    def __init__(
+        self,
+        plan,
+        x: int,
+        y: int,
+        z: int,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        position: int = 0,
+    ):
+        """
+        Args:
+            plan: BuildPlan a construir
+            x, y, z: Punt d'ancoratge del pla
+            chunk_size: Blocs que es generen i s'agrupen de cop
+            position: Blocs ja col·locats (per reprendre una construcció)
+        """
+        self.plan = plan
+        self.origin = (x, y, z)
+        self.chunk_size = max(1, chunk_size)
+        self.total = plan.size()
+        self.position = 0
+        self._chunks = None
+        self._runs = []
+        self._run_index = 0
+        self._exhausted = False
+        self._seek(position)
+
+    @classmethod
+    def from_checkpoint(cls, plan, checkpoint: dict) -> "BuildCursor":
+        """Reprèn la construcció descrita per `checkpoint()`."""
+        x, y, z = checkpoint["origin"]
+        return cls(
+            plan,
+            x,
+            y,
+            z,
+            chunk_size=checkpoint.get("chunk_size", DEFAULT_CHUNK_SIZE),
+            position=checkpoint.get("position", 0),
+        )
+
+    def _seek(self, position: int) -> None:
+        chunk_start = position - position % self.chunk_size
+        self._chunks = self.plan.iter_chunks(
+            *self.origin, chunk_size=self.chunk_size, start=chunk_start
+        )
+        self.position = chunk_start
+        self._load()
+        # Salta els blocs del tros que ja s'havien col·locat
+        skip = position - chunk_start
+        while skip > 0 and self._run_index < len(self._runs):
+            run = self._runs[self._run_index]
+            if run.size > skip:
+                self.split()
+                continue
+            self.advance()
+            skip -= run.size
+
+    def _load(self) -> None:
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._exhausted = True
+            self._runs = []
+        else:
+            self._runs = coalesce_cuboids(chunk)
+        self._run_index = 0
+
+    @property
+    def done(self) -> bool:
+        """Cert quan ja s'han col·locat tots els blocs del pla."""
+        return self.position >= self.total or (
+            self._exhausted and self._run_index >= len(self._runs)
+        )
+
+    @property
+    def progress(self) -> float:
+        """Percentatge de blocs col·locats."""
+        return self.position / self.total * 100 if self.total else 100.0
+
+    def peek(self) -> Optional[Cuboid]:
+        """Cuboide següent a col·locar (None si el pla s'ha acabat)."""
+        while self._run_index >= len(self._runs):
+            if self.done:
+                return None
+            self._load()
+        return self._runs[self._run_index]
+
+    def split(self) -> None:
+        """Parteix el cuboide actual en blocs individuals."""
+        run = self._runs[self._run_index]
+        self._runs[self._run_index : self._run_index + 1] = expand_cuboid(run)
+
+    def advance(self) -> None:
+        """Marca el cuboide actual com a col·locat."""
+        run = self._runs[self._run_index]
+        self._run_index += 1
+        self.position += run.size
+
+    def checkpoint(self) -> dict:
+        """Estat mínim per reprendre la construcció."""
+        return {
+            "plan": self.plan.name,
+            "origin": list(self.origin),
+            "position": self.position,
+            "chunk_size": self.chunk_size,
+        }
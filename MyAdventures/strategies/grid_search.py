@@ -1,8 +1,7 @@
 # Estratègia de cerca en graella per a mineria
 from .strategy_base import MiningStrategy
-from typing import Dict, Tuple
+from typing import Dict, Iterator, Tuple
 import logging
-import time
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +23,10 @@ class GridSearchStrategy(MiningStrategy):
         super().__init__()
         self.grid_size = grid_size
 
+    def spawn(self) -> "GridSearchStrategy":
+        """Crear una instància nova amb la mateixa mida de graella."""
+        return GridSearchStrategy(grid_size=self.grid_size)
+
     def mine(
         self,
         mc=None,
@@ -44,6 +47,30 @@ class GridSearchStrategy(MiningStrategy):
         Returns:
             dict: Materials col·lectats {material: quantitat}
         """
+        return self.open_cursor(
+            mc, start_pos, inventory, requirements, mc_lock=mc_lock
+        ).run()
+
+    def iter_mine(
+        self,
+        mc=None,
+        start_pos: Tuple[int, int, int] = None,
+        inventory: Dict = None,
+        requirements: Dict = None,
+        mc_lock=None,
+    ) -> Iterator[Dict]:
+        """
+        Recórrer la graella vòxel a vòxel (de baix a dalt en cada columna).
+
+        Args:
+            mc: Instància de Minecraft
+            start_pos: Posició inicial (x, y, z)
+            inventory: Diccionari d'inventari actual amb requeriments
+            mc_lock: Lock per sincronitzar accés a mc (opcional)
+
+        Yields:
+            dict: Materials col·lectats en cada vòxel visitat
+        """
         if inventory is None:
             inventory = {}
         if requirements is None:
@@ -56,11 +83,11 @@ class GridSearchStrategy(MiningStrategy):
         # Comprovar si ja tenim els requeriments
         if requirements and self.validate_requirements(working_inventory, requirements):
             logger.info("Requeriments ja assolits.")
-            return collected_materials
+            return
 
         if start_pos is None:
             logger.warning("Cap posició inicial proporcionada per a cerca en grid")
-            return collected_materials
+            return
 
         self.current_position = start_pos
         logger.info(f"Iniciant mineria per cerca en grid a {start_pos}")
@@ -88,31 +115,34 @@ class GridSearchStrategy(MiningStrategy):
             mcblock.SANDSTONE.id: "sandstone",
         }
 
-        check_counter = 0
+        # Tota la graella en una sola lectura; la classificació es fa en local
+        region = None
+        if mc:
+            last = self.grid_size - 1
+            region = self.read_region(
+                mc,
+                start_pos,
+                (start_x + last, start_y + last, start_z + last),
+                mc_lock=mc_lock,
+            )
+            if region is None:
+                return
 
         # Iterar a través dels punts de la graella
         for x_offset in range(0, self.grid_size):
-            if self.is_stopped:
-                break
-            while self.is_paused:
-                pass
-
             for z_offset in range(0, self.grid_size):
-                if self.is_stopped:
-                    break
-
                 # Escaneig de baix a dalt: 0 a grid_size
                 for y_offset in range(
                     0, self.grid_size
                 ):  # for y_offset in range(-(self.grid_size - 1), self.grid_size):
                     if self.is_stopped:
-                        break
+                        return
 
                     if requirements and self.validate_requirements(
                         working_inventory, requirements
                     ):
                         logger.info("Requeriments assolits, aturant cerca en graella")
-                        return collected_materials
+                        return
 
                     current_pos = (
                         start_x + x_offset,
@@ -121,20 +151,11 @@ class GridSearchStrategy(MiningStrategy):
                     )
                     self.current_position = current_pos
 
-                    # Agafar ID de block
-                    existing_id = 0
-                    if mc:
-                        if mc_lock:
-                            mc_lock.acquire()
-                        try:
-                            existing_id = mc.getBlock(
-                                current_pos[0], current_pos[1], current_pos[2]
-                            )
-                        finally:
-                            if mc_lock:
-                                mc_lock.release()
+                    # Agafar ID de block de la còpia local
+                    existing_id = region.get(*current_pos) if region else 0
 
                     if existing_id == 0 or existing_id == 7:  # 7 es Bedrock
+                        yield {}
                         continue
 
                     block_type = id_to_type.get(existing_id)
@@ -149,6 +170,7 @@ class GridSearchStrategy(MiningStrategy):
                                 mc.setBlock(
                                     current_pos[0], current_pos[1], current_pos[2], 0
                                 )  # Posar Aire
+                                region.set(*current_pos, 0)
                                 self.blocks_mined += 1
                                 success = True
 
@@ -160,16 +182,17 @@ class GridSearchStrategy(MiningStrategy):
                                     mc_lock.release()
                         except Exception as e:
                             logger.error(f"Error posant aire {current_pos}: {e}")
+                            yield {}
                             continue
 
                     # Si hem minat amb exit i es un bloc dels requisits l'afegim a l'inventari
+                    useful_materials = {}
                     if success and block_type:
                         materials_yield = self.BLOCK_YIELDS.get(
                             block_type, {block_type: 1}
                         ).copy()
 
                         # Filtrar materials: només afegim a l'inventari el que REALMENT necessitem
-                        useful_materials = {}
                         if requirements:
                             for mat, qty in materials_yield.items():
                                 needed = requirements.get(mat, 0)
@@ -187,20 +210,15 @@ class GridSearchStrategy(MiningStrategy):
                         )
 
                     self.materials_collected = collected_materials.copy()
-
-                    # Sleep optimitzat
-                    check_counter += 1
-                    if check_counter % 10 == 0:
-                        time.sleep(0.01)
+                    yield useful_materials
 
                     if requirements and self.validate_requirements(
                         working_inventory, requirements
                     ):
                         logger.info("Requeriments assolits, aturant mineria.")
-                        return collected_materials
+                        return
 
         logger.info(f"Mineria completada. Blocs minats: {self.blocks_mined}")
-        return collected_materials
 
     def _merge_materials(self, dict1: Dict, dict2: Dict) -> Dict:
         """
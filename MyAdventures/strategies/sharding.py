@@ -0,0 +1,132 @@
+# Repartiment de la regió de mineria entre diversos treballadors
+import math
+from typing import Dict, List, Optional, Tuple
+
+from .strategy_base import MiningCursor, MiningStrategy
+
+
+def split_shards(
+    anchor: Tuple[int, int, int], count: int, width: int
+) -> List[Tuple[int, int, int]]:
+    """
+    Repartir la zona sota l'anchor en columnes disjuntes.
+
+    Les columnes (de `width` x `width` blocs) es col·loquen en una graella
+    gairebé quadrada que comença a l'anchor, de manera que cap parell de
+    treballadors mina el mateix bloc.
+
+    Args:
+        anchor: Posició (x, y, z) del primer fragment
+        count: Nombre de fragments
+        width: Amplada de cada columna
+
+    Returns:
+        list: Anchors (x, y, z) de cada fragment; el primer és `anchor`
+    """
+    columns = max(1, math.ceil(math.sqrt(count)))
+    ax, ay, az = anchor
+    return [
+        (ax + (i % columns) * width, ay, az + (i // columns) * width)
+        for i in range(count)
+    ]
+
+
+class MiningShard:
+    """Fragment de la regió de mineria amb la seva estratègia i connexió.
+
+    Cada fragment baixa pel seu compte: quan acaba una passada sense cobrir
+    la seva part, l'agent en mou l'anchor cap avall fins que arriba al límit
+    de profunditat i queda esgotat. Cada passada rep només una part de la
+    necessitat pendent (`requirements`), de manera que entre tots els
+    fragments no es mina més del que cal.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        anchor: Tuple[int, int, int],
+        strategy: MiningStrategy,
+        mc,
+        mc_lock=None,
+    ):
+        self.index = index
+        self.anchor = anchor
+        self.strategy = strategy
+        self.mc = mc
+        self.mc_lock = mc_lock
+        self.cursor: Optional[MiningCursor] = None
+        self.requirements: Optional[Dict] = None
+        self.exhausted = False
+
+    @property
+    def descent_step(self) -> int:
+        """Blocs que baixa l'anchor després de cada passada."""
+        return getattr(self.strategy, "grid_size", 4)
+
+    def open(self, requirements: Optional[Dict]) -> None:
+        """
+        Obrir una passada per minar `requirements` (None: sense límit).
+
+        L'inventari de la passada comença buit: la part assignada ja descompta
+        el que han minat els altres fragments.
+        """
+        self.requirements = requirements
+        self.cursor = self.strategy.open_cursor(
+            self.mc, self.anchor, {}, requirements, mc_lock=self.mc_lock
+        )
+
+    def outstanding(self, material: str) -> int:
+        """Quantitat de `material` que la passada en curs encara ha de minar."""
+        if self.cursor is None or not self.requirements:
+            return 0
+        needed = self.requirements.get(material, 0)
+        return max(0, needed - self.cursor.collected.get(material, 0))
+
+    @property
+    def fulfilled(self) -> bool:
+        """Cert si la passada en curs ha minat tota la seva part."""
+        if self.cursor is None or not self.requirements:
+            return False
+        return all(self.outstanding(m) == 0 for m in self.requirements)
+
+    def step(
+        self,
+        max_blocks: Optional[int] = None,
+        max_ms: Optional[float] = None,
+    ) -> Dict:
+        """
+        Avançar la passada actual del fragment dins del pressupost.
+
+        Returns:
+            dict: Materials col·lectats en aquest tram
+        """
+        if self.exhausted or self.cursor is None:
+            return {}
+        return self.cursor.step(max_blocks=max_blocks, max_ms=max_ms)
+
+    def close(self) -> None:
+        """Abandonar la passada en curs, si n'hi ha."""
+        if self.cursor is not None:
+            self.cursor.close()
+            self.cursor = None
+        self.requirements = None
+
+
+def split_requirements(pending: Dict[str, int], count: int) -> List[Dict[str, int]]:
+    """
+    Repartir la necessitat pendent entre `count` fragments.
+
+    Cada material es divideix a parts iguals i la resta va als primers
+    fragments; la suma de les parts és exactament `pending`.
+
+    Returns:
+        list: Una part {material: quantitat} per fragment (pot ser buida)
+    """
+    shares = [{} for _ in range(count)]
+    for material, amount in pending.items():
+        base, extra = divmod(max(0, amount), count)
+        for i, share in enumerate(shares):
+            part = base + (1 if i < extra else 0)
+            if part:
+                share[material] = part
+    return shares
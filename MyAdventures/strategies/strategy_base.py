@@ -1,12 +1,129 @@
 # Classe base per a estratègies de mineria
 from abc import ABC, abstractmethod
-from typing import Dict, Tuple, Optional
+from typing import Dict, Iterator, Tuple, Optional
 from mcpi import block as mcblock
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
 
+class BlockRegion:
+    """Còpia local i densa dels IDs de bloc d'una regió cúbica.
+
+    Els IDs es guarden en una llista plana amb el mateix ordre que retorna
+    `world.getBlocks` de RaspberryJuice: y exterior, després x i z interior.
+    """
+
+    def __init__(self, origin: Tuple[int, int, int], size: Tuple[int, int, int], ids):
+        self.origin = origin
+        self.size = size
+        self.ids = ids
+
+    def _index(self, x: int, y: int, z: int) -> int:
+        ox, oy, oz = self.origin
+        sx, _, sz = self.size
+        return ((y - oy) * sx + (x - ox)) * sz + (z - oz)
+
+    def get(self, x: int, y: int, z: int) -> int:
+        """Retorna l'ID del bloc a la posició absoluta (x, y, z)."""
+        return self.ids[self._index(x, y, z)]
+
+    def set(self, x: int, y: int, z: int, block_id: int) -> None:
+        """Actualitza la còpia local després d'escriure al món."""
+        self.ids[self._index(x, y, z)] = block_id
+
+
+class MiningCursor:
+    """Avança una mineria en trams acotats i es reprèn on l'ha deixat.
+
+    Embolcalla el generador `iter_mine` d'una estratègia: cada pas del
+    generador és una unitat de treball (un vòxel, una profunditat...) i
+    `step()` n'executa com a màxim un pressupost de blocs o de mil·lisegons.
+    Així un agent pot minar dins del seu `act()` sense bloquejar el tick.
+    """
+
+    def __init__(self, strategy: "MiningStrategy", steps: Iterator[Dict]):
+        self.strategy = strategy
+        self._steps = steps
+        self.collected = {}
+        self.steps_done = 0
+        self.done = False
+
+    def step(
+        self, max_blocks: Optional[int] = None, max_ms: Optional[float] = None
+    ) -> Dict:
+        """
+        Avançar la mineria sense bloquejar.
+
+        S'atura abans d'esgotar el pressupost si l'estratègia està pausada
+        o aturada, de manera que les comandes de control tenen efecte dins
+        del mateix tick.
+
+        Args:
+            max_blocks: Nombre màxim de passos a executar (None: sense límit)
+            max_ms: Temps màxim en mil·lisegons (None: sense límit)
+
+        Returns:
+            dict: Materials col·lectats en aquest tram {material: quantitat}
+        """
+        gathered = {}
+        if self.done:
+            return gathered
+
+        deadline = None
+        if max_ms is not None:
+            deadline = time.monotonic() + max_ms / 1000.0
+
+        steps = 0
+        while max_blocks is None or steps < max_blocks:
+            if self.done or self.strategy.is_paused or self.strategy.is_stopped:
+                break
+            try:
+                materials = next(self._steps)
+            except StopIteration:
+                self.done = True
+                break
+            steps += 1
+            for material, quantity in materials.items():
+                gathered[material] = gathered.get(material, 0) + quantity
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+
+        self.steps_done += steps
+        for material, quantity in gathered.items():
+            self.collected[material] = self.collected.get(material, 0) + quantity
+        if self.strategy.is_stopped:
+            self.close()
+        return gathered
+
+    def run(self) -> Dict:
+        """
+        Minar fins al final, esperant (sense consumir CPU) mentre hi hagi pausa.
+
+        Returns:
+            dict: Tots els materials col·lectats pel cursor
+        """
+        while not self.done:
+            if not self.strategy.wait_while_paused():
+                if self.strategy.is_stopped:
+                    self.close()
+                    break
+                continue
+            self.step()
+        return self.collected
+
+    def close(self) -> None:
+        """Abandonar la mineria pendent."""
+        self.done = True
+        try:
+            self._steps.close()
+        except ValueError:
+            # Un altre fil està dins de step(): s'aturarà al següent pas
+            pass
+
+
 class MiningStrategy(ABC):
     """Classe base per a totes les estratègies de mineria.
 
@@ -35,13 +152,53 @@ class MiningStrategy(ABC):
 
     def __init__(self):
         """Inicialitza l'estratègia amb seguiment d'estat."""
-        self.is_paused = False
-        self.is_stopped = False
+        # Condició per bloquejar la mineria en pausa sense consumir CPU
+        self._control = threading.Condition()
+        self._paused = False
+        self._stopped = False
         self.current_position = None
         self.materials_collected = {}
         self.blocks_mined = 0
         self.start_time = None
 
+    @property
+    def is_paused(self) -> bool:
+        """Cert si la mineria està pausada."""
+        return self._paused
+
+    @is_paused.setter
+    def is_paused(self, value: bool) -> None:
+        with self._control:
+            self._paused = value
+            self._control.notify_all()
+
+    @property
+    def is_stopped(self) -> bool:
+        """Cert si la mineria s'ha aturat."""
+        return self._stopped
+
+    @is_stopped.setter
+    def is_stopped(self, value: bool) -> None:
+        with self._control:
+            self._stopped = value
+            self._control.notify_all()
+
+    def wait_while_paused(self, timeout: Optional[float] = None) -> bool:
+        """
+        Bloquejar (sense consumir CPU) mentre l'estratègia estigui pausada.
+
+        Args:
+            timeout: Segons màxims d'espera (None: sense límit)
+
+        Returns:
+            bool: Cert si la mineria pot continuar (ni pausada ni aturada)
+        """
+        with self._control:
+            self._control.wait_for(
+                lambda: not self._paused or self._stopped, timeout=timeout
+            )
+            return not self._paused and not self._stopped
+
     @abstractmethod
     def mine(
         self,
@@ -65,6 +222,45 @@ class MiningStrategy(ABC):
         """
         pass
 
+    def iter_mine(
+        self,
+        mc,
+        start_pos: Tuple[int, int, int],
+        inventory: Dict,
+        requirements: Optional[Dict] = None,
+        mc_lock=None,
+    ) -> Iterator[Dict]:
+        """
+        Executar la mineria pas a pas.
+
+        Per defecte fa tota la mineria en un únic pas cridant `mine`; les
+        estratègies que vulguin ser incrementals la sobreescriuen i fan
+        `yield` dels materials de cada bloc o capa.
+
+        Yields:
+            dict: Materials col·lectats en cada pas
+        """
+        yield self.mine(mc, start_pos, inventory, requirements, mc_lock=mc_lock)
+
+    def open_cursor(
+        self,
+        mc,
+        start_pos: Tuple[int, int, int],
+        inventory: Dict,
+        requirements: Optional[Dict] = None,
+        mc_lock=None,
+    ) -> MiningCursor:
+        """
+        Preparar una mineria reprenible sense executar-ne cap pas.
+
+        Returns:
+            MiningCursor: Cursor per avançar la mineria amb `step()` o `run()`
+        """
+        steps = self.iter_mine(
+            mc, start_pos, inventory, requirements, mc_lock=mc_lock
+        )
+        return MiningCursor(self, steps)
+
     def validate_requirements(self, inventory: Dict, requirements: Dict) -> bool:
         """
         Validar si l'inventari actual compleix amb els requeriments.
@@ -100,6 +296,49 @@ class MiningStrategy(ABC):
             updated[material] = updated.get(material, 0) + quantity
         return updated
 
+    def read_region(
+        self,
+        mc,
+        corner_a: Tuple[int, int, int],
+        corner_b: Tuple[int, int, int],
+        mc_lock=None,
+    ) -> Optional[BlockRegion]:
+        """
+        Llegir tota una regió cúbica amb una sola crida a getBlocks.
+
+        Args:
+            mc: Instància de Minecraft
+            corner_a: Una cantonada de la regió (x, y, z)
+            corner_b: La cantonada oposada (x, y, z), inclosa
+            mc_lock: Lock per sincronitzar accés a mc (opcional)
+
+        Returns:
+            BlockRegion: Còpia local de la regió, o None si la lectura falla
+        """
+        origin = tuple(min(a, b) for a, b in zip(corner_a, corner_b))
+        end = tuple(max(a, b) for a, b in zip(corner_a, corner_b))
+        size = tuple(e - o + 1 for o, e in zip(origin, end))
+
+        try:
+            if mc_lock:
+                mc_lock.acquire()
+            try:
+                ids = list(mc.getBlocks(*origin, *end))
+            finally:
+                if mc_lock:
+                    mc_lock.release()
+        except Exception as e:
+            logger.error(f"Error llegint la regió {origin}-{end}: {e}")
+            return None
+
+        if len(ids) != size[0] * size[1] * size[2]:
+            logger.error(
+                f"Regió {origin}-{end} incompleta: {len(ids)} blocs rebuts"
+            )
+            return None
+
+        return BlockRegion(origin, size, ids)
+
     def mine_block(
         self,
         mc,
@@ -205,6 +444,10 @@ class MiningStrategy(ABC):
         self.materials_collected = {}
         logger.info(f"Estratègia {self.get_name()} resetejada")
 
+    def spawn(self) -> "MiningStrategy":
+        """Crear una instància nova amb la mateixa configuració i estat net."""
+        return self.__class__()
+
     def get_name(self) -> str:
         """Retorna el nom de l'estratègia."""
         return self.__class__.__name__
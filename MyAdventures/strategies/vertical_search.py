@@ -1,6 +1,6 @@
 # Estratègia de cerca vertical per a mineria
 from .strategy_base import MiningStrategy
-from typing import Dict, Tuple
+from typing import Dict, Iterator, Tuple
 import logging
 from mcpi import block as mcblock
 
@@ -56,6 +56,29 @@ class VerticalSearchStrategy(MiningStrategy):
         Returns:
             dict: Materials col·lectats {material: quantitat}
         """
+        return self.open_cursor(
+            mc, start_pos, inventory, requirements, mc_lock=mc_lock
+        ).run()
+
+    def iter_mine(
+        self,
+        mc=None,
+        start_pos: Tuple[int, int, int] = None,
+        inventory: Dict = None,
+        requirements: Dict = None,
+        mc_lock=None,
+    ) -> Iterator[Dict]:
+        """
+        Perforar cap avall una profunditat per pas.
+
+        Args:
+            mc: Instància de Minecraft
+            start_pos: Posició inicial (x, y, z)
+            inventory: Diccionari d'inventari actual amb requeriments
+
+        Yields:
+            dict: Materials col·lectats a cada profunditat
+        """
         if inventory is None:
             inventory = {}
         if requirements is None:
@@ -67,13 +90,27 @@ class VerticalSearchStrategy(MiningStrategy):
 
         if start_pos is None:
             logger.warning("Cap posició inicial proporcionada per a cerca vertical")
-            return collected_materials
+            return
 
         self.current_position = start_pos
         start_x, start_y, start_z = start_pos
 
         logger.info(f"Iniciant mineria per cerca vertical a {start_pos}")
 
+        # Tota la columna del pou en una sola lectura (fins on s'aturarà)
+        column = None
+        if mc:
+            bottom_y = 7 if start_y > 6 else 2
+            if start_y >= bottom_y:
+                column = self.read_region(
+                    mc,
+                    (start_x, bottom_y, start_z),
+                    start_pos,
+                    mc_lock=mc_lock,
+                )
+                if column is None:
+                    return
+
         # Perforar cap avall des de la posició inicial
         current_y = start_y
 
@@ -88,25 +125,12 @@ class VerticalSearchStrategy(MiningStrategy):
                 logger.info(f"Cerca vertical aturat a profunditat {current_y}")
                 break
 
-            while self.is_paused:
-                pass
-
             self.current_depth = current_y
             self.current_position = (start_x, current_y, start_z)
+            useful_materials = {}
 
-            if mc:
-                block_id = 0
-                try:
-                    if mc_lock:
-                        mc_lock.acquire()
-                    try:
-                        block_id = mc.getBlock(start_x, current_y, start_z)
-                    finally:
-                        if mc_lock:
-                            mc_lock.release()
-                except Exception as e:
-                    logger.error(f"Error obtenint bloc a {self.current_position}: {e}")
-                    block_id = 0
+            if column:
+                block_id = column.get(start_x, current_y, start_z)
 
                 if block_id != 0:
                     try:
@@ -114,6 +138,7 @@ class VerticalSearchStrategy(MiningStrategy):
                             mc_lock.acquire()
                         try:
                             mc.setBlock(start_x, current_y, start_z, 0)  # Posar a AIR
+                            column.set(start_x, current_y, start_z, 0)
                             self.blocks_mined += 1
                         finally:
                             if mc_lock:
@@ -130,7 +155,6 @@ class VerticalSearchStrategy(MiningStrategy):
                         materials_yield = self.BLOCK_YIELDS.get(block_name, {}).copy()
 
                         # Filtrar si és necessari segons requeriments
-                        useful_materials = {}
                         if requirements:
                             for mat, qty in materials_yield.items():
                                 needed = requirements.get(mat, 0)
@@ -154,17 +178,17 @@ class VerticalSearchStrategy(MiningStrategy):
                             )
 
             self.materials_collected = collected_materials.copy()
+            yield useful_materials
 
             if requirements and self.validate_requirements(
                 working_inventory, requirements
             ):
                 logger.info("Requeriments assolits, aturant cerca vertical")
-                return collected_materials
+                return
 
             current_y -= 1
 
         logger.info(f"Cerca vertical completada. Blocs minats: {self.blocks_mined}")
-        return collected_materials
 
     def _merge_materials(self, dict1: Dict, dict2: Dict) -> Dict:
         """
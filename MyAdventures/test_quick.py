@@ -185,7 +185,12 @@ print("TEST 6: Logging Estructurat")
 print("=============")
 
 try:
-    setup_logging()
+    import os
+    import tempfile
+
+    # Fora del repositori: les proves no han d'omplir el log de l'aplicació
+    log_path = os.path.join(tempfile.mkdtemp(), "minecraft_agents.log")
+    setup_logging(log_path)
     print("[OK] Logging inicialitzat")
 
     import logging
@@ -195,13 +200,11 @@ try:
     print("[OK] Logging fent output")
 
     # Verificar que existeix el fitxer de log
-    import os
-
-    if os.path.exists("minecraft_agents.log"):
+    if os.path.exists(log_path):
         print("[OK] Fitxer minecraft_agents.log creat")
 
         # Verificar que conté JSON
-        with open("minecraft_agents.log", "r") as f:
+        with open(log_path, "r") as f:
             first_line = f.readline()
             if first_line.startswith("{"):
                 print("[OK] Format JSON al fitxer de log")
@@ -0,0 +1,103 @@
+# Conjunt de proves per al client asíncron de Minecraft
+import asyncio
+import unittest
+from mcpi.async_minecraft import AsyncMinecraft
+from mcpi.connection import RequestError
+
+
+class FakeAsyncServer:
+    """Servidor asyncio mínim que imita el protocol de RaspberryJuice."""
+
+    def __init__(self):
+        self.sessions = 0
+        self.writes = []
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader, writer):
+        self.sessions += 1
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            name, args = line.decode().rstrip("\n")[:-1].split("(", 1)
+            values = [v for v in args.split(",") if v]
+            if name == "world.getHeight":
+                # Resposta lenta per forçar peticions simultànies
+                await asyncio.sleep(0.001)
+                reply = str(int(values[0]) + int(values[1]))
+            elif name == "world.getBlocks":
+                x0, y0, z0, x1, y1, z1 = map(int, values)
+                count = (x1 - x0 + 1) * (y1 - y0 + 1) * (z1 - z0 + 1)
+                reply = ",".join(["1"] * count)
+            elif name == "player.getTile":
+                reply = "1,2,3"
+            elif name == "events.chat.posts":
+                reply = "1,-agent help|2,hola"
+            elif name in ("world.setBlock", "chat.post"):
+                self.writes.append(name)
+                continue
+            else:
+                reply = "Fail"
+            writer.write((reply + "\n").encode())
+            await writer.drain()
+        writer.close()
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class TestAsyncMinecraft(unittest.IsolatedAsyncioTestCase):
+    """Prova peticions concurrents sobre una o més connexions."""
+
+    async def asyncSetUp(self):
+        self.server = FakeAsyncServer()
+        port = await self.server.start()
+        self.mc = await AsyncMinecraft.create("127.0.0.1", port, connections=2)
+
+    async def asyncTearDown(self):
+        await self.mc.close()
+        await self.server.stop()
+
+    async def test_concurrent_requests_keep_order(self):
+        """Prova que moltes peticions simultànies reben la seva resposta."""
+        columns = [(x, 1) for x in range(200)]
+        heights = await self.mc.getHeights(columns)
+
+        self.assertEqual(heights, [x + 1 for x in range(200)])
+        self.assertEqual(self.server.sessions, 2)
+
+    async def test_method_surface(self):
+        """Prova els mètodes principals del client."""
+        self.assertEqual(await self.mc.getBlocks(0, 0, 0, 1, 1, 1), [1] * 8)
+        pos = await self.mc.player.getTilePos()
+        self.assertEqual((pos.x, pos.y, pos.z), (1, 2, 3))
+        posts = await self.mc.events.pollChatPosts()
+        self.assertEqual([p.message for p in posts], ["-agent help", "hola"])
+
+        await self.mc.setBlock(0, 0, 0, 1)
+        await self.mc.postToChat("hola")
+        self.assertEqual(await self.mc.getHeight(2, 2), 4)
+        self.assertIn("chat.post", self.server.writes)
+
+    async def test_large_reply(self):
+        """Prova una resposta de getBlocks més llarga que 64 KiB."""
+        blocks = await self.mc.getBlocks(0, 0, 0, 99, 9, 99)
+        self.assertEqual(len(blocks), 100_000)
+        # La connexió continua viva després de la resposta gran
+        self.assertEqual(await self.mc.getHeight(2, 2), 4)
+
+    async def test_failed_request_raises(self):
+        """Prova que una resposta Fail es converteix en RequestError."""
+        with self.assertRaises(RequestError):
+            await self.mc.conn.sendReceive(b"world.unknown")
+        # La connexió continua alineada després de l'error
+        reply = await self.mc.conn.sendReceive(b"world.getHeight", 1, 1)
+        self.assertEqual(int(reply), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+# Conjunt de proves per a l'agrupació de blocs en cuboides
+import unittest
+from utils.build_batching import Cuboid, coalesce_cuboids, expand_cuboid
+from utils.communication import MessageBus
+from agents.base_agent import AgentState
+from agents.builderbot import BuilderBot
+from strategies.build_plans.plataforma import PlataformaPlan
+
+
+def covered_blocks(cuboids):
+    """Retorna els blocs (x, y, z, material) que cobreixen els cuboides."""
+    return sorted(
+        (b.x0, b.y0, b.z0, b.material) for c in cuboids for b in expand_cuboid(c)
+    )
+
+
+class MockMC:
+    """Minecraft fals que registra les escriptures."""
+
+    def __init__(self):
+        self.writes = []
+
+    def setBlock(self, *args):
+        self.writes.append(("setBlock", args))
+
+    def setBlocks(self, *args):
+        self.writes.append(("setBlocks", args))
+
+    def getHeights(self, columns):
+        # Terreny pla a y=0, amb un obstacle a la columna (100, 100)
+        return [5 if (x, z) == (100, 100) else 0 for x, z in columns]
+
+    def postToChat(self, msg):
+        pass
+
+
+class TestCoalesceCuboids(unittest.TestCase):
+    """Prova l'agrupació voraç de blocs en cuboides."""
+
+    def test_platform_becomes_two_cuboids(self):
+        """Prova que la plataforma 4x4 queda en un cuboide per material."""
+        blocks = PlataformaPlan().generate(0, 0, 0)
+        cuboids = coalesce_cuboids(blocks)
+
+        self.assertEqual(
+            cuboids,
+            [Cuboid(0, 1, 0, 1, 1, 3, "dirt"), Cuboid(2, 1, 0, 3, 1, 3, "stone")],
+        )
+
+    def test_cuboids_cover_input_exactly(self):
+        """Prova que els cuboides cobreixen exactament els blocs d'entrada."""
+        blocks = [
+            (x, y, z, "stone" if (x + y + z) % 3 else "dirt")
+            for x in range(3)
+            for y in range(3)
+            for z in range(4)
+        ]
+        cuboids = coalesce_cuboids(blocks)
+
+        self.assertEqual(covered_blocks(cuboids), sorted(blocks))
+        self.assertEqual(sum(c.size for c in cuboids), len(blocks))
+
+    def test_repeated_positions_are_kept(self):
+        """Prova que les posicions repetides no es perden."""
+        blocks = [(0, 0, 0, "dirt"), (0, 0, 1, "dirt"), (0, 0, 0, "stone")]
+        cuboids = coalesce_cuboids(blocks)
+
+        self.assertEqual(sum(c.size for c in cuboids), 3)
+
+
+class TestBuilderBatching(unittest.TestCase):
+    """Prova la construcció per cuboides del BuilderBot."""
+
+    def setUp(self):
+        self.bus = MessageBus()
+        self.mc = MockMC()
+        self.builder = BuilderBot("BuilderBot", self.bus, self.mc)
+        self.builder.switch_plan("plataforma")
+        self.builder.target_zone = {"x": 0, "y": 0, "z": 0}
+        self.builder.set_state(AgentState.RUNNING, "Test")
+
+    def tearDown(self):
+        self.bus.stop()
+
+    def test_builds_whole_plan_in_one_tick(self):
+        """Prova que amb inventari suficient es construeix tot en un tick."""
+        self.builder.inventory = {"dirt": 8, "stone": 8}
+        self.builder.act()
+
+        self.assertEqual([w[0] for w in self.mc.writes[1:]], ["setBlocks"] * 2)
+        self.assertEqual(self.builder.build_index, 16)
+        self.assertEqual(self.builder.inventory, {"dirt": 0, "stone": 0})
+
+    def test_obstructed_site_falls_back_to_alternative(self):
+        """Prova que si el lloc ja no és pla es passa a l'alternativa."""
+        self.builder.target_zone = {"x": 100, "y": 0, "z": 100}
+        self.builder.alternative_zones = [{"x": 20, "y": 0, "z": 20}]
+        self.builder.inventory = {"dirt": 8, "stone": 8}
+        self.builder.act()
+
+        self.assertEqual(self.builder.target_zone, {"x": 20, "y": 0, "z": 20})
+        self.assertEqual(self.builder.build_index, 16)
+
+    def test_negative_offsets_stay_inside_zone(self):
+        """Prova que un pla amb dx i dz negatius es construeix dins la zona."""
+
+        class CentredPlan(PlataformaPlan):
+            @property
+            def name(self):
+                return "centrat"
+
+            def generate(self, x, y, z):
+                return [
+                    (x + dx, y + 1, z + dz, "stone")
+                    for dx in range(-1, 2)
+                    for dz in range(-2, 1)
+                ]
+
+        self.builder.plans["centrat"] = CentredPlan()
+        self.builder.switch_plan("centrat")
+        self.builder.target_zone = {"x": 10, "y": 0, "z": 10}
+        self.builder.inventory = {"stone": 9}
+        self.builder.act()
+
+        [(method, args)] = self.mc.writes[1:]
+        x0, _, z0, x1, _, z1, _ = args
+        self.assertEqual(method, "setBlocks")
+        self.assertEqual((x0, z0, x1, z1), (10, 10, 12, 12))
+
+    def test_partial_inventory_is_exact(self):
+        """Prova que amb inventari parcial es col·loca exactament el disponible."""
+        self.builder.inventory = {"dirt": 8, "stone": 3}
+        self.builder.act()
+
+        self.assertEqual(self.builder.build_index, 11)
+        self.assertEqual(self.builder.inventory, {"dirt": 0, "stone": 0})
+        self.assertEqual(self.builder.state, AgentState.WAITING)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+# Conjunt de proves per al bus compartit entre processos
+import os
+import socket
+import tempfile
+import time
+import unittest
+from utils.bus_transport import BusBridge, BusHub, key_path, load_authkey
+from utils.communication import MessageBus, MessageProtocol
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Cal un sistema amb sockets Unix")
+class TestBusTransport(unittest.TestCase):
+    """Prova que dos buses connectats per un socket local es comparteixen."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        address = os.path.join(self.tmp.name, "bus.sock")
+        self.hub_bus, self.node_bus, self.other_bus = (
+            MessageBus(),
+            MessageBus(),
+            MessageBus(),
+        )
+        self.hub = BusHub(self.hub_bus, address)
+        self.hub.start()
+        self.bridges = [BusBridge(self.node_bus, address)]
+        self.bridges.append(BusBridge(self.other_bus, address))
+        for bridge in self.bridges:
+            bridge.start()
+        self.assertTrue(wait_for(lambda: self.hub.get_stats()["peers"] == 2))
+
+    def tearDown(self):
+        for bridge in self.bridges:
+            bridge.stop()
+        self.hub.stop()
+        for bus in (self.hub_bus, self.node_bus, self.other_bus):
+            bus.stop()
+        self.tmp.cleanup()
+
+    def test_messages_cross_processes_without_echo(self):
+        """Prova que un missatge arriba a tots els nodes un sol cop."""
+        at_hub, at_node, at_other = [], [], []
+        self.hub_bus.subscribe(at_hub.append, types=["inventory.v1"])
+        self.node_bus.subscribe(at_node.append, types=["inventory.v1"])
+        self.other_bus.subscribe(
+            at_other.append, types=["inventory.v1"], target="BuilderBot"
+        )
+
+        msg = MessageProtocol.create_message(
+            "inventory.v1", "MinerBot", "BuilderBot", {"inventory": {"stone": 3}}
+        )
+        self.node_bus.publish(msg)
+
+        self.assertTrue(wait_for(lambda: at_hub and at_other))
+        time.sleep(0.1)  # temps per si hi hagués cap eco
+        self.assertEqual(len(at_node), 1)
+        self.assertEqual(len(at_hub), 1)
+        self.assertEqual(len(at_other), 1)
+        self.assertEqual(at_other[0]["payload"], {"inventory": {"stone": 3}})
+        self.assertEqual(at_other[0]["origin"], self.bridges[0].node)
+        self.assertEqual(self.hub.get_stats()["relayed"], 1)
+
+    def test_hub_messages_reach_nodes(self):
+        """Prova que el que es publica al concentrador arriba als nodes."""
+        received = []
+        self.node_bus.subscribe(received.append, types=["workflow.reset"])
+        self.hub_bus.publish(
+            MessageProtocol.create_message("workflow.reset", "System", "all", {})
+        )
+
+        self.assertTrue(wait_for(lambda: received))
+        self.assertEqual(received[0]["type"], "workflow.reset")
+
+    def test_per_run_key(self):
+        """Prova que la clau és aleatòria, privada i necessària per connectar-se."""
+        address = self.hub.address
+        self.assertEqual(load_authkey(address), self.hub.authkey)
+        self.assertEqual(os.stat(key_path(address)).st_mode & 0o077, 0)
+
+        intruder = BusBridge(MessageBus(), address, authkey=b"MyAdventures-bus")
+        with self.assertRaises(Exception):
+            intruder.start()
+        intruder.stop()
+        intruder.bus.stop()
+
+        self.hub.stop()
+        self.assertFalse(os.path.exists(key_path(address)))
+
+
+if __name__ == "__main__":
+    unittest.main()
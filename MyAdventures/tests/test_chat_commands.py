@@ -1,4 +1,5 @@
 import unittest
+from unittest import mock
 from utils.chat_commands import ChatCommandHandler, create_default_handlers
 from agents.base_agent import BaseAgent, AgentState
 
@@ -94,6 +95,62 @@ class TestChatCommands(unittest.TestCase):
         self.assertIn("agent help", handler.handlers)
         self.assertIn("agent status", handler.handlers)
 
+    def test_workflow_run_uses_connected_workers(self):
+        """Prova que amb treballadors al bus compartit no s'arrenca cap procés."""
+
+        class FakeMC:
+            def postToChat(self, message):
+                pass
+
+        class FakeHub:
+            def get_stats(self):
+                return {"peers": 1}
+
+        published = []
+
+        class FakeBus:
+            def publish(self, msg):
+                published.append(msg)
+
+        handler = create_default_handlers(
+            {}, FakeMC(), None, {}, message_bus=FakeBus(), bus_hub=FakeHub()
+        )
+        self.assertTrue(handler.handle_command("-workflow run"))
+
+        self.assertEqual(
+            [msg["type"] for msg in published], ["workflow.reset", "workflow.start.v1"]
+        )
+
+    def test_workflow_process_joins_shared_bus(self):
+        """Prova que el procés de workflow es connecta al bus i no duplica agents."""
+
+        class FakeMC:
+            def postToChat(self, message):
+                pass
+
+        class FakeHub:
+            def get_stats(self):
+                return {"peers": 0}
+
+        class FakeExplorer:
+            exploration_ranges = [40]
+            current_range_index = 0
+
+        flags = {"bus_address": "/tmp/bus.sock"}
+        handler = create_default_handlers(
+            {"ExplorerBot": FakeExplorer()}, FakeMC(), None, flags, bus_hub=FakeHub()
+        )
+        with mock.patch("subprocess.Popen") as popen:
+            self.assertTrue(handler.handle_command("-workflow run"))
+
+        cmd_args = popen.call_args[0][0]
+        self.assertIn("--workflow", cmd_args)
+        address = cmd_args[cmd_args.index("--bus-address") + 1]
+        self.assertEqual(address, "/tmp/bus.sock")
+        agents = cmd_args[cmd_args.index("--agents") + 1].split(",")
+        self.assertNotIn("ExplorerBot", agents)
+        self.assertIn("MinerBot", agents)
+
     def test_agent_control_commands(self):
         """Prova el control d'agents mitjançant ordres."""
         agent = DummyAgent("TestAgent")
@@ -0,0 +1,213 @@
+# Conjunt de proves per als plans compilats
+import csv
+import os
+import tempfile
+import unittest
+from collections import Counter
+from unittest import mock
+from strategies.build_plans import compiled
+from strategies.build_plans.castell import CastellPlan
+from strategies.build_plans.compiled import CompiledPlan, compile_csv
+from utils.build_batching import coalesce_cuboids
+from utils.discovery import discover_build_plans
+from utils.validators import es_fila_valida
+
+
+def read_csv_blocks(path, x, y, z):
+    """Lectura directa del CSV, com abans de compilar els plans."""
+    with open(path, newline="") as f:
+        return [
+            (x + int(r["dx"]), y + int(r["dy"]), z + int(r["dz"]), r["material"])
+            for r in filter(es_fila_valida, csv.DictReader(f))
+        ]
+
+
+class TestCompiledPlan(unittest.TestCase):
+    """Prova la compilació, la translació i el format binari dels plans."""
+
+    use_numpy = True
+
+    def setUp(self):
+        if self.use_numpy and compiled.np is None:
+            self.skipTest("NumPy no està instal·lat")
+        self.tmp = tempfile.TemporaryDirectory()
+        self.patches = [
+            mock.patch.object(compiled, "PLANS_DIR", self.tmp.name),
+            mock.patch.object(
+                compiled, "CACHE_DIR", os.path.join(self.tmp.name, ".compiled")
+            ),
+            mock.patch.dict(compiled._compiled, clear=True),
+        ]
+        if not self.use_numpy:
+            self.patches.append(mock.patch.object(compiled, "np", None))
+        for patch in self.patches:
+            patch.start()
+        self.csv_path = os.path.join(self.tmp.name, "torre.csv")
+        self.write_csv([(0, 1, 0, "stone"), (0, 2, 0, "dirt"), ("x", 3, 0, "dirt")])
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.tmp.cleanup()
+
+    def write_csv(self, rows):
+        with open(self.csv_path, "w", newline="") as f:
+            f.write("dx,dy,dz,material\n")
+            for row in rows:
+                f.write(",".join(map(str, row)) + "\n")
+
+    def test_translate_matches_absolute_blocks(self):
+        """Prova que la translació dona els mateixos blocs que llegir el CSV."""
+        plan = CompiledPlan.from_blocks([(0, 1, 0, "stone"), (-2, 0, 3, "dirt")])
+        self.assertEqual(
+            plan.translate(10, 64, -5), [(10, 65, -5, "stone"), (8, 64, -2, "dirt")]
+        )
+        self.assertEqual(plan.palette, ("stone", "dirt"))
+
+    def test_binary_roundtrip(self):
+        """Prova que el format binari conserva blocs, paleta i origen."""
+        plan = CompiledPlan.from_blocks([(1, 2, 3, "stone"), (-4, 5, -6, "sandstone")])
+        restored, mtime, size = CompiledPlan.from_bytes(plan.to_bytes(123, 45))
+
+        self.assertEqual((mtime, size), (123, 45))
+        self.assertEqual(restored.translate(0, 0, 0), plan.translate(0, 0, 0))
+        with self.assertRaises(ValueError):
+            CompiledPlan.from_bytes(b"XXXX" + plan.to_bytes()[4:])
+
+    def test_compile_csv_skips_invalid_rows_and_caches(self):
+        """Prova que el CSV es compila un cop i es reutilitza des del disc."""
+        plan = compile_csv("torre.csv")
+        self.assertEqual(
+            plan.translate(0, 0, 0), [(0, 1, 0, "stone"), (0, 2, 0, "dirt")]
+        )
+        self.assertIs(compile_csv("torre.csv"), plan)
+        self.assertTrue(os.path.exists(os.path.join(compiled.CACHE_DIR, "torre.plan")))
+
+        # Un procés nou el llegeix del format binari sense tornar a analitzar el CSV
+        compiled._compiled.clear()
+        with mock.patch.object(compiled, "_parse_csv") as parse:
+            again = compile_csv("torre.csv")
+        parse.assert_not_called()
+        self.assertEqual(again.translate(0, 0, 0), plan.translate(0, 0, 0))
+
+    def test_changed_csv_is_recompiled(self):
+        """Prova que si el CSV canvia el pla compilat s'invalida."""
+        compile_csv("torre.csv")
+        self.write_csv([(0, 1, 0, "stone"), (0, 2, 0, "stone"), (0, 3, 0, "stone")])
+        os.utime(self.csv_path, ns=(1, 1))
+
+        plan = compile_csv("torre.csv")
+        self.assertEqual(len(plan), 3)
+
+    def test_build_order(self):
+        """Prova l'ordre per capes, material i corba de Morton."""
+        plan = CompiledPlan.from_blocks(
+            [
+                (1, 1, 0, "stone"),
+                (1, 0, 1, "dirt"),
+                (0, 0, 1, "stone"),
+                (1, 0, 0, "dirt"),
+                (0, 0, 0, "stone"),
+                (0, 0, 0, "dirt"),
+            ]
+        )
+        ordered = plan.build_order()
+        self.assertIs(plan.build_order(), ordered)
+        self.assertEqual(
+            ordered.translate(0, 0, 0),
+            [
+                (0, 0, 1, "stone"),
+                (0, 0, 0, "stone"),
+                (0, 0, 0, "dirt"),
+                (1, 0, 0, "dirt"),
+                (1, 0, 1, "dirt"),
+                (1, 1, 0, "stone"),
+            ],
+        )
+        self.assertEqual(ordered.bom(), plan.bom())
+
+    def test_build_order_gives_longer_runs(self):
+        """Prova que un pla desordenat s'agrupa en menys cuboides per tros."""
+
+        class ScatteredPlan(CastellPlan):
+            csv_file = None
+
+            def generate(self, x, y, z):
+                blocks = [
+                    (x + dx, y + dy, z + dz, "stone" if dx < 4 else "dirt")
+                    for dz in range(8)
+                    for dy in range(3)
+                    for dx in range(8)
+                ]
+                return blocks[::2] + blocks[1::2]
+
+        def runs(plan):
+            chunks = plan.iter_chunks(0, 0, 0, chunk_size=16)
+            return sum(len(coalesce_cuboids(chunk)) for chunk in chunks)
+
+        unordered = ScatteredPlan()
+        unordered.optimise_order = False
+        self.assertLess(runs(ScatteredPlan()), runs(unordered) // 4)
+
+        # Els plans en codi només conserven la còpia en ordre de construcció
+        ordered = ScatteredPlan().compiled()
+        self.assertIs(ordered.build_order(), ordered)
+        self.assertEqual(ordered.bom(), {"stone": 96, "dirt": 96})
+
+    def test_bom_follows_csv_changes(self):
+        """Prova que el BOM d'un pla CSV es recalcula quan el CSV canvia."""
+
+        class TorrePlan(CastellPlan):
+            csv_file = "torre.csv"
+
+        plan = TorrePlan()
+        self.assertEqual(plan.bom, {"stone": 1, "dirt": 1})
+        self.assertIs(plan.compiled(), plan.compiled())
+
+        self.write_csv([(0, 1, 0, "stone"), (0, 2, 0, "stone"), (0, 3, 0, "stone")])
+        os.utime(self.csv_path, ns=(1, 1))
+        self.assertEqual(plan.bom, {"stone": 3})
+
+    def test_footprint_with_negative_offsets(self):
+        """Prova la planta d'un pla amb blocs a dx i dz negatius."""
+
+        class TorrePlan(CastellPlan):
+            csv_file = "torre.csv"
+
+        plan = TorrePlan()
+        self.assertEqual(plan.footprint(), (1, 1))
+
+        self.write_csv([(-2, 0, 1, "stone"), (1, 0, -3, "stone")])
+        os.utime(self.csv_path, ns=(1, 1))
+        self.assertEqual(plan.footprint(), (4, 5))
+        self.assertEqual(plan.footprint_offset(), (-2, -3))
+
+
+class TestCompiledPlanWithoutNumpy(TestCompiledPlan):
+    """Les mateixes proves amb els vectors en Python pur."""
+
+    use_numpy = False
+
+
+class TestCsvPlans(unittest.TestCase):
+    """Prova que els plans CSV del repositori no canvien en compilar-los."""
+
+    def test_castell_plan_matches_csv(self):
+        """Prova que el castell compilat coincideix amb el CSV original."""
+        path = os.path.join(compiled.PLANS_DIR, "castell.csv")
+        self.assertEqual(
+            CastellPlan().generate(3, 60, -7), read_csv_blocks(path, 3, 60, -7)
+        )
+
+    def test_bom_matches_generated_blocks(self):
+        """Prova que el BOM de cada pla descobert és el recompte dels seus blocs."""
+        plans = discover_build_plans()
+        for name in plans:
+            for plan in plans[name].instances():
+                with self.subTest(plan=plan.name):
+                    blocks = plan.generate(0, 0, 0)
+                    self.assertEqual(plan.bom, dict(Counter(b[3] for b in blocks)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+# Conjunt de proves per al mode pipeline de mcpi.connection
+import socket
+import threading
+import unittest
+from mcpi.connection import Connection, RequestError
+from mcpi.minecraft import Minecraft
+
+
+class FakeServer:
+    """Servidor mínim que imita el protocol de RaspberryJuice."""
+
+    def __init__(self):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(1)
+        self.port = self.listener.getsockname()[1]
+        self.requests = []
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _reply(self, line):
+        name, args = line[:-1].split("(", 1)
+        values = [int(v) for v in args.split(",") if v]
+        if name == "world.getHeight":
+            return f"{values[0] + values[1]}\n"
+        if name == "world.getBlock":
+            return f"{values[1]}\n"
+        if name == "world.setBlock":
+            return None  # Les escriptures no tenen resposta
+        return "Fail\n"
+
+    def _serve(self):
+        client, _ = self.listener.accept()
+        reader = client.makefile("r")
+        for line in reader:
+            line = line.rstrip("\n")
+            self.requests.append(line)
+            reply = self._reply(line)
+            if reply is not None:
+                client.sendall(reply.encode())
+        client.close()
+
+    def close(self):
+        self.listener.close()
+
+
+class TestPipelinedConnection(unittest.TestCase):
+    """Prova l'enviament en lot i la lectura ordenada de respostes."""
+
+    def setUp(self):
+        self.server = FakeServer()
+        self.mc = Minecraft(Connection("127.0.0.1", self.server.port))
+
+    def tearDown(self):
+        self.mc.conn.socket.close()
+        self.server.close()
+
+    def test_get_heights_in_order(self):
+        """Prova que les respostes arriben en el mateix ordre que les peticions."""
+        columns = [(x, 2 * x) for x in range(50)]
+        heights = self.mc.getHeights(columns)
+
+        self.assertEqual(heights, [3 * x for x in range(50)])
+        self.assertEqual(len(self.server.requests), 50)
+
+    def test_pipeline_interleaved_with_single_requests(self):
+        """Prova que el lector persistent no perd dades entre crides."""
+        self.assertEqual(self.mc.getBlockList([(0, 5, 0), (1, 6, 1)]), [5, 6])
+        self.assertEqual(self.mc.getHeight(4, 4), 8)
+        self.assertEqual(self.mc.getBlock(0, 9, 0), 9)
+
+    def test_batches_are_chunked_and_measured(self):
+        """Prova que els lots grans es parteixen i es registra la latència."""
+        depth = Connection.MaxPipelineDepth
+        self.mc.getHeights([(0, 0)] * (depth + 1))
+
+        stats = self.mc.conn.getStats()
+        self.assertEqual(stats["batches"], 2)
+        self.assertEqual(stats["requests"], depth + 1)
+        self.assertGreater(stats["max_batch_latency"], 0.0)
+        self.assertGreater(stats["avg_batch_latency"], 0.0)
+
+    def test_set_block_list_is_one_write(self):
+        """Prova que moltes escriptures viatgen juntes i no desalineen les lectures."""
+        self.mc.setBlockList([(x, 64, 0, 35, 11) for x in range(20)])
+
+        self.assertEqual(self.mc.getHeight(1, 1), 2)
+        self.assertEqual(len(self.server.requests), 21)
+        self.assertEqual(self.server.requests[0], "world.setBlock(0,64,0,35,11)")
+
+    def test_failed_request_keeps_stream_aligned(self):
+        """Prova que un error no desalinea les respostes posteriors."""
+        pipeline = self.mc.conn.pipeline()
+        pipeline.queue(b"world.getHeight", 1, 1)
+        pipeline.queue(b"world.unknown", 0)
+        pipeline.queue(b"world.getHeight", 2, 2)
+
+        with self.assertRaises(RequestError):
+            pipeline.flush()
+
+        self.assertEqual(len(pipeline), 0)
+        self.assertEqual(self.mc.getHeight(3, 3), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+# Conjunt de proves per al pool de connexions
+import threading
+import time
+import unittest
+from utils.connection_pool import ConnectionPool, TimedLock
+
+
+class FakeConnection:
+    """Connexió falsa que es pot fer fallar i reconnectar."""
+
+    def __init__(self):
+        self.broken = False
+        self.reconnects = 0
+        self.closed = False
+
+    def sendReceive(self, *data):
+        if self.broken:
+            raise ConnectionResetError("connexió perduda")
+        return ""
+
+    def reconnect(self):
+        self.broken = False
+        self.reconnects += 1
+
+    def close(self):
+        self.closed = True
+
+
+class FakeMC:
+    def __init__(self, address, port):
+        self.conn = FakeConnection()
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Prova l'assignació de connexions, els health checks i les mètriques."""
+
+    def setUp(self):
+        self.pool = ConnectionPool(size=2, factory=FakeMC)
+
+    def test_agents_get_distinct_connections(self):
+        """Prova que cada agent rep una connexió diferent mentre n'hi hagi."""
+        mc_a, lock_a = self.pool.lease("ExplorerBot")
+        mc_b, lock_b = self.pool.lease("MinerBot")
+
+        self.assertIsNot(mc_a, mc_b)
+        self.assertIsNot(lock_a, lock_b)
+        # El mateix agent sempre rep la mateixa connexió
+        self.assertIs(self.pool.lease("ExplorerBot")[0], mc_a)
+
+    def test_oversubscribed_connections_are_shared(self):
+        """Prova que amb més agents que connexions es comparteixen."""
+        for name in ("A", "B", "C", "D"):
+            self.pool.lease(name)
+
+        owners = [c["owners"] for c in self.pool.get_stats()["connections"]]
+        self.assertEqual(sorted(len(o) for o in owners), [2, 2])
+
+        self.pool.release("A")
+        self.assertEqual(self.pool.get_stats()["leases"], 3)
+
+    def test_health_check_reconnects_broken_connection(self):
+        """Prova que el health check reconnecta les connexions caigudes."""
+        mc, _ = self.pool.lease("BuilderBot")
+        mc.conn.broken = True
+
+        self.pool.check_health()
+
+        self.assertFalse(mc.conn.broken)
+        self.assertEqual(mc.conn.reconnects, 1)
+        stats = self.pool.get_stats()["connections"]
+        self.assertEqual(sum(c["reconnects"] for c in stats), 1)
+
+    def test_health_check_skips_busy_connection(self):
+        """Prova que una connexió bloquejada no penja el health check."""
+        mc, lock = self.pool.lease("MinerBot")
+        held = threading.Event()
+        done = threading.Event()
+
+        def hold():
+            with lock:
+                held.set()
+                done.wait(2)
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        held.wait()
+        t0 = time.perf_counter()
+        self.pool.check_health(timeout=0.05)
+        self.assertLess(time.perf_counter() - t0, 1.0)
+
+        # La connexió ocupada queda marcada i els nous agents l'eviten
+        stats = self.pool.get_stats()
+        self.assertEqual([c["healthy"] for c in stats["connections"]].count(False), 1)
+        self.assertIsNot(self.pool.lease("BuilderBot")[0], mc)
+        done.set()
+        holder.join()
+
+    def test_timed_lock_records_wait(self):
+        """Prova que el lock registra el temps d'espera quan està ocupat."""
+        lock = TimedLock()
+        lock.acquire()
+
+        # Un altre fil ha d'esperar que s'alliberi
+        waiter = threading.Thread(target=lambda: (lock.acquire(), lock.release()))
+        waiter.start()
+        time.sleep(0.05)
+        lock.release()
+        waiter.join()
+
+        stats = lock.get_stats()
+        self.assertEqual(stats["acquisitions"], 2)
+        self.assertGreater(stats["lock_wait_max"], 0.01)
+
+    def tearDown(self):
+        self.pool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
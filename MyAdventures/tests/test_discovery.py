@@ -1,6 +1,15 @@
 # Conjunt de proves per descobriment reflexiu
+import os
+import tempfile
 import unittest
-from utils.discovery import discover_strategies, discover_agents
+from unittest import mock
+from utils import discovery
+from utils.discovery import (
+    LazyClassMap,
+    LazyInstances,
+    discover_agents,
+    discover_strategies,
+)
 from strategies.strategy_base import MiningStrategy
 from agents.base_agent import BaseAgent
 
@@ -60,5 +69,67 @@ class TestReflectiveDiscovery(unittest.TestCase):
                 self.fail(f"No s'ha pogut instanciar {name}: {e}")
 
 
+class TestDiscoveryManifest(unittest.TestCase):
+    """Prova el manifest de descobriment i la càrrega diferida de classes."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "manifest.json")
+        self.patch = mock.patch.object(discovery, "MANIFEST_PATH", path)
+        self.patch.start()
+        discovery._manifest = None
+
+    def tearDown(self):
+        self.patch.stop()
+        discovery._manifest = None
+        self.tmp.cleanup()
+
+    def test_second_discovery_uses_manifest(self):
+        """Prova que el segon descobriment no escaneja i conserva l'ordre."""
+        first = discover_agents()
+        self.assertNotIsInstance(first, LazyClassMap)
+
+        discovery._manifest = None  # com un procés nou
+        with mock.patch.object(discovery, "_scan") as scan:
+            second = discover_agents()
+        scan.assert_not_called()
+
+        self.assertIsInstance(second, LazyClassMap)
+        self.assertEqual(list(second), list(first))
+        for name in first:
+            self.assertIs(second[name], first[name])
+
+    def test_changed_module_invalidates_manifest(self):
+        """Prova que si un mòdul canvia es torna a escanejar el paquet."""
+        discover_strategies()
+        fingerprint = discovery._fingerprint("strategies")
+        fingerprint["grid_search"] = [0, 0]
+
+        with mock.patch.object(discovery, "_fingerprint", return_value=fingerprint):
+            strategies = discover_strategies()
+        self.assertNotIsInstance(strategies, LazyClassMap)
+        self.assertIn("GridSearchStrategy", strategies)
+
+    def test_strategies_created_on_first_use(self):
+        """Prova que només es crea l'estratègia que es fa servir."""
+        created = []
+
+        class Probe:
+            def __init__(self):
+                created.append(type(self))
+
+        class Other(Probe):
+            pass
+
+        strategies = LazyInstances({"Probe": Probe, "Other": Other}, ["Other", "Probe"])
+        self.assertEqual(len(strategies), 2)
+        self.assertEqual(created, [])
+
+        probe = strategies[1]
+        self.assertIs(strategies[1], probe)
+        self.assertEqual(created, [Probe])
+        self.assertEqual(strategies.loaded(), [probe])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,92 @@
+# Conjunt de proves per al mapa d'alçades i la detecció de zones planes
+import threading
+import unittest
+from unittest import mock
+from utils import heightmap
+from utils.heightmap import HeightMap, fetch_heightmap, nearest_flat_zones
+
+
+class HillyWorld:
+    """Món amb un turó i una única esplanada de 7x7 a alçada 64."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def height(self, x, z):
+        if 10 <= x < 17 and 3 <= z < 10:
+            return 64
+        return 60 + (x * 7 + z * 3) % 5
+
+    def getHeights(self, columns):
+        self.calls += 1
+        return [self.height(x, z) for x, z in columns]
+
+
+class TestHeightMap(unittest.TestCase):
+    """Prova la lectura de la finestra i la detecció de zones planes."""
+
+    use_numpy = True
+
+    def setUp(self):
+        if not self.use_numpy:
+            patcher = mock.patch.object(heightmap, "np", None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        elif heightmap.np is None:
+            self.skipTest("NumPy no està instal·lat")
+
+    def test_fetch_reads_window_in_bounded_chunks(self):
+        """Prova que la finestra es llegeix per trossos, alliberant el lock."""
+        world = HillyWorld()
+        lock = threading.RLock()
+        read = world.getHeights
+        sizes = []
+
+        def get_heights(columns):
+            # Cada tros es llegeix amb el lock i cap el té entre trossos
+            self.assertTrue(lock._is_owned())
+            sizes.append(len(columns))
+            return read(columns)
+
+        world.getHeights = get_heights
+        hmap = fetch_heightmap(world, 0, 0, 20, mc_lock=lock, chunk_size=500)
+
+        self.assertEqual(sizes, [500, 500, 500, 181])
+        self.assertFalse(lock._is_owned())
+        self.assertEqual((hmap.width, hmap.depth), (41, 41))
+        self.assertEqual(hmap.get(12, 5), 64)
+        self.assertEqual(hmap.get(-3, 4), world.height(-3, 4))
+
+    def test_finds_flat_zone_anywhere_in_window(self):
+        """Prova que es troba la zona plana encara que no estigui en cap eix."""
+        hmap = fetch_heightmap(HillyWorld(), 0, 0, 20)
+
+        self.assertEqual(hmap.find_flat_zones(7), [(13, 6, 64)])
+        self.assertEqual(len(hmap.find_flat_zones(3)), 25)
+
+    def test_python_fallback_matches(self):
+        """Prova que el càlcul sense NumPy dona el mateix resultat."""
+        world = HillyWorld()
+        with mock.patch.object(heightmap, "np", None):
+            hmap = fetch_heightmap(world, 0, 0, 20)
+            zones = hmap.find_flat_zones(3)
+
+        expected = fetch_heightmap(world, 0, 0, 20).find_flat_zones(3)
+        self.assertEqual(sorted(zones), sorted(expected))
+
+    def test_nearest_zones_first(self):
+        """Prova que les zones s'ordenen per distància."""
+        hmap = HeightMap(0, 0, 10, 3, [5] * 30)
+
+        zones = nearest_flat_zones(hmap, (9, 1), size=3, limit=2)
+        self.assertEqual(zones, [(8, 1, 5), (7, 1, 5)])
+
+
+class TestHeightMapWithoutNumpy(TestHeightMap):
+    """Les mateixes proves amb el càlcul en Python pur."""
+
+    use_numpy = False
+
+
+if __name__ == "__main__":
+    unittest.main()
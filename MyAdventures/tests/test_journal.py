@@ -0,0 +1,148 @@
+# Conjunt de proves per al diari persistent del bus
+import tempfile
+import time
+import unittest
+from agents.minerbot import MinerBot
+from utils.communication import MessageBus, MessageProtocol
+from utils.journal import MessageJournal
+
+
+def message(msg_type, source, target, payload):
+    return MessageProtocol.create_message(msg_type, source, target, payload)
+
+
+class RecordingBus:
+    def __init__(self):
+        self.published = []
+
+    def subscribe(self, callback, **options):
+        pass
+
+    def publish(self, msg):
+        self.published.append(msg)
+
+
+class TestMessageJournal(unittest.TestCase):
+    """Prova l'escriptura per lots, la compactació i la reproducció."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_replay_rebuilds_latest_state(self):
+        """Prova que només es reprodueix l'estat posterior a l'últim reset."""
+        journal = MessageJournal(self.tmp.name)
+        journal.start()
+        journal.append(message("map.v1", "ExplorerBot", "BuilderBot", {"zone": 0}))
+        journal.append(message("workflow.reset", "System", "all", {}))
+        journal.append(message("map.v1", "ExplorerBot", "BuilderBot", {"zone": 1}))
+        for n in range(5):
+            journal.append(
+                message("inventory.v1", "MinerBot", "BuilderBot", {"stone": n})
+            )
+        journal.append(message("build.v1", "BuilderBot", "all", {"progress": 1}))
+        journal.close()
+
+        # Un procés nou llegeix el diari
+        bus = RecordingBus()
+        restarted = MessageJournal(self.tmp.name)
+        self.assertEqual(restarted.replay(bus), 2)
+        self.assertEqual(
+            [(m["type"], m["payload"]) for m in bus.published],
+            [("map.v1", {"zone": 1}), ("inventory.v1", {"stone": 4})],
+        )
+        self.assertTrue(all(m["replayed"] for m in bus.published))
+
+        # Els missatges reproduïts no es tornen a enregistrar
+        restarted.start()
+        restarted.append(bus.published[0])
+        self.assertEqual(restarted.get_stats()["appended"], 0)
+        restarted.close()
+
+    def test_miner_inventory_is_restored_before_requirements(self):
+        """Prova que el MinerBot recupera l'inventari abans dels requeriments."""
+        journal = MessageJournal(self.tmp.name)
+        journal.start()
+        journal.append(
+            message(
+                "materials.requirements.v1",
+                "BuilderBot",
+                "MinerBot",
+                {"needs": {"stone": 10}},
+            )
+        )
+        journal.append(
+            message(
+                "inventory.v1", "MinerBot", "BuilderBot", {"inventory": {"stone": 6}}
+            )
+        )
+        journal.close()
+
+        bus = MessageBus()
+        miner = MinerBot("MinerBot", bus, mc=None)
+        seen = []
+        handle = miner._handle_requirements
+
+        def record_inventory(msg):
+            seen.append(dict(miner.inventory))
+            handle(msg)
+
+        miner._handle_requirements = record_inventory
+        try:
+            MessageJournal(self.tmp.name).replay(bus)
+            deadline = time.monotonic() + 2.0
+            while not seen and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            bus.stop()
+
+        self.assertEqual(seen, [{"dirt": 0, "stone": 6}])
+
+    def test_batched_fsync(self):
+        """Prova que els registres pendents s'escriuen en un sol lot."""
+        journal = MessageJournal(self.tmp.name, interval=60.0)
+        journal.start()
+        for n in range(10):
+            journal.append(message("inventory.v1", "MinerBot", "BuilderBot", {"n": n}))
+        self.assertEqual(journal.flush(), 10)
+        journal.close()
+
+        stats = journal.get_stats()
+        self.assertEqual(stats["written"], 10)
+        self.assertEqual(stats["fsyncs"], 1)
+
+    def test_rotation_and_compaction(self):
+        """Prova que els segments tancats es compacten a l'estat vigent."""
+        journal = MessageJournal(
+            self.tmp.name, segment_size=200, max_segments=2, interval=60.0
+        )
+        journal.start()
+        for n in range(30):
+            journal.append(message("inventory.v1", "MinerBot", "BuilderBot", {"n": n}))
+            journal.flush()
+
+        stats = journal.get_stats()
+        self.assertGreater(stats["rotations"], 2)
+        self.assertGreater(stats["compactions"], 0)
+        self.assertLessEqual(stats["segments"], 4)
+        self.assertEqual([r["payload"] for r in journal.state()], [{"n": 29}])
+        journal.close()
+
+    def test_torn_record_is_skipped(self):
+        """Prova que una línia a mig escriure no impedeix reprendre."""
+        journal = MessageJournal(self.tmp.name)
+        journal.start()
+        journal.append(message("map.v1", "ExplorerBot", "BuilderBot", {"zone": 1}))
+        journal.close()
+        with open(journal.segments()[-1], "a", encoding="utf-8") as f:
+            f.write('{"type": "inventory.v1", "sour')
+
+        with self.assertLogs("utils.journal", level="WARNING"):
+            state = MessageJournal(self.tmp.name).state()
+        self.assertEqual([r["type"] for r in state], ["map.v1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
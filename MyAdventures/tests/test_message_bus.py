@@ -0,0 +1,303 @@
+# Conjunt de proves per al bus de missatges
+import threading
+import time
+import unittest
+from utils.communication import Message, MessageBus, MessageProtocol, RateLimiter
+
+
+def message(msg_type="build.v1", source="BuilderBot", payload=None):
+    return MessageProtocol.create_message(msg_type, source, "all", payload or {})
+
+
+class TestMessageBus(unittest.TestCase):
+    """Prova les cues per subscriptor, la contrapressió i les mètriques."""
+
+    def setUp(self):
+        self.bus = MessageBus(queue_size=4)
+
+    def tearDown(self):
+        self.bus.stop()
+
+    def test_slow_subscriber_does_not_stall_others(self):
+        """Prova que un subscriptor lent no atura els altres."""
+        release = threading.Event()
+        fast = []
+        self.bus.subscribe(lambda msg: release.wait(2.0), policy="drop_oldest")
+        self.bus.subscribe(fast.append)
+
+        for i in range(3):
+            self.bus.publish(message(payload={"i": i}))
+
+        deadline = time.monotonic() + 1.0
+        while len(fast) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual([m["payload"]["i"] for m in fast], [0, 1, 2])
+        release.set()
+
+    def test_drop_oldest_keeps_latest(self):
+        """Prova que amb la cua plena es descarten els més antics."""
+        started, release = threading.Event(), threading.Event()
+        received = []
+
+        def slow(msg):
+            started.set()
+            release.wait(2.0)
+            received.append(msg["payload"]["i"])
+
+        self.bus.subscribe(slow, policy="drop_oldest")
+        self.bus.publish(message(payload={"i": 0}))
+        self.assertTrue(started.wait(1.0))
+        for i in range(1, 10):
+            self.bus.publish(message(payload={"i": i}))
+        release.set()
+        self.assertTrue(self.bus.join(2.0))
+
+        # El primer ja s'estava lliurant; dels altres queden els 4 últims
+        self.assertEqual(received, [0, 6, 7, 8, 9])
+        stats = self.bus.get_stats()["subscribers"][0]
+        self.assertEqual(stats["dropped"], 5)
+        self.assertEqual(stats["max_depth"], 4)
+
+    def test_coalesce_keeps_latest_per_type_and_source(self):
+        """Prova que la política coalesce es queda l'últim per (type, source)."""
+        started, release = threading.Event(), threading.Event()
+        received = []
+
+        def slow(msg):
+            started.set()
+            release.wait(2.0)
+            received.append((msg["type"], msg["payload"]))
+
+        self.bus.subscribe(slow, policy="coalesce")
+        self.bus.publish(message("inventory.v1", "MinerBot", {"n": -1}))
+        self.assertTrue(started.wait(1.0))
+        for i in range(20):
+            self.bus.publish(message(payload={"progress": i}))
+        self.bus.publish(message("inventory.v1", "MinerBot", {"n": 1}))
+        release.set()
+        self.assertTrue(self.bus.join(2.0))
+
+        self.assertEqual(
+            received,
+            [
+                ("inventory.v1", {"n": -1}),
+                ("build.v1", {"progress": 19}),
+                ("inventory.v1", {"n": 1}),
+            ],
+        )
+
+    def test_block_waits_for_room(self):
+        """Prova que la política block fa esperar el publicador."""
+        release = threading.Event()
+        started = threading.Event()
+        self.bus.subscribe(lambda msg: (started.set(), release.wait(2.0)))
+        self.bus.publish(message(payload={"i": 0}))
+        self.assertTrue(started.wait(1.0))
+        for i in range(1, 5):  # 1 en lliurament + 4 a la cua
+            self.bus.publish(message(payload={"i": i}))
+
+        publisher = threading.Thread(target=self.bus.publish, args=(message(),))
+        publisher.start()
+        publisher.join(timeout=0.05)
+        self.assertTrue(publisher.is_alive())
+
+        release.set()
+        publisher.join(timeout=2.0)
+        self.assertFalse(publisher.is_alive())
+        self.assertTrue(self.bus.join(2.0))
+
+        stats = self.bus.get_stats()
+        self.assertEqual(stats["published"], 6)
+        self.assertEqual(stats["subscribers"][0]["delivered"], 6)
+        self.assertGreater(stats["subscribers"][0]["latency_max"], 0.0)
+
+    def test_block_gives_up_instead_of_deadlocking(self):
+        """Prova que un publicador amb el lock del subscriptor no es queda penjat."""
+        state_lock = threading.Lock()
+
+        def handler(msg):
+            with state_lock:
+                pass
+
+        self.bus.subscribe(handler)
+        self.bus.subscribers[0].block_timeout = 0.1
+        with state_lock:
+            # El lliurament espera el lock i la cua s'omple
+            for i in range(7):
+                self.bus.publish(message(payload={"i": i}))
+        self.assertTrue(self.bus.join(2.0))
+
+        stats = self.bus.get_stats()["subscribers"][0]
+        self.assertGreater(stats["block_timeouts"], 0)
+        self.assertEqual(stats["delivered"] + stats["dropped"], 7)
+
+    def test_full_queue_still_delivers_reset(self):
+        """Prova que una cua plena no descarta mai els missatges de control."""
+        release = threading.Event()
+        received = []
+
+        def handler(msg):
+            release.wait(2.0)
+            received.append(msg["type"])
+
+        self.bus.subscribe(handler, policy="drop_oldest")
+        for i in range(6):
+            self.bus.publish(message(payload={"i": i}))
+        self.bus.publish(message("workflow.reset", "System"))
+        for i in range(6):
+            self.bus.publish(message(payload={"i": i}))
+        # Cua plena només de missatges que no es poden perdre: creix
+        for _ in range(6):
+            self.bus.publish(message("map.v1", "ExplorerBot"))
+        release.set()
+        self.assertTrue(self.bus.join(2.0))
+
+        self.assertEqual(received.count("workflow.reset"), 1)
+        self.assertEqual(received.count("map.v1"), 6)
+        stats = self.bus.get_stats()["subscribers"][0]
+        self.assertGreater(stats["overflow"], 0)
+        self.assertEqual(stats["delivered"] + stats["dropped"], 19)
+
+    def test_route_cache_is_bounded(self):
+        """Prova que molts destinataris diferents no fan créixer la memòria cau."""
+        self.bus.subscribe(lambda msg: None, types=["build.v1"])
+        for i in range(MessageBus.ROUTE_CACHE_SIZE + 10):
+            self.bus._route("build.v1", f"Agent{i}")
+        self.assertLessEqual(len(self.bus._route_cache), MessageBus.ROUTE_CACHE_SIZE)
+
+    def test_routing_by_type_and_target(self):
+        """Prova que cada missatge només arriba als subscriptors interessats."""
+        miner, builder, monitor = [], [], []
+        self.bus.subscribe(
+            miner.append, types=["inventory.v1", "workflow.reset"], target="MinerBot"
+        )
+        self.bus.subscribe(
+            builder.append, types=["inventory.v1", "workflow.reset"], target="BuilderBot"
+        )
+        self.bus.subscribe(monitor.append)
+
+        inventory = MessageProtocol.create_message(
+            "inventory.v1", "MinerBot", "BuilderBot", {}
+        )
+        reset = MessageProtocol.create_message("workflow.reset", "System", "all", {})
+        progress = MessageProtocol.create_message(
+            "build.v1", "BuilderBot", "Monitor", {}
+        )
+        for msg in (inventory, reset, progress):
+            self.bus.publish(msg)
+        self.assertTrue(self.bus.join(1.0))
+
+        self.assertEqual([m["type"] for m in miner], ["workflow.reset"])
+        self.assertEqual(
+            [m["type"] for m in builder], ["inventory.v1", "workflow.reset"]
+        )
+        self.assertEqual(len(monitor), 3)
+
+    def test_unrouted_messages_are_counted(self):
+        """Prova que un missatge sense interessats no genera cap lliurament."""
+        received = []
+        self.bus.subscribe(received.append, types=["map.v1"], target="BuilderBot")
+        self.bus.publish(message())
+
+        self.assertTrue(self.bus.join(1.0))
+        self.assertEqual(received, [])
+        self.assertEqual(self.bus.get_stats()["unrouted"], 1)
+
+    def test_coalescable_types_merge_in_any_queue(self):
+        """Prova que els tipus fusionables només deixen l'últim valor pendent."""
+        bus = MessageBus(queue_size=100, coalesce_types=("build.v1",))
+        started, release = threading.Event(), threading.Event()
+        received = []
+
+        def slow(msg):
+            started.set()
+            release.wait(2.0)
+            received.append(msg["payload"])
+
+        bus.subscribe(slow)
+        bus.publish(message("map.v1", "ExplorerBot", {"zone": 1}))
+        self.assertTrue(started.wait(1.0))
+        for i in range(50):
+            bus.publish(message(payload={"progress": i}))
+            bus.publish(message(source="OtherBuilder", payload={"other": i}))
+        release.set()
+        self.assertTrue(bus.join(2.0))
+        bus.stop()
+
+        self.assertEqual(received, [{"zone": 1}, {"progress": 49}, {"other": 49}])
+
+    def test_rate_limiter(self):
+        """Prova que el limitador deixa passar una acció per període."""
+        now = [0.0]
+        limiter = RateLimiter(rate=2.0, clock=lambda: now[0])
+
+        allowed = []
+        for _ in range(10):
+            allowed.append(limiter.allow())
+            now[0] += 0.1
+        self.assertEqual(allowed.count(True), 2)
+        self.assertTrue(limiter.allow(force=True))
+        self.assertEqual(limiter.suppressed, 8)
+
+    def test_invalid_message_is_rejected(self):
+        """Prova que un missatge sense els camps requerits no s'encua."""
+        received = []
+        self.bus.subscribe(received.append)
+        self.bus.publish({"type": "build.v1"})
+
+        self.assertTrue(self.bus.join(1.0))
+        self.assertEqual(received, [])
+
+
+class TestMessage(unittest.TestCase):
+    """Prova el sobre de missatge compacte."""
+
+    def test_dict_style_access(self):
+        """Prova que el missatge es pot llegir i escriure com un diccionari."""
+        msg = MessageProtocol.create_message(
+            "map.v1", "ExplorerBot", "BuilderBot", {"zone": 1}
+        )
+        self.assertIsInstance(msg, Message)
+        self.assertEqual(msg["payload"], {"zone": 1})
+        self.assertEqual(msg.get("context"), {})
+        self.assertIsNone(msg.get("missing"))
+        self.assertIn("id", msg)
+        self.assertNotIn("trace", msg)
+
+        msg["trace"] = "abc"
+        self.assertEqual(msg["trace"], "abc")
+        self.assertEqual(msg.to_dict()["trace"], "abc")
+        with self.assertRaises(AttributeError):
+            msg.other = 1  # __slots__: sense diccionari d'atributs
+
+        # Igualtat per valor, com un dict, i per tant no és hashable
+        self.assertEqual(msg, msg.to_dict())
+        with self.assertRaises(TypeError):
+            hash(msg)
+
+    def test_sequence_ids_and_lazy_timestamp(self):
+        """Prova que els ids són enters creixents i el temps ISO és diferit."""
+        first, second = message(), message()
+        self.assertIsInstance(first["id"], int)
+        self.assertLess(first["id"], second["id"])
+
+        self.assertIsNone(first._timestamp)
+        self.assertTrue(first["timestamp"].endswith("Z"))
+        self.assertEqual(first.to_dict()["timestamp"], first.timestamp)
+        self.assertTrue(MessageProtocol.validate_message(first))
+
+    def test_plain_dicts_still_get_an_id(self):
+        """Prova que els missatges en diccionari continuen funcionant."""
+        bus = MessageBus()
+        received = []
+        bus.subscribe(received.append)
+        msg = dict(message().items())
+        del msg["id"]
+        bus.publish(msg)
+        self.assertTrue(bus.join(1.0))
+        bus.stop()
+        self.assertIsInstance(received[0]["id"], int)
+
+
+if __name__ == "__main__":
+    unittest.main()
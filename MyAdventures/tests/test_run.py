@@ -0,0 +1,80 @@
+# Conjunt de proves per a les opcions de run.py
+import unittest
+from unittest import mock
+from agents.base_agent import AgentState
+from agents.builderbot import BuilderBot
+from agents.minerbot import MinerBot
+from run import build_system_flags, parse_args, select_agents
+from utils.communication import MessageProtocol
+
+AGENTS = {"ExplorerBot": object, "MinerBot": object, "BuilderBot": object}
+
+
+class FakeBus:
+    def __init__(self):
+        self.published = []
+
+    def subscribe(self, callback, **options):
+        pass
+
+    def publish(self, msg):
+        self.published.append(msg)
+
+
+class FakeMC:
+    def postToChat(self, msg):
+        pass
+
+
+class TestRunOptions(unittest.TestCase):
+    """Prova els flags i els agents de cada tipus de procés."""
+
+    def test_worker_runs_workflow_past_map(self):
+        """Prova que un treballador demana materials i comença a minar sol."""
+        args = parse_args(
+            ["--worker", "--bus-address", "/tmp/bus.sock", "--agents", "MinerBot"]
+        )
+        flags = build_system_flags(args)
+        self.assertTrue(flags["workflow_mode"])
+
+        bus = FakeBus()
+        builder = BuilderBot("BuilderBot", bus, FakeMC(), system_flags=flags)
+        builder.on_message(
+            MessageProtocol.create_message(
+                "map.v1", "ExplorerBot", "BuilderBot", {"zone": (0, 64, 0)}
+            )
+        )
+        request = bus.published[-1]
+        self.assertEqual(request["type"], "materials.requirements.v1")
+
+        miner = MinerBot("MinerBot", bus, FakeMC(), system_flags=flags)
+        miner.on_message(request)
+        self.assertEqual(miner.state, AgentState.RUNNING)
+
+    def test_hub_hosts_no_agents_by_default(self):
+        """Prova que amb el bus compartit el concentrador no duplica agents."""
+        hub = parse_args(["--bus-address", "/tmp/bus.sock"])
+        self.assertEqual(select_agents(AGENTS, hub), {})
+
+        worker = parse_args(
+            ["--worker", "--bus-address", "/tmp/bus.sock", "--agents", "BuilderBot"]
+        )
+        self.assertEqual(list(select_agents(AGENTS, worker)), ["BuilderBot"])
+
+        # Un procés de workflow connectat al bus executa tots els agents
+        workflow = parse_args(["--workflow", "--bus-address", "/tmp/bus.sock"])
+        self.assertEqual(select_agents(AGENTS, workflow), AGENTS)
+
+        chosen = parse_args(["--bus-address", "/tmp/bus.sock", "--agents", "MinerBot"])
+        self.assertEqual(list(select_agents(AGENTS, chosen)), ["MinerBot"])
+
+        self.assertEqual(select_agents(AGENTS, parse_args([])), AGENTS)
+
+    def test_worker_requires_agents(self):
+        """Prova que un treballador sense --agents no arrenca."""
+        with mock.patch("sys.stderr"), self.assertRaises(SystemExit):
+            parse_args(["--worker", "--bus-address", "/tmp/bus.sock"])
+
+
+if __name__ == "__main__":
+    unittest.main()
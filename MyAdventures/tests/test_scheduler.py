@@ -0,0 +1,89 @@
+# Conjunt de proves per al planificador central d'agents
+import threading
+import time
+import unittest
+from agents.base_agent import BaseAgent, AgentState
+from utils.scheduler import AgentScheduler
+
+
+class CountingAgent(BaseAgent):
+    """Agent de prova que compta els cicles executats."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.ticks = 0
+        self.ticked = threading.Event()
+
+    def perceive(self):
+        pass
+
+    def decide(self):
+        pass
+
+    def act(self):
+        self.ticks += 1
+        self.ticked.set()
+
+
+class TestAgentScheduler(unittest.TestCase):
+    """Prova els ticks, l'aparcament i el despertar d'agents."""
+
+    def setUp(self):
+        self.scheduler = AgentScheduler(workers=2)
+        self.scheduler.start()
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def _start(self, agent, tick_interval=0.01):
+        agent.attach_scheduler(self.scheduler)
+        agent.start_loop(tick_interval=tick_interval)
+
+    def test_running_agents_tick(self):
+        """Prova que els agents RUNNING s'executen periòdicament."""
+        agents = [CountingAgent(f"Agent{i}") for i in range(10)]
+        for agent in agents:
+            agent.set_state(AgentState.RUNNING)
+            self._start(agent)
+
+        time.sleep(0.1)
+        self.assertTrue(all(agent.ticks >= 2 for agent in agents))
+        self.assertTrue(agents[0].is_loop_active())
+
+    def test_idle_agents_are_parked_until_woken(self):
+        """Prova que un agent IDLE no s'executa fins que canvia a RUNNING."""
+        agent = CountingAgent("Idle")
+        self._start(agent, tick_interval=10.0)
+
+        time.sleep(0.05)
+        self.assertEqual(agent.ticks, 0)
+
+        # El canvi d'estat el desperta immediatament, sense esperar el tick
+        agent.set_state(AgentState.RUNNING)
+        self.assertTrue(agent.ticked.wait(1.0))
+
+    def test_paused_agent_stops_ticking(self):
+        """Prova que un agent pausat deixa de consumir cicles."""
+        agent = CountingAgent("Paused")
+        agent.set_state(AgentState.RUNNING)
+        self._start(agent)
+        self.assertTrue(agent.ticked.wait(1.0))
+
+        agent.pause()
+        time.sleep(0.05)
+        ticks = agent.ticks
+        time.sleep(0.05)
+        self.assertEqual(agent.ticks, ticks)
+
+    def test_stop_loop_unregisters(self):
+        """Prova que stop_loop retira l'agent del planificador."""
+        agent = CountingAgent("Stopped")
+        self._start(agent)
+        agent.stop_loop()
+
+        self.assertFalse(agent.is_loop_active())
+        self.assertEqual(self.scheduler.get_stats()["agents"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
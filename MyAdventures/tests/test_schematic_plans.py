@@ -0,0 +1,85 @@
+# Conjunt de proves per als plans esquemàtics
+import os
+import tempfile
+import unittest
+from unittest import mock
+from strategies.build_plans import compiled, schematic
+from strategies.build_plans.schematic import SchematicPlan, write_schematic
+
+
+def tower(side=6, height=12):
+    """Torre buida amb parets de pedra i un pis de fusta cada 4 capes."""
+    blocks = []
+    for dy in range(height):
+        for dx in range(side):
+            for dz in range(side):
+                if dy % 4 == 0:
+                    blocks.append((dx, dy, dz, "planks"))
+                elif dx in (0, side - 1) or dz in (0, side - 1):
+                    blocks.append((dx, dy, dz, "stone"))
+    return blocks
+
+
+class TestSchematicPlan(unittest.TestCase):
+    """Prova la codificació, la descodificació per capes i el BOM."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(compiled, "PLANS_DIR", self.tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.blocks = tower()
+        write_schematic(os.path.join(self.tmp.name, "torre.mschem"), self.blocks)
+
+    def test_roundtrip(self):
+        """Prova que es recuperen els mateixos blocs ancorats a l'origen."""
+        plan = SchematicPlan("torre.mschem")
+        self.assertEqual(plan.name, "torre")
+        self.assertEqual(plan.size(), len(self.blocks))
+        self.assertEqual(plan.footprint(), (6, 6))
+        expected = [(10 + dx, 64 + dy, -3 + dz, m) for dx, dy, dz, m in self.blocks]
+        self.assertEqual(plan.generate(10, 64, -3), expected)
+
+    def test_layers_decoded_lazily(self):
+        """Prova que un tros només descomprimeix les capes que necessita."""
+        plan = SchematicPlan("torre.mschem")
+        chunks = plan.iter_chunks(0, 0, 0, chunk_size=10, start=len(self.blocks) - 5)
+        self.assertEqual(next(chunks), [tuple(b) for b in self.blocks[-5:]])
+        self.assertEqual(list(plan._layer_bom), [11])
+
+        # El cursor reprèn al mig del pla igual que amb un pla en memòria
+        cursor = plan.open_cursor(0, 0, 0, chunk_size=16, position=40)
+        self.assertEqual(cursor.total, len(self.blocks))
+
+    def test_bom_counted_during_decode(self):
+        """Prova que el BOM surt del recompte de les capes."""
+        plan = SchematicPlan("torre.mschem")
+        self.assertEqual(plan.bom, {"planks": 108, "stone": 180})
+
+    def test_changed_file_is_reread(self):
+        """Prova que si el fitxer canvia es tornen a llegir la planta i el BOM."""
+        plan = SchematicPlan("torre.mschem")
+        self.assertEqual(plan.bom, {"planks": 108, "stone": 180})
+
+        blocks = tower(side=3, height=2)
+        path = os.path.join(self.tmp.name, "torre.mschem")
+        write_schematic(path, blocks)
+        os.utime(path, ns=(1, 1))
+
+        self.assertEqual(plan.footprint(), (3, 3))
+        self.assertEqual(plan.size(), len(blocks))
+        self.assertEqual(plan.bom, {"planks": 9, "stone": 8})
+        self.assertEqual(plan.generate(0, 0, 0), blocks)
+
+    def test_instances_from_plans_dir(self):
+        """Prova que cada fitxer .mschem de data/plans aporta un pla."""
+        with open(os.path.join(self.tmp.name, "trencat.mschem"), "wb") as f:
+            f.write(b"no")
+        with self.assertLogs(schematic.logger, level="ERROR"):
+            plans = SchematicPlan.instances()
+        self.assertEqual([p.name for p in plans], ["torre"])
+
+
+if __name__ == "__main__":
+    unittest.main()
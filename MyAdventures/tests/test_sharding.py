@@ -0,0 +1,154 @@
+# Conjunt de proves per a la mineria repartida en fragments
+import threading
+import unittest
+from unittest import mock
+from agents.base_agent import AgentState
+from agents.minerbot import MinerBot
+from strategies.sharding import split_requirements, split_shards
+
+
+class FakeBus:
+    def __init__(self):
+        self.published = []
+
+    def subscribe(self, callback, **options):
+        pass
+
+    def publish(self, msg):
+        self.published.append(msg)
+
+
+class FakePos:
+    x, y, z = 0, 40, 0
+
+
+class FakePlayer:
+    def getTilePos(self):
+        return FakePos()
+
+
+class StoneWorld:
+    """Món de pedra que registra quins blocs s'han buidat."""
+
+    def __init__(self, cleared, lock):
+        self.player = FakePlayer()
+        self.cleared = cleared
+        self.lock = lock
+        self.region_reads = 0
+
+    def getBlocks(self, x0, y0, z0, x1, y1, z1):
+        self.region_reads += 1
+        return [1] * ((x1 - x0 + 1) * (y1 - y0 + 1) * (z1 - z0 + 1))
+
+    def setBlock(self, x, y, z, block_id, *data):
+        if block_id == 0:
+            with self.lock:
+                self.cleared.append((x, y, z))
+
+    def postToChat(self, msg):
+        pass
+
+
+class TestSharding(unittest.TestCase):
+    """Prova el repartiment de la regió i la fusió d'inventaris."""
+
+    def test_split_shards_are_disjoint(self):
+        """Prova que els fragments no se solapen."""
+        anchors = split_shards((10, 50, 20), 4, width=4)
+
+        self.assertEqual(anchors[0], (10, 50, 20))
+        self.assertEqual(
+            sorted(anchors), [(10, 50, 20), (10, 50, 24), (14, 50, 20), (14, 50, 24)]
+        )
+
+    def test_workers_mine_disjoint_shards_and_merge_inventory(self):
+        """Prova que cada treballador mina el seu fragment i l'inventari es fusiona."""
+        cleared, lock = [], threading.Lock()
+        bus = FakeBus()
+        miner = MinerBot("MinerBot", bus, StoneWorld(cleared, lock))
+        miner.switch_strategy_by_name("GridSearchStrategy")
+
+        worlds = []
+
+        def shard_connection(index):
+            worlds.append(StoneWorld(cleared, lock))
+            return worlds[-1], threading.RLock()
+
+        miner.set_workers(2, shard_connection)
+        miner.requirements = {"stone": 120}
+        miner.set_state(AgentState.RUNNING)
+
+        for _ in range(10):
+            miner.act()
+            if miner.state != AgentState.RUNNING:
+                break
+
+        self.assertEqual(miner.state, AgentState.WAITING)
+        self.assertEqual(len(worlds), 1)
+        self.assertGreater(worlds[0].region_reads, 0)
+        # Cap bloc s'ha minat dues vegades
+        self.assertEqual(len(cleared), len(set(cleared)))
+        # Tots els missatges d'inventari van al BuilderBot amb el total fusionat
+        final = bus.published[-1]
+        self.assertEqual(final["type"], "inventory.v1")
+        self.assertEqual(final["payload"]["inventory"], {"stone": 120})
+
+    def test_more_workers_than_needed_do_not_overmine(self):
+        """Prova que amb molts treballadors només es mina la necessitat."""
+        cleared, lock = [], threading.Lock()
+        bus = FakeBus()
+        miner = MinerBot("MinerBot", bus, StoneWorld(cleared, lock))
+        miner.switch_strategy_by_name("GridSearchStrategy")
+        miner.set_workers(
+            4, lambda index: (StoneWorld(cleared, lock), threading.RLock())
+        )
+        miner.requirements = {"stone": 40, "dirt": 0}
+        miner.set_state(AgentState.RUNNING)
+
+        for _ in range(10):
+            miner.act()
+            if miner.state != AgentState.RUNNING:
+                break
+
+        self.assertEqual(miner.state, AgentState.WAITING)
+        self.assertEqual(len(cleared), 40)
+        self.assertEqual(miner.inventory["stone"], 40)
+        # Els fils dels fragments es tanquen en acabar
+        self.assertIsNone(miner._executor)
+
+    def test_descent_marks_anchor_under_lock(self):
+        """Prova que el marcador del nou anchor s'escriu amb el lock agafat."""
+        mc_lock = threading.Lock()
+        miner = MinerBot(
+            "MinerBot", FakeBus(), StoneWorld([], threading.Lock()), mc_lock=mc_lock
+        )
+        miner.switch_strategy_by_name("GridSearchStrategy")
+        miner.set_workers(
+            2, lambda index: (StoneWorld([], threading.Lock()), threading.RLock())
+        )
+        miner.set_state(AgentState.RUNNING)
+        miner.act()
+        shard = miner.shards[1]
+        start_y = shard.anchor[1]
+
+        held = []
+
+        def mark(*args, **kwargs):
+            held.append(mc_lock.locked())
+
+        with mock.patch("agents.minerbot.mark_bot", side_effect=mark):
+            miner._descend_shard(shard)
+
+        self.assertEqual(shard.anchor[1], start_y - shard.descent_step)
+        self.assertEqual(held, [True])
+
+    def test_split_requirements_is_exact(self):
+        """Prova que les parts sumen exactament la necessitat pendent."""
+        shares = split_requirements({"stone": 3, "dirt": 9, "sand": 0}, 4)
+        self.assertEqual(sum(s.get("stone", 0) for s in shares), 3)
+        self.assertEqual([s.get("dirt") for s in shares], [3, 2, 2, 2])
+        self.assertEqual(shares[3], {"dirt": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+# Conjunt de proves per a l'índex de llocs de construcció
+import unittest
+from utils.heightmap import HeightMap
+from utils.site_index import SiteIndex
+
+
+def terrain(width, depth, height_at):
+    heights = [height_at(x, z) for z in range(depth) for x in range(width)]
+    return HeightMap(0, 0, width, depth, heights)
+
+
+class TestSiteIndex(unittest.TestCase):
+    """Prova la puntuació i l'ordre dels llocs candidats."""
+
+    def test_closest_flat_site_first(self):
+        """Prova que a igual planor guanya el lloc més proper."""
+        hmap = terrain(30, 10, lambda x, z: 64)
+        index = SiteIndex(hmap, center=(2, 5), footprint=(4, 4))
+
+        site = index.pop()
+        self.assertEqual((site.width, site.depth), (4, 4))
+        self.assertLess(site.distance, 2)
+
+    def test_alternatives_do_not_overlap(self):
+        """Prova que les alternatives són parcel·les disjuntes."""
+        hmap = terrain(20, 20, lambda x, z: 64)
+        sites = SiteIndex(hmap, center=(10, 10), footprint=(5, 5)).best(4)
+
+        self.assertEqual(len(sites), 4)
+        for i, a in enumerate(sites):
+            for b in sites[i + 1 :]:
+                self.assertFalse(a.overlaps(b))
+
+    def test_flat_margin_and_flatness_rank_higher(self):
+        """Prova que una planta amb vora plana guanya una d'encaixada."""
+        # Esplanada gran lluny i un forat just de la mida a prop del jugador
+        def height(x, z):
+            if 2 <= x < 6 and 2 <= z < 6:
+                return 60
+            if x >= 14:
+                return 64
+            return 60 + (x + 2 * z) % 3 + 1
+
+        hmap = terrain(24, 12, height)
+        index = SiteIndex(hmap, center=(4, 4), footprint=(4, 4), margin_penalty=5.0)
+
+        best = index.pop()
+        self.assertGreaterEqual(best.x, 14)
+        self.assertEqual(best.y, 64)
+        self.assertEqual(best.variance, 0.0)
+
+    def test_footprint_larger_than_window(self):
+        """Prova que sense espai no hi ha candidats."""
+        hmap = terrain(5, 5, lambda x, z: 64)
+        index = SiteIndex(hmap, center=(2, 2), footprint=(7, 7))
+
+        self.assertEqual(len(index), 0)
+        self.assertIsNone(index.pop())
+
+
+if __name__ == "__main__":
+    unittest.main()
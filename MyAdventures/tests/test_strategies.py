@@ -1,4 +1,5 @@
 # Conjunt de proves per estratègies de mineria
+import threading
 import unittest
 from strategies.strategy_base import MiningStrategy
 from strategies.grid_search import GridSearchStrategy
@@ -26,6 +27,10 @@ class TestMiningStrategies(unittest.TestCase):
             def getBlock(self, *args):
                 return 1  # Stone
 
+            def getBlocks(self, x0, y0, z0, x1, y1, z1):
+                count = (abs(x1 - x0) + 1) * (abs(y1 - y0) + 1) * (abs(z1 - z0) + 1)
+                return [1] * count  # Stone
+
             def setBlock(self, *args):
                 pass
 
@@ -36,6 +41,132 @@ class TestMiningStrategies(unittest.TestCase):
         # self.assertIn('wood', result)
         self.assertIn("stone", result)
 
+    def test_grid_search_reads_region_once(self):
+        """Prova que GridSearchStrategy llegeix tota la graella amb un sol getBlocks."""
+        strategy = GridSearchStrategy(grid_size=4)
+
+        class MockMC:
+            def __init__(self):
+                self.region_reads = []
+                self.cleared = []
+
+            def getBlock(self, *args):
+                raise AssertionError("No s'ha de llegir bloc a bloc")
+
+            def getBlocks(self, *args):
+                self.region_reads.append(args)
+                # Capa inferior de pedra, la resta terra (ordre y, x, z)
+                return [1] * 16 + [3] * 48
+
+            def setBlock(self, x, y, z, block_id):
+                self.cleared.append((x, y, z))
+
+        mc = MockMC()
+        result = strategy.mine(
+            mc=mc,
+            start_pos=(10, 20, 30),
+            requirements={"stone": 16, "dirt": 48},
+        )
+
+        self.assertEqual(mc.region_reads, [(10, 20, 30, 13, 23, 33)])
+        self.assertEqual(result, {"stone": 16, "dirt": 48})
+        self.assertEqual(len(mc.cleared), 64)
+
+    def test_pause_blocks_and_resumes_at_same_voxel(self):
+        """Prova que la pausa bloqueja sense perdre el vòxel on s'havia quedat."""
+        strategy = GridSearchStrategy(grid_size=4)
+        paused = threading.Event()
+
+        class MockMC:
+            def __init__(self):
+                self.cleared = []
+
+            def getBlocks(self, *args):
+                return [1] * 64
+
+            def setBlock(self, x, y, z, block_id):
+                self.cleared.append((x, y, z))
+                if len(self.cleared) == 10:
+                    strategy.handle_pause()
+                    paused.set()
+
+        mc = MockMC()
+        worker = threading.Thread(
+            target=strategy.mine, kwargs={"mc": mc, "start_pos": (0, 0, 0)}
+        )
+        worker.start()
+        self.assertTrue(paused.wait(1.0))
+
+        # Mentre està pausada no avança
+        worker.join(timeout=0.05)
+        self.assertTrue(worker.is_alive())
+        self.assertEqual(len(mc.cleared), 10)
+
+        strategy.handle_resume()
+        worker.join(timeout=2.0)
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(len(set(mc.cleared)), 64)
+
+    def test_stop_releases_paused_strategy(self):
+        """Prova que aturar una estratègia pausada la desbloqueja."""
+        strategy = VerticalSearchStrategy()
+        strategy.handle_pause()
+
+        timer = threading.Timer(0.05, strategy.handle_stop)
+        timer.start()
+        self.assertFalse(strategy.wait_while_paused(timeout=2.0))
+        timer.join()
+        self.assertTrue(strategy.is_stopped)
+
+    def test_cursor_mines_within_budget_and_resumes(self):
+        """Prova que el cursor respecta el pressupost i continua on s'havia quedat."""
+        strategy = GridSearchStrategy(grid_size=4)
+
+        class MockMC:
+            def __init__(self):
+                self.cleared = []
+
+            def getBlocks(self, *args):
+                return [1] * 64
+
+            def setBlock(self, x, y, z, block_id):
+                self.cleared.append((x, y, z))
+
+        mc = MockMC()
+        cursor = strategy.open_cursor(mc, (0, 0, 0), {}, {"stone": 64})
+        self.assertEqual(mc.cleared, [])
+
+        self.assertEqual(cursor.step(max_blocks=10), {"stone": 10})
+        self.assertEqual(len(mc.cleared), 10)
+        self.assertFalse(cursor.done)
+
+        # En pausa no avança, però no bloqueja
+        strategy.handle_pause()
+        self.assertEqual(cursor.step(max_blocks=10), {})
+        strategy.handle_resume()
+
+        cursor.step(max_blocks=100)
+        self.assertTrue(cursor.done)
+        self.assertEqual(cursor.collected, {"stone": 64})
+        self.assertEqual(len(set(mc.cleared)), 64)
+
+    def test_cursor_stops_when_strategy_stopped(self):
+        """Prova que aturar l'estratègia tanca el cursor."""
+        strategy = VerticalSearchStrategy()
+
+        class MockMC:
+            def getBlocks(self, x0, y0, z0, x1, y1, z1):
+                return [1] * ((y1 - y0) + 1)
+
+            def setBlock(self, *args):
+                pass
+
+        cursor = strategy.open_cursor(MockMC(), (0, 30, 0), {}, None)
+        cursor.step(max_blocks=2)
+        strategy.handle_stop()
+        self.assertEqual(cursor.step(max_blocks=2), {})
+        self.assertTrue(cursor.done)
+
     def test_strategy_get_name(self):
         """Prova l'obtenció del nom de l'estratègia."""
         strategy = GridSearchStrategy()
@@ -0,0 +1,215 @@
+# Conjunt de proves per a la construcció en streaming
+import tempfile
+import time
+import unittest
+from unittest import mock
+from agents.base_agent import AgentState
+from agents.builderbot import BuilderBot
+from strategies.build_plans.base_plan import BuildPlan
+from utils.build_batching import expand_cuboid
+from utils.communication import MessageBus, MessageProtocol, RateLimiter
+from utils.journal import MessageJournal
+
+
+class StripesPlan(BuildPlan):
+    """Pla de prova: capes de franges de dos materials."""
+
+    def __init__(self, side=10, height=6):
+        self.side = side
+        self.height = height
+
+    @property
+    def name(self):
+        return "franges"
+
+    def generate(self, x, y, z):
+        return [
+            (x + dx, y + dy, z + dz, "stone" if dz % 3 else "dirt")
+            for dy in range(self.height)
+            for dx in range(self.side)
+            for dz in range(self.side)
+        ]
+
+
+def drain(cursor, limit=None):
+    """Consumeix el cursor i retorna els blocs col·locats."""
+    placed = []
+    while limit is None or len(placed) < limit:
+        run = cursor.peek()
+        if run is None:
+            break
+        if limit is not None and len(placed) + run.size > limit:
+            cursor.split()
+            continue
+        placed.extend((b.x0, b.y0, b.z0, b.material) for b in expand_cuboid(run))
+        cursor.advance()
+    return placed
+
+
+class TestBuildCursor(unittest.TestCase):
+    """Prova el cursor per trossos i la represa des d'un punt de control."""
+
+    def test_chunks_cover_plan_exactly(self):
+        """Prova que els trossos cobreixen tots els blocs un sol cop."""
+        plan = StripesPlan()
+        cursor = plan.open_cursor(5, 60, 5, chunk_size=64)
+        placed = drain(cursor)
+
+        self.assertTrue(cursor.done)
+        self.assertEqual(cursor.position, 600)
+        self.assertEqual(sorted(placed), sorted(plan.generate(5, 60, 5)))
+        # Només es conserven els cuboides d'un tros
+        self.assertLessEqual(len(cursor._runs), 64)
+
+    def test_resume_from_checkpoint(self):
+        """Prova que reprendre a mig tros continua exactament on es va parar."""
+        plan = StripesPlan()
+        cursor = plan.open_cursor(0, 0, 0, chunk_size=64)
+        first = drain(cursor, limit=150)
+        checkpoint = cursor.checkpoint()
+        self.assertEqual(checkpoint["position"], 150)
+
+        resumed = type(cursor).from_checkpoint(plan, checkpoint)
+        rest = drain(resumed)
+        self.assertEqual(rest, drain(cursor))
+        self.assertEqual(sorted(first + rest), sorted(plan.generate(0, 0, 0)))
+
+
+class MockMC:
+    def __init__(self):
+        self.placed = 0
+
+    def setBlock(self, *args):
+        self.placed += 1
+
+    def setBlocks(self, x0, y0, z0, x1, y1, z1, block_id):
+        self.placed += (x1 - x0 + 1) * (y1 - y0 + 1) * (z1 - z0 + 1)
+
+    def getHeights(self, columns):
+        return [0] * len(columns)
+
+    def postToChat(self, msg):
+        pass
+
+
+class TestStreamingBuilder(unittest.TestCase):
+    """Prova que el BuilderBot construeix amb el cursor i el pot reprendre."""
+
+    def setUp(self):
+        self.bus = MessageBus()
+        self.mc = MockMC()
+        self.builder = BuilderBot(
+            "BuilderBot", self.bus, self.mc, system_flags={"build_chunk_size": 50}
+        )
+        self.builder.plans["franges"] = StripesPlan()
+        self.builder.switch_plan("franges")
+        self.builder.target_zone = {"x": 0, "y": 0, "z": 0}
+        self.builder.set_state(AgentState.RUNNING, "Test")
+
+    def tearDown(self):
+        self.bus.stop()
+
+    def test_checkpoint_and_resume(self):
+        """Prova que un BuilderBot nou reprèn la construcció del checkpoint."""
+        self.builder.inventory = {"dirt": 100, "stone": 360}
+        self.builder.act()
+        placed = self.builder.build_index
+        self.assertGreater(placed, 0)
+        self.assertFalse(self.builder.build_complete)
+        self.builder.save_checkpoint()
+
+        other = BuilderBot("BuilderBot2", self.bus, self.mc)
+        other.plans["franges"] = StripesPlan()
+        other.checkpoint = self.builder.checkpoint
+        other.restore_checkpoint()
+        self.assertEqual(other.build_index, placed)
+
+        other.inventory = {"dirt": 240, "stone": 360}
+        other.set_state(AgentState.RUNNING, "Test")
+        other.act()
+        self.assertTrue(other.build_complete)
+        self.assertEqual(self.mc.placed, 600 + 1)  # + el marcador de la zona
+
+    def test_checkpoints_do_not_wait_for_progress_limit(self):
+        """Prova que hi ha un checkpoint per tros encara que es limiti el progrés."""
+        published = []
+        self.builder.message_bus = mock.Mock(publish=published.append)
+        self.builder.progress_limiter = RateLimiter(0.001)
+        self.builder.max_blocks_per_tick = 20
+        self.builder.inventory = {"dirt": 240, "stone": 360}
+        while not self.builder.build_complete:
+            self.builder.act()
+
+        progress = [m for m in published if m["type"] == "build.v1"]
+        positions = [
+            m["payload"]["build"]["position"]
+            for m in published
+            if m["type"] == "build.checkpoint.v1"
+        ]
+        self.assertEqual(len(progress), 2)  # el primer i el final
+        self.assertEqual({p // 50 for p in positions}, set(range(1, 13)))
+        self.assertEqual(positions[-1], 600)
+
+    def test_restored_inventory_excludes_placed_blocks(self):
+        """Prova que en reprendre no es compten dues vegades els blocs col·locats."""
+        mined = MessageProtocol.create_message(
+            "inventory.v1",
+            "MinerBot",
+            "BuilderBot",
+            {"inventory": {"dirt": 100, "stone": 360}},
+        )
+        self.builder.on_message(mined)
+        self.builder.act()
+        self.builder.save_checkpoint()
+        left = dict(self.builder.inventory)
+        self.assertLess(left["stone"], 360)
+
+        # L'inventari del MinerBot pot arribar abans o després del checkpoint
+        for inventory_first in (True, False):
+            other = BuilderBot("BuilderBot", self.bus, self.mc)
+            other.plans["franges"] = StripesPlan()
+            other.checkpoint = dict(self.builder.checkpoint)
+            if inventory_first:
+                other.on_message(mined)
+            other.restore_checkpoint()
+            if not inventory_first:
+                other.on_message(mined)
+            self.assertEqual(
+                {k: other.inventory[k] for k in left}, left, inventory_first
+            )
+
+    def test_checkpoint_is_journaled_and_replayed(self):
+        """Prova que un procés nou reprèn la construcció des del diari."""
+        with tempfile.TemporaryDirectory() as directory:
+            journal = MessageJournal(directory)
+            journal.attach(self.bus)
+            self.builder.inventory = {"dirt": 100, "stone": 360}
+            self.builder.act()
+            placed = self.builder.build_index
+            self.assertGreater(placed, 0)
+            # El diari rep el checkpoint pel bus, en un altre fil
+            deadline = time.monotonic() + 2.0
+            while (
+                not journal.get_stats()["appended"] and time.monotonic() < deadline
+            ):
+                time.sleep(0.01)
+            journal.close()
+
+            bus = MessageBus()
+            try:
+                other = BuilderBot("BuilderBot", bus, self.mc)
+                other.plans["franges"] = StripesPlan()
+                MessageJournal(directory).replay(bus)
+                deadline = time.monotonic() + 2.0
+                while other.build_cursor is None and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            finally:
+                bus.stop()
+
+        self.assertEqual(other.current_plan_name, "franges")
+        self.assertEqual(other.build_index, placed)
+        self.assertEqual(other.target_zone, {"x": 0, "y": 0, "z": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
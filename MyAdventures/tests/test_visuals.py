@@ -0,0 +1,94 @@
+# Conjunt de proves per als nivells de visualització
+import threading
+import time
+import unittest
+from utils import visuals
+from utils.visuals import MarkerBuffer, mark_bot, set_visual_level
+
+
+class RecordingMC:
+    """Minecraft fals que registra escriptures i lots."""
+
+    def __init__(self):
+        self.single = []
+        self.batches = []
+        self.chat = []
+
+    def setBlock(self, *args):
+        self.single.append(args)
+
+    def setBlockList(self, blocks):
+        self.batches.append(list(blocks))
+
+    def postToChat(self, msg):
+        self.chat.append(msg)
+
+
+class TestVisualLevels(unittest.TestCase):
+    """Prova els nivells off, summary i full."""
+
+    def setUp(self):
+        self.mc = RecordingMC()
+        self.buffer = MarkerBuffer(batch_size=1000, interval=10.0)
+        self._old_buffer = visuals._buffer
+        visuals._buffer = self.buffer
+
+    def tearDown(self):
+        visuals._buffer = self._old_buffer
+        set_visual_level("summary")
+
+    def test_off_writes_nothing(self):
+        """Prova que en nivell off no es toca el món."""
+        set_visual_level("off")
+        mark_bot(self.mc, 1, 2, 3, label="Test")
+        mark_bot(self.mc, 1, 2, 3, detail=True)
+
+        self.assertEqual((self.mc.single, self.mc.chat), ([], []))
+        self.assertEqual(self.buffer.get_stats()["queued"], 0)
+
+    def test_summary_skips_detail_markers(self):
+        """Prova que en nivell summary només es dibuixen els principals."""
+        set_visual_level("summary")
+        mark_bot(self.mc, 1, 2, 3, label="Test")
+        mark_bot(self.mc, 4, 5, 6, detail=True)
+
+        self.assertEqual(len(self.mc.single), 1)
+        self.assertEqual(len(self.mc.chat), 1)
+        self.assertEqual(self.buffer.get_stats()["queued"], 0)
+
+    def test_full_buffers_detail_markers_in_batches(self):
+        """Prova que en nivell full els marcadors de detall s'escriuen per lots."""
+        set_visual_level("full")
+        lock = threading.RLock()
+        for x in range(50):
+            mark_bot(self.mc, x, 64, 0, detail=True, mc_lock=lock)
+
+        # Res s'ha escrit encara: l'agent no ha esperat el socket
+        self.assertEqual(self.mc.single, [])
+        self.assertEqual(self.buffer.get_stats()["pending"], 50)
+
+        self.assertEqual(self.buffer.flush(), 50)
+        self.assertEqual(len(self.mc.batches), 1)
+        self.assertEqual(len(self.mc.batches[0]), 50)
+        self.assertEqual(self.buffer.get_stats()["batches"], 1)
+
+    def test_background_flush(self):
+        """Prova que el fil del buffer escriu els marcadors sense flush explícit."""
+        set_visual_level("full")
+        visuals._buffer = MarkerBuffer(batch_size=10, interval=0.05)
+        for x in range(10):
+            mark_bot(self.mc, x, 64, 0, detail=True)
+
+        deadline = time.monotonic() + 1.0
+        while visuals._buffer.get_stats()["flushed"] < 10 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(sum(len(b) for b in self.mc.batches), 10)
+
+    def test_unknown_level_rejected(self):
+        """Prova que un nivell desconegut es rebutja."""
+        with self.assertRaises(ValueError):
+            set_visual_level("debug")
+
+
+if __name__ == "__main__":
+    unittest.main()
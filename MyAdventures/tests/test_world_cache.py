@@ -0,0 +1,139 @@
+# Conjunt de proves per a la memòria cau del món
+import unittest
+from unittest import mock
+from utils.world_cache import CachedMinecraft, WorldCache
+
+
+class CountingMC:
+    """Minecraft fals que compta les lectures que arriben al servidor."""
+
+    def __init__(self):
+        self.reads = 0
+        self.blocks = {}
+
+    def getBlock(self, x, y, z):
+        self.reads += 1
+        return self.blocks.get((x, y, z), 1)
+
+    def getBlocks(self, x0, y0, z0, x1, y1, z1):
+        self.reads += 1
+        return [
+            self.blocks.get((x, y, z), 1)
+            for y in range(y0, y1 + 1)
+            for x in range(x0, x1 + 1)
+            for z in range(z0, z1 + 1)
+        ]
+
+    def getHeight(self, x, z):
+        self.reads += 1
+        return 64
+
+    def getHeights(self, columns):
+        self.reads += 1
+        return [64 for _ in columns]
+
+    def setBlock(self, x, y, z, block_id, *data):
+        self.blocks[(x, y, z)] = block_id
+
+    def setBlocks(self, x0, y0, z0, x1, y1, z1, block_id, *data):
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                for z in range(z0, z1 + 1):
+                    self.blocks[(x, y, z)] = block_id
+
+    def postToChat(self, msg):
+        return msg
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestWorldCache(unittest.TestCase):
+    """Prova la memòria cau de blocs i alçades."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.raw = CountingMC()
+        self.mc = CachedMinecraft(self.raw, WorldCache(ttl=5.0, clock=self.clock))
+
+    def test_repeated_reads_hit_cache(self):
+        """Prova que les lectures repetides no arriben al servidor."""
+        self.mc.getBlock(1, 2, 3)
+        self.mc.getBlock(1, 2, 3)
+        self.mc.getHeights([(0, 0), (1, 0)])
+        self.mc.getHeight(1, 0)
+
+        self.assertEqual(self.raw.reads, 2)
+        stats = self.mc.get_stats()
+        self.assertEqual(stats["block_hits"], 1)
+        self.assertEqual(stats["height_hits"], 1)
+
+    def test_own_writes_update_cache(self):
+        """Prova que les escriptures pròpies actualitzen la memòria cau."""
+        self.mc.getBlocks(0, 0, 0, 3, 3, 3)
+        self.mc.setBlock(1, 1, 1, 0)
+        self.mc.setBlocks(2, 0, 0, 3, 0, 3, 0)
+
+        # El bloc solt es serveix de memòria; el cuboide s'ha invalidat
+        self.assertEqual(self.mc.getBlock(1, 1, 1), 0)
+        self.assertEqual(self.raw.reads, 1)
+        ids = self.mc.getBlocks(0, 0, 0, 3, 3, 3)
+        self.assertEqual(self.raw.reads, 2)
+        self.assertEqual(ids, self.raw.getBlocks(0, 0, 0, 3, 3, 3))
+
+    def test_filled_cuboid_invalidates_only_its_region(self):
+        """Prova que omplir un cuboide invalida per regió, no bloc a bloc."""
+        self.mc.getBlocks(0, 0, 0, 20, 2, 20)
+        self.mc.getHeights([(5, 5), (30, 30)])
+        reads = self.raw.reads
+
+        with mock.patch.object(WorldCache, "written") as written:
+            self.mc.setBlocks(10, 70, 10, 0, 0, 0, 1)
+        written.assert_not_called()
+
+        # Fora del cuboide tot continua en memòria
+        self.mc.getBlock(20, 0, 20)
+        self.mc.getBlock(15, 1, 5)
+        self.mc.getHeight(30, 30)
+        self.assertEqual(self.raw.reads, reads)
+        # Dins del cuboide es torna a llegir, blocs i alçada
+        self.mc.getBlock(5, 0, 5)
+        self.mc.getHeight(5, 5)
+        self.assertEqual(self.raw.reads, reads + 2)
+
+    def test_write_on_top_invalidates_height(self):
+        """Prova que escriure a dalt de tot invalida l'alçada de la columna."""
+        self.mc.getHeight(5, 5)
+        self.mc.setBlock(5, 10, 5, 1)
+        self.mc.getHeight(5, 5)
+        self.mc.setBlock(5, 70, 5, 1)
+        self.mc.getHeight(5, 5)
+
+        self.assertEqual(self.raw.reads, 2)
+
+    def test_ttl_and_lru(self):
+        """Prova la caducitat per TTL i l'expulsió LRU de chunks."""
+        cache = WorldCache(max_chunks=2, ttl=5.0, clock=self.clock)
+        cache.put_block(0, 0, 0, 1)
+        cache.put_block(16, 0, 0, 1)
+        cache.put_block(32, 0, 0, 1)
+
+        self.assertIsNone(cache.get_block(0, 0, 0))
+        self.assertEqual(cache.get_block(32, 0, 0), 1)
+
+        self.clock.now = 6.0
+        self.assertIsNone(cache.get_block(32, 0, 0))
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_delegates_other_methods(self):
+        """Prova que la resta de mètodes es deleguen al Minecraft original."""
+        self.assertEqual(self.mc.postToChat("hola"), "hola")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Agrupació de plans de construcció en cuboides per escriure'ls amb setBlocks.
+"""
+
+from typing import Iterable, List, NamedTuple, Tuple
+
+
+class Cuboid(NamedTuple):
+    """Cuboide alineat amb els eixos i d'un sol material (extrems inclosos)."""
+
+    x0: int
+    y0: int
+    z0: int
+    x1: int
+    y1: int
+    z1: int
+    material: str
+
+    @property
+    def size(self) -> int:
+        """Nombre de blocs que ocupa el cuboide."""
+        return (
+            (self.x1 - self.x0 + 1) * (self.y1 - self.y0 + 1) * (self.z1 - self.z0 + 1)
+        )
+
+
+def coalesce_cuboids(blocks: Iterable[Tuple[int, int, int, str]]) -> List[Cuboid]:
+    """
+    Agrupa una llista de blocs (x, y, z, material) en cuboides maximals.
+
+    Algorisme voraç: recorre els blocs de baix a dalt (y, x, z) i des de cada
+    bloc pendent estén el cuboide primer en z, després en x i finalment en y,
+    sempre que tots els blocs afegits siguin pendents i del mateix material.
+    El resultat queda ordenat de baix a dalt i cobreix exactament els blocs
+    d'entrada; les posicions repetides es mantenen com a blocs individuals
+    al final perquè el recompte de materials no canviï.
+    """
+    pending = {}
+    repeated = []
+    for x, y, z, material in blocks:
+        if (x, y, z) in pending:
+            repeated.append(Cuboid(x, y, z, x, y, z, material))
+        else:
+            pending[(x, y, z)] = material
+
+    cuboids = []
+    for pos in sorted(pending, key=lambda p: (p[1], p[0], p[2])):
+        material = pending.get(pos)
+        if material is None:
+            continue  # Ja forma part d'un cuboide anterior
+        x0, y0, z0 = pos
+
+        z1 = z0
+        while pending.get((x0, y0, z1 + 1)) == material:
+            z1 += 1
+
+        x1 = x0
+        while all(
+            pending.get((x1 + 1, y0, z)) == material for z in range(z0, z1 + 1)
+        ):
+            x1 += 1
+
+        y1 = y0
+        while all(
+            pending.get((x, y1 + 1, z)) == material
+            for x in range(x0, x1 + 1)
+            for z in range(z0, z1 + 1)
+        ):
+            y1 += 1
+
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                for z in range(z0, z1 + 1):
+                    del pending[(x, y, z)]
+
+        cuboids.append(Cuboid(x0, y0, z0, x1, y1, z1, material))
+
+    return cuboids + repeated
+
+
+def expand_cuboid(cuboid: Cuboid) -> List[Cuboid]:
+    """Parteix un cuboide en cuboides d'un sol bloc (ordre y, x, z)."""
+    return [
+        Cuboid(x, y, z, x, y, z, cuboid.material)
+        for y in range(cuboid.y0, cuboid.y1 + 1)
+        for x in range(cuboid.x0, cuboid.x1 + 1)
+        for z in range(cuboid.z0, cuboid.z1 + 1)
+    ]
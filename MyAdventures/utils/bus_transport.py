@@ -0,0 +1,314 @@
+"""
+Transport del bus de missatges entre processos.
+
+Un procés fa de concentrador (`BusHub`): escolta en un socket local (Unix, o
+una named pipe a Windows) i els altres processos s'hi connecten amb un
+`BusBridge`. Cada extrem es subscriu al seu `MessageBus` local i reenvia pel
+socket els missatges publicats al procés; els missatges que arriben del
+socket es tornen a publicar al bus local. Així agents de processos diferents
+comparteixen un sol bus.
+
+Cada missatge viatja amb el node d'origen i, en arribar, es marca amb la
+clau "origin": els missatges que ja duen origen no es tornen a reenviar, de
+manera que no hi ha ecos. El concentrador retransmet el que rep d'un node a
+tots els altres (topologia en estrella).
+
+Els missatges viatgen en JSON (mai amb pickle) i els nodes s'autentiquen amb
+una clau aleatòria per execució: el concentrador la genera i la desa en un
+fitxer només llegible per l'usuari al costat del socket, o la pren de la
+variable d'entorn `MYADVENTURES_BUS_KEY` (hexadecimal) si està definida.
+"""
+
+import json
+import logging
+import os
+import secrets
+import socket
+import sys
+import tempfile
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import List, Optional
+
+from utils.communication import Message
+
+logger = logging.getLogger(__name__)
+
+AUTHKEY_ENV = "MYADVENTURES_BUS_KEY"
+
+
+def default_address() -> str:
+    """Adreça local per defecte del bus compartit."""
+    if sys.platform == "win32":
+        return r"\\.\pipe\myadventures-bus"
+    return os.path.join(tempfile.gettempdir(), "myadventures-bus.sock")
+
+
+def key_path(address: str) -> str:
+    """Fitxer on el concentrador desa la clau del bus d'`address`."""
+    if address.startswith("\\\\"):
+        # Les named pipes de Windows no són fitxers
+        return os.path.join(tempfile.gettempdir(), os.path.basename(address) + ".key")
+    return address + ".key"
+
+
+def load_authkey(address: str) -> Optional[bytes]:
+    """Clau del bus: la variable d'entorn o el fitxer del concentrador."""
+    value = os.environ.get(AUTHKEY_ENV)
+    if value:
+        return bytes.fromhex(value)
+    try:
+        with open(key_path(address), encoding="ascii") as f:
+            return bytes.fromhex(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def _store_authkey(address: str, authkey: bytes) -> None:
+    path = key_path(address)
+    if os.path.exists(path):
+        os.unlink(path)
+    # Creat directament amb permisos 0600: cap altre usuari el pot llegir
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="ascii") as f:
+        f.write(authkey.hex())
+
+
+class _Peer:
+    """Connexió amb un altre node, amb el seu propi lock d'escriptura."""
+
+    def __init__(self, conn, name: str):
+        self.conn = conn
+        self.name = name
+        self._lock = threading.Lock()
+
+    def send(self, origin: str, msg) -> bool:
+        record = msg.to_dict() if isinstance(msg, Message) else dict(msg)
+        data = json.dumps([origin, record], default=str).encode("utf-8")
+        try:
+            with self._lock:
+                self.conn.send_bytes(data)
+            return True
+        except (OSError, EOFError, ValueError):
+            return False
+
+    def recv(self):
+        """Següent (origen, missatge) del node."""
+        origin, msg = json.loads(self.conn.recv_bytes().decode("utf-8"))
+        return origin, msg
+
+    def close(self):
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+
+class _Endpoint:
+    """Part comuna del concentrador i del pont: reenviament i recepció."""
+
+    def __init__(self, bus, address: Optional[str], authkey: bytes):
+        self.bus = bus
+        self.address = address or default_address()
+        self.authkey = authkey
+        self.node = f"{type(self).__name__}-{os.getpid()}"
+        self.peers: List[_Peer] = []
+        self._lock = threading.Lock()
+        self._running = False
+        self.stats = {"sent": 0, "received": 0, "relayed": 0, "errors": 0}
+
+    def _subscribe(self):
+        # Un subscriptor sense filtres: tot el que es publica al procés
+        self.bus.subscribe(self._forward)
+
+    def _forward(self, msg):
+        """Envia als altres nodes els missatges publicats en aquest procés."""
+        if "origin" in msg:
+            return  # ve d'un altre node: ja s'ha retransmès en rebre'l
+        self._send(self.node, msg)
+
+    def _send(self, origin: str, msg, exclude: Optional[_Peer] = None) -> int:
+        with self._lock:
+            peers = [peer for peer in self.peers if peer is not exclude]
+        sent = 0
+        for peer in peers:
+            if peer.send(origin, msg):
+                sent += 1
+            else:
+                self._drop(peer)
+        with self._lock:
+            self.stats["sent"] += sent
+        return sent
+
+    def _drop(self, peer: _Peer):
+        with self._lock:
+            if peer not in self.peers:
+                return
+            self.peers.remove(peer)
+            self.stats["errors"] += 1
+        peer.close()
+        logger.warning(f"Node del bus desconnectat: {peer.name}")
+
+    def _receive(self, peer: _Peer):
+        """Publica al bus local els missatges que arriben d'un node."""
+        while self._running:
+            try:
+                origin, msg = peer.recv()
+            except (OSError, EOFError):
+                break
+            except ValueError as e:
+                logger.warning(f"Missatge il·legible de {peer.name}: {e}")
+                continue
+            msg["origin"] = origin
+            with self._lock:
+                self.stats["received"] += 1
+            self._relay(peer, origin, msg)
+            self.bus.publish(msg)
+        if self._running:
+            self._drop(peer)
+
+    def _relay(self, peer: _Peer, origin: str, msg):
+        """Al pont no cal retransmetre res; el concentrador ho sobreescriu."""
+
+    def get_stats(self) -> dict:
+        """Retorna els nodes connectats i els missatges enviats i rebuts."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["peers"] = len(self.peers)
+        stats["node"] = self.node
+        return stats
+
+    def stop(self):
+        """Tanca totes les connexions amb els altres nodes."""
+        self._running = False
+        with self._lock:
+            peers, self.peers = self.peers, []
+        for peer in peers:
+            peer.close()
+
+
+class BusHub(_Endpoint):
+    """Concentrador: accepta nodes i retransmet els missatges entre ells."""
+
+    def __init__(self, bus, address: Optional[str] = None, authkey=None):
+        """
+        Args:
+            bus: MessageBus local d'aquest procés
+            address: Camí del socket (per defecte `default_address()`)
+            authkey: Clau per autenticar els nodes (per defecte la de
+                `MYADVENTURES_BUS_KEY` o una de nova i aleatòria)
+        """
+        address = address or default_address()
+        if authkey is None:
+            value = os.environ.get(AUTHKEY_ENV)
+            authkey = bytes.fromhex(value) if value else secrets.token_bytes(32)
+        super().__init__(bus, address, authkey)
+        self._listener = None
+        self._thread = None
+
+    def start(self):
+        """Comença a escoltar connexions de nodes."""
+        if self._running:
+            return
+        if os.path.exists(self.address):
+            # Socket d'una execució anterior que no es va tancar bé
+            os.unlink(self.address)
+        self._listener = Listener(self.address, authkey=self.authkey)
+        _store_authkey(self.address, self.authkey)
+        self._running = True
+        self._subscribe()
+        self._thread = threading.Thread(target=self._accept, name="BusHub", daemon=True)
+        self._thread.start()
+        logger.info(f"Bus compartit escoltant a {self.address}")
+
+    def _accept(self):
+        while self._running:
+            try:
+                conn = self._listener.accept()
+            except AuthenticationError:
+                logger.warning("Connexió rebutjada al bus compartit: clau incorrecta")
+                continue
+            except (OSError, EOFError) as e:
+                if self._running:
+                    logger.error(f"Error acceptant un node del bus: {e}")
+                    continue
+                break
+            if not self._running:
+                conn.close()
+                break
+            peer = _Peer(conn, f"node-{len(self.peers) + 1}")
+            with self._lock:
+                self.peers.append(peer)
+            threading.Thread(
+                target=self._receive,
+                args=(peer,),
+                name=f"BusHub-{peer.name}",
+                daemon=True,
+            ).start()
+            logger.info(f"Node connectat al bus compartit: {peer.name}")
+
+    def _relay(self, peer: _Peer, origin: str, msg):
+        sent = self._send(origin, msg, exclude=peer)
+        with self._lock:
+            self.stats["relayed"] += sent
+
+    def _wake_listener(self):
+        """Desbloqueja l'accept() del fil d'escolta."""
+        if hasattr(socket, "AF_UNIX") and not self.address.startswith("\\\\"):
+            # Connexió crua, sense l'intercanvi de claus: si el fil ja ha
+            # acabat no queda ningú que respongui i un Client s'encallaria
+            with socket.socket(socket.AF_UNIX) as sock:
+                sock.connect(self.address)
+        else:
+            Client(self.address, authkey=self.authkey).close()
+
+    def stop(self):
+        """Deixa d'acceptar nodes, els desconnecta i esborra el socket."""
+        if not self._running:
+            return
+        super().stop()
+        try:
+            self._wake_listener()
+        except OSError:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self._listener.close()
+        try:
+            os.unlink(key_path(self.address))
+        except OSError:
+            pass
+
+
+class BusBridge(_Endpoint):
+    """Pont d'un procés cap al concentrador del bus compartit."""
+
+    def __init__(self, bus, address: Optional[str] = None, authkey=None):
+        """
+        Args:
+            bus: MessageBus local d'aquest procés
+            address: Camí del socket del concentrador
+            authkey: Clau del concentrador (per defecte `load_authkey`)
+        """
+        super().__init__(bus, address, authkey)
+
+    def start(self):
+        """Es connecta al concentrador (llança OSError si no hi és)."""
+        if self._running:
+            return
+        if self.authkey is None:
+            self.authkey = load_authkey(self.address)
+            if self.authkey is None:
+                raise ConnectionRefusedError(
+                    f"No hi ha clau per al bus {self.address}: "
+                    f"cal el concentrador en marxa o {AUTHKEY_ENV}"
+                )
+        peer = _Peer(Client(self.address, authkey=self.authkey), "hub")
+        self.peers.append(peer)
+        self._running = True
+        self._subscribe()
+        threading.Thread(
+            target=self._receive, args=(peer,), name="BusBridge", daemon=True
+        ).start()
+        logger.info(f"Connectat al bus compartit de {self.address}")
@@ -93,13 +93,17 @@ class ChatCommandHandler:
         return False
 
 
-def create_default_handlers(agents_dict, mc, mc_lock=None, system_flags=None):
+def create_default_handlers(
+    agents_dict, mc, mc_lock=None, system_flags=None, message_bus=None, bus_hub=None
+):
     """Crea els gestors de comandes per defecte.
 
     Args:
         agents_dict: Diccionari d'agents
         mc: Instància de Minecraft
         mc_lock: Lock per sincronitzar accés al socket de Minecraft
+        message_bus: Bus de missatges del procés (per als workflows compartits)
+        bus_hub: Concentrador del bus compartit, si n'hi ha
     """
     handler = ChatCommandHandler()
 
@@ -196,7 +200,7 @@ def create_default_handlers(agents_dict, mc, mc_lock=None, system_flags=None):
                 system_flags["workflow_mode"] = False
 
             # Assegurar que el thread estigui actiu
-            if not explorer._thread or not explorer._thread.is_alive():
+            if not explorer.is_loop_active():
                 explorer.start_loop()
 
             explorer.map_sent = False
@@ -227,7 +231,7 @@ def create_default_handlers(agents_dict, mc, mc_lock=None, system_flags=None):
                 system_flags["workflow_mode"] = False
 
             # Assegurar que el thread estigui actiu
-            if not builder._thread or not builder._thread.is_alive():
+            if not builder.is_loop_active():
                 builder.start_loop()
 
             builder.set_state(AgentState.RUNNING, reason="User command (manual)")
@@ -260,7 +264,7 @@ def create_default_handlers(agents_dict, mc, mc_lock=None, system_flags=None):
                 system_flags["workflow_mode"] = False
 
             # Assegurar que el thread estigui actiu
-            if not miner._thread or not miner._thread.is_alive():
+            if not miner.is_loop_active():
                 miner.start_loop()
 
             miner.start()
@@ -283,7 +287,12 @@ def create_default_handlers(agents_dict, mc, mc_lock=None, system_flags=None):
 
     # Workflow command - genera un nou procés
     def workflow_run(args):
-        """Executa el flux complet en un NOU PROCÉS: Explorer -> Builder -> Miner -> Build"""
+        """Executa el flux complet: Explorer -> Builder -> Miner -> Build
+
+        Si hi ha processos treballadors connectats al bus compartit, el
+        workflow s'hi envia com a missatge (sense arrencar res); si no, es
+        llança en un NOU PROCÉS.
+        """
         import subprocess
         import sys
 
@@ -292,21 +301,20 @@ def create_default_handlers(agents_dict, mc, mc_lock=None, system_flags=None):
         _safe_post("[Workflow] PREPARANT NOU PROCÉS DE TREBALL...")
 
         # Obtenir configuració actual del procès base
-        cmd_args = [sys.executable, "run.py", "--workflow"]
+        options = {}
 
         # Estratègia del MinerBot
         miner = agents_dict.get("MinerBot")
         if miner and miner.strategies:
-            current_strat = miner.strategies[miner.current_strategy_index]
-            strat_name = current_strat.__class__.__name__
-            cmd_args.extend(["--miner-strategy", strat_name])
+            strat_name = miner.strategies.names[miner.current_strategy_index]
+            options["miner_strategy"] = strat_name
             _safe_post(f" -> Heretant estratègia mineria: {strat_name}")
 
         # Pla    del BuilderBot
         builder = agents_dict.get("BuilderBot")
         if builder and builder.current_plan_name:
             plan_name = builder.current_plan_name
-            cmd_args.extend(["--builder-plan", plan_name])
+            options["builder_plan"] = plan_name
             _safe_post(f" -> Heretant pla construcció: {plan_name}")
 
         # Rang de l'ExplorerBot
@@ -314,11 +322,55 @@ def create_default_handlers(agents_dict, mc, mc_lock=None, system_flags=None):
         if explorer:
             # Obtenim el rang actual directament de les propietats de l'agent
             current_range = explorer.exploration_ranges[explorer.current_range_index]
-            cmd_args.extend(["--explorer-range", str(current_range)])
+            options["explorer_range"] = current_range
             _safe_post(f" -> Heretant rang exploració: {current_range}")
 
         _safe_post("=" * 40)
 
+        # Treballadors ja connectats al bus compartit: sense arrencada en fred
+        if bus_hub is not None and bus_hub.get_stats()["peers"] > 0:
+            from utils.communication import MessageProtocol
+
+            message_bus.publish(
+                MessageProtocol.create_message("workflow.reset", "System", "all", {})
+            )
+            message_bus.publish(
+                MessageProtocol.create_message(
+                    "workflow.start.v1", "System", "all", options
+                )
+            )
+            _safe_post("[Workflow] ENVIAT ALS PROCESSOS CONNECTATS AL BUS.")
+            return
+
+        cmd_args = [sys.executable, "run.py", "--workflow"]
+        if "miner_strategy" in options:
+            cmd_args.extend(["--miner-strategy", options["miner_strategy"]])
+        if "builder_plan" in options:
+            cmd_args.extend(["--builder-plan", options["builder_plan"]])
+        if "explorer_range" in options:
+            cmd_args.extend(["--explorer-range", str(options["explorer_range"])])
+
+        # Pool de connexions
+        if system_flags and system_flags.get("pool_size"):
+            cmd_args.extend(["--pool-size", str(system_flags["pool_size"])])
+
+        # Nivell de visualització
+        if system_flags and system_flags.get("visuals"):
+            cmd_args.extend(["--visuals", system_flags["visuals"]])
+
+        # Treballadors de mineria en paral·lel
+        if system_flags and system_flags.get("miner_workers", 1) > 1:
+            cmd_args.extend(["--miner-workers", str(system_flags["miner_workers"])])
+
+        # Bus compartit: el fill s'hi connecta i no duplica els agents d'aquí
+        if system_flags and system_flags.get("bus_address"):
+            cmd_args.extend(["--bus-address", system_flags["bus_address"]])
+            if agents_dict:
+                from utils.discovery import discover_agents
+
+                others = [name for name in discover_agents() if name not in agents_dict]
+                cmd_args.extend(["--agents", ",".join(others)])
+
         try:
             # llançar el procés de forma independent (sense esperar que acabi)
             subprocess.Popen(cmd_args)
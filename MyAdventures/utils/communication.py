@@ -1,7 +1,154 @@
 # Comunicació asíncrona basada en missatges JSON
+import itertools
 import logging
+import threading
+import time
+from collections import deque
 from datetime import datetime, timezone
 
+# Identificadors de missatge: enter monòton compartit per tot el procés
+_sequence = itertools.count(1)
+
+
+# Missatges de control i d'estat: cap cua plena els descarta (només la
+# telemetria d'alta freqüència, com el progrés build.v1, es pot perdre)
+CONTROL_TYPES = (
+    "workflow.reset",
+    "workflow.start.v1",
+    "map.v1",
+    "plan.selected.v1",
+    "materials.requirements.v1",
+    "inventory.v1",
+    "build.checkpoint.v1",
+    "build.complete.v1",
+)
+
+
+def _iso_timestamp(ns: int) -> str:
+    """Format ISO 8601 (UTC, acabat en Z) d'un temps en nanosegons."""
+    return (
+        datetime.fromtimestamp(ns / 1e9, timezone.utc)
+        .isoformat()
+        .replace("+00:00", "Z")
+    )
+
+
+class Message:
+    """
+    Missatge del protocol amb camps fixos (`__slots__`).
+
+    Crear-lo no formata cap data ni genera cap UUID: l'identificador és un
+    enter seqüencial i el temps es guarda en nanosegons (`timestamp_ns`).
+    La cadena ISO de `timestamp` només es calcula quan algú la llegeix
+    (en registrar-lo o serialitzar-lo amb `to_dict`).
+
+    S'hi pot accedir com a un diccionari (`msg["payload"]`, `msg.get(...)`,
+    `"id" in msg`), de manera que els agents no han de canviar.
+    """
+
+    FIELDS = ("type", "source", "target", "timestamp", "payload", "status", "context")
+
+    __slots__ = (
+        "type",
+        "source",
+        "target",
+        "payload",
+        "status",
+        "context",
+        "id",
+        "timestamp_ns",
+        "_timestamp",
+        "_extra",
+    )
+
+    def __init__(
+        self,
+        msg_type: str,
+        source: str,
+        target: str,
+        payload: dict,
+        status: str = "SUCCESS",
+        context: dict = None,
+    ):
+        self.type = msg_type
+        self.source = source
+        self.target = target
+        self.payload = payload
+        self.status = status
+        self.context = context or {}
+        self.id = next(_sequence)
+        self.timestamp_ns = time.time_ns()
+        self._timestamp = None
+        self._extra = None
+
+    @property
+    def timestamp(self) -> str:
+        """Temps de creació en format ISO 8601, calculat el primer cop."""
+        if self._timestamp is None:
+            self._timestamp = _iso_timestamp(self.timestamp_ns)
+        return self._timestamp
+
+    @timestamp.setter
+    def timestamp(self, value: str):
+        self._timestamp = value
+
+    def _keys(self):
+        keys = self.FIELDS + ("id",)
+        return keys + tuple(self._extra) if self._extra else keys
+
+    def __getitem__(self, key):
+        if key in self.FIELDS or key == "id":
+            return getattr(self, key)
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.FIELDS or key == "id":
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __contains__(self, key) -> bool:
+        if key in self.FIELDS or key == "id":
+            return True
+        return bool(self._extra) and key in self._extra
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self._keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self._keys()]
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def to_dict(self) -> dict:
+        """Còpia en diccionari, amb el temps en ISO (per serialitzar)."""
+        return dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, (Message, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    # Igualtat per valor i mutable, com un dict: no es pot fer servir de clau
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Message({self.to_dict()!r})"
+
 
 class MessageProtocol:
     """
@@ -16,7 +163,7 @@ class MessageProtocol:
         payload: dict,
         status: str = "SUCCESS",
         context: dict = None,
-    ) -> dict:
+    ) -> Message:
         """
         Crea un missatge estructurat seguint el protocol definit.
 
@@ -29,17 +176,9 @@ class MessageProtocol:
             context (dict, opcional): Context addicional. Per defecte None.
 
         Returns:
-            dict: Diccionari amb l'estructura del missatge.
+            Message: Missatge amb l'estructura del protocol (accessible com a dict).
         """
-        return {
-            "type": msg_type,
-            "source": source,
-            "target": target,
-            "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
-            "payload": payload,
-            "status": status,
-            "context": context or {},
-        }
+        return Message(msg_type, source, target, payload, status, context)
 
     @staticmethod
     def validate_message(msg: dict) -> bool:
@@ -52,6 +191,9 @@ class MessageProtocol:
         Returns:
             bool: True si el missatge és vàlid, False sino.
         """
+        if isinstance(msg, Message):
+            # Té tots els camps per construcció
+            return True
         required = [
             "type",
             "source",
@@ -64,92 +206,369 @@ class MessageProtocol:
         return all(k in msg for k in required)
 
 
+class Subscription:
+    """
+    Cua acotada i fils de lliurament propis d'un subscriptor.
+
+    Un subscriptor lent només alenteix la seva pròpia cua. Quan la cua és
+    plena s'aplica la política de contrapressió:
+    - "block": el publicador espera que hi hagi lloc, com a molt
+      `block_timeout` segons; després es descarta el més antic (així un
+      publicador que té un lock que el lliurament necessita no es bloqueja)
+    - "drop_oldest": es descarta el missatge més antic de la cua
+    - "coalesce": un missatge substitueix el pendent amb el mateix
+      (type, source); si no n'hi ha cap, es descarta el més antic
+
+    Els tipus de `keep_types` no es descarten mai: es descarta el missatge
+    descartable més antic i, si no n'hi ha cap, la cua creix per sobre de
+    `queue_size` en lloc de perdre'ls.
+    """
+
+    POLICIES = ("block", "drop_oldest", "coalesce")
+
+    def __init__(
+        self,
+        callback,
+        deliver,
+        queue_size=1024,
+        workers=1,
+        policy="block",
+        types=None,
+        target=None,
+        coalesce_types=(),
+        block_timeout=1.0,
+        keep_types=(),
+    ):
+        """
+        Args:
+            callback (callable): Funció del subscriptor.
+            deliver (callable): Funció que fa el lliurament (callback, msg).
+            queue_size (int): Missatges pendents màxims.
+            workers (int): Fils que lliuren missatges a aquest subscriptor.
+            policy (str): Política quan la cua és plena.
+            block_timeout (float): Espera màxima del publicador amb "block".
+            types (iterable, opcional): Tipus de missatge que vol rebre (None: tots).
+            target (str, opcional): Destinatari que representa (None: qualsevol).
+            coalesce_types (collection): Tipus que sempre es fusionen per
+                (type, source), sigui quina sigui la política.
+            keep_types (collection): Tipus que mai es descarten.
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Política de contrapressió desconeguda: {policy}")
+        self.callback = callback
+        self.types = frozenset(types) if types is not None else None
+        self.target = target
+        self.coalesce_types = coalesce_types
+        self.keep_types = keep_types
+        self.name = self._describe(callback)
+        self.queue_size = queue_size
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self._deliver = deliver
+        self._items = deque()  # Entrades [temps d'encuat, missatge, clau]
+        self._latest = {}  # (type, source) -> entrada pendent que es pot fusionar
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._running = True
+        self.stats = {
+            "delivered": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "block_timeouts": 0,
+            "overflow": 0,
+            "max_depth": 0,
+            "latency_total": 0.0,
+            "latency_max": 0.0,
+        }
+        self._threads = [
+            threading.Thread(
+                target=self._worker, name=f"MessageBus-{self.name}-{i}", daemon=True
+            )
+            for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @staticmethod
+    def _describe(callback):
+        owner = getattr(callback, "__self__", None)
+        return getattr(owner, "name", None) or getattr(
+            callback, "__qualname__", repr(callback)
+        )
+
+    def _pop_oldest(self):
+        entry = self._items.popleft()
+        if self._latest.get(entry[2]) is entry:
+            del self._latest[entry[2]]
+        return entry
+
+    def _drop_oldest(self) -> bool:
+        """Descarta el missatge pendent més antic que no sigui de `keep_types`."""
+        for index, entry in enumerate(self._items):
+            if entry[2][0] not in self.keep_types:
+                break
+        else:
+            return False
+        del self._items[index]
+        if self._latest.get(entry[2]) is entry:
+            del self._latest[entry[2]]
+        self.stats["dropped"] += 1
+        return True
+
+    def offer(self, msg) -> bool:
+        """
+        Encua un missatge aplicant la política de contrapressió.
+
+        Returns:
+            bool: False si el subscriptor ja està aturat
+        """
+        key = (msg.get("type"), msg.get("source"))
+        coalesce = self.policy == "coalesce" or key[0] in self.coalesce_types
+        with self._cond:
+            if not self._running:
+                return False
+
+            if coalesce and key in self._latest:
+                # Es queda el valor més recent, a la posició del pendent
+                self._latest[key][1] = msg
+                self.stats["coalesced"] += 1
+                return True
+
+            # Un fil de lliurament que publica a la seva pròpia cua no pot esperar-se
+            own_thread = threading.current_thread() in self._threads
+            deadline = time.monotonic() + self.block_timeout
+            while len(self._items) >= self.queue_size:
+                if self.policy == "block" and own_thread:
+                    break
+                if self.policy == "block":
+                    remaining = deadline - time.monotonic()
+                    if remaining > 0:
+                        self._cond.wait(remaining)
+                        if not self._running:
+                            return False
+                        continue
+                    # Possible interbloqueig: el lliurament no avança
+                    self.stats["block_timeouts"] += 1
+                    logging.getLogger("MessageBus").warning(
+                        f"Cua de {self.name} plena més de {self.block_timeout}s"
+                    )
+                if self._drop_oldest():
+                    continue
+                if key[0] not in self.keep_types:
+                    # Només queden missatges que no es poden perdre
+                    self.stats["dropped"] += 1
+                    return True
+                self.stats["overflow"] += 1
+                break
+
+            entry = [time.monotonic(), msg, key]
+            self._items.append(entry)
+            if coalesce:
+                self._latest[key] = entry
+            self.stats["max_depth"] = max(self.stats["max_depth"], len(self._items))
+            self._cond.notify_all()
+        return True
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._items or not self._running)
+                if not self._items:
+                    return
+                queued_at, msg, _ = self._pop_oldest()
+                self._inflight += 1
+                # Hi ha lloc: despertem els publicadors bloquejats
+                self._cond.notify_all()
+
+            self._deliver(self.callback, msg)
+
+            latency = time.monotonic() - queued_at
+            with self._cond:
+                self._inflight -= 1
+                self.stats["delivered"] += 1
+                self.stats["latency_total"] += latency
+                self.stats["latency_max"] = max(self.stats["latency_max"], latency)
+                self._cond.notify_all()
+
+    def join(self, timeout=None) -> bool:
+        """Espera que la cua quedi buida i sense lliuraments en curs."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._items and not self._inflight, timeout=timeout
+            )
+
+    def stop(self):
+        """Atura els fils de lliurament (els pendents es descarten)."""
+        with self._cond:
+            self._running = False
+            self._items.clear()
+            self._latest.clear()
+            self._cond.notify_all()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=2)
+
+    def get_stats(self) -> dict:
+        """Retorna profunditat de la cua i latència de lliurament."""
+        with self._cond:
+            stats = dict(self.stats)
+            stats["name"] = self.name
+            stats["policy"] = self.policy
+            stats["depth"] = len(self._items)
+        delivered = stats["delivered"]
+        total = stats.pop("latency_total")
+        stats["latency_avg"] = total / delivered if delivered else 0.0
+        return stats
+
+
 class MessageBus:
     """
     Bus de missatges asíncron (Producer-Consumer) amb cues i validació
     Implementa:
-    - processament asíncron non-blocking (amb Queue)
+    - encaminament per tipus i destinatari amb un índex (sense broadcast)
+    - una cua acotada i fils de lliurament per subscriptor (Subscription)
+    - polítiques de contrapressió configurables (block, drop_oldest, coalesce)
     - validació de missatges
-    - traçabilitat completa
+    - traçabilitat completa i mètriques de cua i latència
     """
 
-    def __init__(self):
-        """
-        Inicialitza el bus amb una cua i un thread de treball en background.
+    # Combinacions (type, target) encaminades que es guarden
+    ROUTE_CACHE_SIZE = 1024
+
+    def __init__(
+        self,
+        queue_size=1024,
+        workers=1,
+        policy="block",
+        coalesce_types=(),
+        keep_types=CONTROL_TYPES,
+    ):
         """
-        import queue
-        import threading
+        Inicialitza el bus amb la configuració per defecte dels subscriptors.
 
+        Args:
+            queue_size (int): Missatges pendents màxims per subscriptor.
+            workers (int): Fils de lliurament per subscriptor.
+            policy (str): Política de contrapressió per defecte.
+            coalesce_types (iterable): Tipus de missatge dels quals només cal
+                l'últim valor per (type, source), com el progrés.
+            keep_types (iterable): Tipus de missatge que cap cua descarta.
+        """
         self.subscribers = []
         self.log = logging.getLogger("MessageBus")
-
-        # Cua thread-safe per a comunicació asíncrona
-        self.queue = queue.Queue()
+        self.queue_size = queue_size
+        self.workers = workers
+        self.policy = policy
+        self.coalesce_types = set(coalesce_types)
+        self.keep_types = frozenset(keep_types)
         self.running = True
-
-        # Thread worker que processa els missatges
-        self._worker_thread = threading.Thread(
-            target=self._process_queue, name="MessageBus-Worker", daemon=True
-        )
-        self._worker_thread.start()
+        self.published = 0
+        self.unrouted = 0
+        self._lock = threading.Lock()
+        # Índex tipus -> destinatari -> subscripcions (None: qualsevol)
+        self._routes = {}
+        self._route_cache = {}
         self.log.info("Bus de missatges asíncron iniciat.")
 
-    def subscribe(self, callback):
+    def subscribe(
+        self,
+        callback,
+        types=None,
+        target=None,
+        queue_size=None,
+        workers=None,
+        policy=None,
+    ):
         """
         Afegeix un callback a la llista de subscriptors.
 
+        Un subscriptor amb `target` rep els missatges adreçats a ell i els
+        adreçats a "all" (o sense destinatari).
+
         Args:
             callback (callable): Funció a cridar quan es rep un missatge.
+            types (iterable, opcional): Tipus de missatge d'interès (None: tots).
+            target (str, opcional): Nom del destinatari (None: tots els missatges).
+            queue_size (int, opcional): Mida de la seva cua.
+            workers (int, opcional): Fils que li lliuren missatges.
+            policy (str, opcional): Política de contrapressió de la seva cua.
         """
-        if callback not in self.subscribers:
-            self.subscribers.append(callback)
-            self.log.debug("Subscriptor registrat al MessageBus")
+        with self._lock:
+            if any(sub.callback == callback for sub in self.subscribers):
+                return
+            subscription = Subscription(
+                callback,
+                self._deliver_with_retry,
+                queue_size=queue_size or self.queue_size,
+                workers=workers or self.workers,
+                policy=policy or self.policy,
+                types=types,
+                target=target,
+                coalesce_types=self.coalesce_types,
+                keep_types=self.keep_types,
+            )
+            self.subscribers.append(subscription)
+            for msg_type in subscription.types or (None,):
+                by_target = self._routes.setdefault(msg_type, {})
+                by_target.setdefault(target, []).append(subscription)
+            self._route_cache.clear()
+        self.log.debug("Subscriptor registrat al MessageBus")
 
     def publish(self, msg: dict):
         """
-        Envia un missatge a la cua de processament (no bloquejant).
+        Envia un missatge a la cua de cada subscriptor.
 
         Realitza validació i garanteix traçabilitat abans d'encuar.
-        L'emissor recupera el control immediatament després d'encuar (asíncron).
+        L'emissor recupera el control immediatament després d'encuar (asíncron),
+        excepte si la cua d'un subscriptor amb política "block" és plena.
 
         Args:
-            msg (dict): Missatge a enviar.
+            msg (Message | dict): Missatge a enviar.
         """
-        import uuid
-
         # validacio de format
         if not MessageProtocol.validate_message(msg):
             self.log.error(f"MessageBus REBUTJAT: Format invàlid: {msg}")
             return
 
-        # si no en te li donem id unic
-        if "id" not in msg:
-            msg["id"] = str(uuid.uuid4())
+        # si no en te li donem id unic (els Message ja el porten)
+        if not isinstance(msg, Message) and "id" not in msg:
+            msg["id"] = next(_sequence)
 
-        # encuar asíncron
-        self.queue.put(msg)
-
-    def _process_queue(self):
-        """
-        bucle infinit del worker que processa missatges de la cua
-        """
-        while self.running:
-            try:
-                # bloqueja fins que hi ha un missatge
-                msg = self.queue.get(timeout=1.0)
+        with self._lock:
+            subscribers = self._route(msg.get("type"), msg.get("target"))
+            self.published += 1
+            if not subscribers:
+                self.unrouted += 1
 
-                # log de processament
-                # self.log.debug(
+        # encuar asíncron només als subscriptors interessats
+        for subscription in subscribers:
+            subscription.offer(msg)
 
-                # broadcast a tots els subscriptors
-                for callback in self.subscribers:
-                    self._deliver_with_retry(callback, msg)
+    def set_coalescable(self, *msg_types):
+        """Marca tipus de missatge com a fusionables a totes les cues."""
+        self.coalesce_types.update(msg_types)
 
-                self.queue.task_done()
-
-            except Exception:
-                # timeout de la cua (normal) o error inesperat
-                continue
+    def _route(self, msg_type, target):
+        """Subscripcions que han de rebre un (type, target). Cal tenir el lock."""
+        key = (msg_type, target)
+        routed = self._route_cache.get(key)
+        if routed is None:
+            routed = []
+            for by_target in (self._routes.get(msg_type), self._routes.get(None)):
+                if not by_target:
+                    continue
+                if target in (None, "", "all"):
+                    for subscriptions in by_target.values():
+                        routed.extend(subscriptions)
+                else:
+                    routed.extend(by_target.get(target, ()))
+                    routed.extend(by_target.get(None, ()))
+            routed = tuple(routed)
+            if len(self._route_cache) >= self.ROUTE_CACHE_SIZE:
+                # Destinataris arbitraris no poden fer créixer la memòria cau
+                self._route_cache.clear()
+            self._route_cache[key] = routed
+        return routed
 
     def _deliver_with_retry(self, callback, msg):
         """
@@ -165,9 +584,71 @@ class MessageBus:
                 f"ERROR: Error entregant missatge {msg.get('id')} a {callback}: {e}"
             )
 
+    def join(self, timeout=None) -> bool:
+        """Espera que tots els subscriptors hagin processat els seus missatges."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for subscription in list(self.subscribers):
+            remaining = None
+            if deadline is not None:
+                remaining = max(0.0, deadline - time.monotonic())
+            if not subscription.join(remaining):
+                return False
+        return True
+
+    def get_stats(self) -> dict:
+        """Retorna les mètriques del bus i de cada subscriptor."""
+        with self._lock:
+            subscribers = list(self.subscribers)
+            published = self.published
+            unrouted = self.unrouted
+        return {
+            "published": published,
+            "unrouted": unrouted,
+            "subscribers": [sub.get_stats() for sub in subscribers],
+        }
+
     def stop(self):
         """Atura el bus."""
         self.running = False
-        if self._worker_thread.is_alive():
-            self._worker_thread.join(timeout=2)
+        for subscription in list(self.subscribers):
+            subscription.stop()
         self.log.info("MessageBus aturat.")
+
+
+class RateLimiter:
+    """
+    Limita la freqüència d'una acció repetitiva (p. ex. publicar progrés).
+
+    Deixa passar com a molt una acció cada `1 / rate` segons; `rate` 0 o
+    None la deixa passar sempre.
+    """
+
+    def __init__(self, rate=5.0, clock=time.monotonic):
+        """
+        Args:
+            rate (float): Accions per segon permeses.
+            clock (callable): Funció de temps (injectable per a proves).
+        """
+        self.rate = rate
+        self._clock = clock
+        self._last = None
+        self.suppressed = 0
+
+    def allow(self, force=False) -> bool:
+        """
+        Indica si l'acció es pot fer ara i, si és així, en registra l'instant.
+
+        Args:
+            force (bool): Deixar-la passar igualment (p. ex. el valor final).
+        """
+        now = self._clock()
+        if (
+            force
+            or not self.rate
+            or self._last is None
+            or now - self._last >= 1.0 / self.rate
+        ):
+            self._last = now
+            return True
+        self.suppressed += 1
+        return False
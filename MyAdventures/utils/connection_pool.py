@@ -0,0 +1,242 @@
+"""
+Pool de connexions a l'endpoint de RaspberryJuice.
+
+Cada agent demana una connexió pròpia (lease) amb el seu propi lock, de
+manera que els agents ja no es serialitzen darrere d'un únic `mc_lock`.
+Si hi ha més agents que connexions, les connexions es comparteixen i el
+temps d'espera per adquirir-ne el lock queda registrat.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from mcpi.connection import RequestError
+
+logger = logging.getLogger(__name__)
+
+
+class TimedLock:
+    """RLock que registra quant de temps s'espera per adquirir-lo."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._stats_lock = threading.Lock()
+        self.acquisitions = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        t0 = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        waited = time.perf_counter() - t0
+        if acquired:
+            with self._stats_lock:
+                self.acquisitions += 1
+                self.wait_total += waited
+                if waited > self.wait_max:
+                    self.wait_max = waited
+        return acquired
+
+    def release(self) -> None:
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    def get_stats(self) -> Dict:
+        """Retorna el nombre d'adquisicions i el temps d'espera (total i màxim)."""
+        with self._stats_lock:
+            return {
+                "acquisitions": self.acquisitions,
+                "lock_wait_total": self.wait_total,
+                "lock_wait_max": self.wait_max,
+            }
+
+
+class PooledConnection:
+    """Una connexió del pool amb el seu lock i els agents que la tenen."""
+
+    def __init__(self, index: int, mc, lock: TimedLock):
+        self.index = index
+        self.mc = mc
+        self.lock = lock
+        self.owners = set()
+        self.healthy = True
+        self.reconnects = 0
+
+
+class ConnectionPool:
+    """
+    Pool de N connexions de Minecraft amb lease per agent i health checks.
+
+    Args:
+        size: Nombre de connexions obertes
+        address: Adreça del servidor
+        port: Port del servidor
+        factory: Funció (address, port) -> Minecraft (per defecte Minecraft.create)
+    """
+
+    def __init__(
+        self,
+        size: int = 4,
+        address: str = "localhost",
+        port: int = 4711,
+        factory: Optional[Callable] = None,
+    ):
+        if size < 1:
+            raise ValueError("El pool necessita almenys una connexió")
+
+        if factory is None:
+            from mcpi.minecraft import Minecraft
+
+            factory = Minecraft.create
+
+        self.address = address
+        self.port = port
+        self._lock = threading.Lock()
+        self._leases: Dict[str, PooledConnection] = {}
+        self._health_thread = None
+        self._stop_event = threading.Event()
+        self.lease_wait_total = 0.0
+        self.lease_wait_max = 0.0
+
+        self.connections = [
+            PooledConnection(i, factory(address, port), TimedLock())
+            for i in range(size)
+        ]
+        logger.info(f"Pool de {size} connexions obert a {address}:{port}")
+
+    def lease(self, owner: str) -> Tuple[object, TimedLock]:
+        """
+        Assigna una connexió a `owner` (o retorna la que ja tenia).
+
+        Es tria la connexió sana amb menys propietaris; si n'hi ha més
+        d'un, comparteixen el lock de la connexió.
+
+        Returns:
+            tuple: (instància de Minecraft, lock de la connexió)
+        """
+        t0 = time.perf_counter()
+        with self._lock:
+            slot = self._leases.get(owner)
+            if slot is None:
+                candidates = [c for c in self.connections if c.healthy] or self.connections
+                slot = min(candidates, key=lambda c: len(c.owners))
+                slot.owners.add(owner)
+                self._leases[owner] = slot
+                logger.info(f"Connexió {slot.index} assignada a {owner}")
+            waited = time.perf_counter() - t0
+            self.lease_wait_total += waited
+            self.lease_wait_max = max(self.lease_wait_max, waited)
+        return slot.mc, slot.lock
+
+    def release(self, owner: str) -> None:
+        """Allibera la connexió assignada a `owner`."""
+        with self._lock:
+            slot = self._leases.pop(owner, None)
+            if slot is not None:
+                slot.owners.discard(owner)
+
+    def check_health(self, timeout: float = 2.0) -> None:
+        """
+        Comprova cada connexió amb una petició i reconnecta les que fallen.
+
+        La comprovació no espera indefinidament: si el lock de la connexió
+        no s'allibera en `timeout` segons (un agent penjat a mitja petició)
+        la connexió es marca com a no sana i els nous leases l'eviten; la
+        petició de prova també té un timeout de socket.
+        """
+        for slot in self.connections:
+            if not slot.lock.acquire(timeout=timeout):
+                if slot.healthy:
+                    logger.warning(f"Connexió {slot.index} ocupada massa temps")
+                slot.healthy = False
+                continue
+            try:
+                self._probe(slot, timeout)
+            finally:
+                slot.lock.release()
+
+    def _probe(self, slot: PooledConnection, timeout: float) -> None:
+        sock = getattr(slot.mc.conn, "socket", None)
+        previous = sock.gettimeout() if sock is not None else None
+        try:
+            if sock is not None:
+                sock.settimeout(timeout)
+            slot.mc.conn.sendReceive(b"world.getPlayerIds")
+            slot.healthy = True
+        except RequestError:
+            # El servidor ha respost (Fail): la connexió és viva
+            slot.healthy = True
+        except Exception as e:
+            logger.warning(f"Connexió {slot.index} no respon ({e}). Reconnectant...")
+            try:
+                slot.mc.conn.reconnect()
+                slot.reconnects += 1
+                slot.healthy = True
+                logger.info(f"Connexió {slot.index} reconnectada")
+            except Exception as e:
+                slot.healthy = False
+                logger.error(f"No s'ha pogut reconnectar la connexió {slot.index}: {e}")
+            return
+        if sock is not None:
+            sock.settimeout(previous)
+
+    def start_health_checks(self, interval: float = 10.0) -> None:
+        """Inicia un fil que executa check_health cada `interval` segons."""
+        if self._health_thread and self._health_thread.is_alive():
+            return
+
+        def _loop():
+            while not self._stop_event.wait(interval):
+                self.check_health()
+
+        self._stop_event.clear()
+        self._health_thread = threading.Thread(
+            target=_loop, name="ConnectionPool-Health", daemon=True
+        )
+        self._health_thread.start()
+
+    def close(self) -> None:
+        """Atura els health checks i tanca totes les connexions."""
+        self._stop_event.set()
+        if self._health_thread and self._health_thread.is_alive():
+            self._health_thread.join(timeout=2)
+        for slot in self.connections:
+            try:
+                slot.mc.conn.close()
+            except Exception:
+                pass
+        logger.info("Pool de connexions tancat.")
+
+    def get_stats(self) -> Dict:
+        """Retorna l'estat de cada connexió i els temps d'espera de lease i lock."""
+        with self._lock:
+            connections = [
+                {
+                    "index": slot.index,
+                    "owners": sorted(slot.owners),
+                    "healthy": slot.healthy,
+                    "reconnects": slot.reconnects,
+                    **slot.lock.get_stats(),
+                }
+                for slot in self.connections
+            ]
+            # L'espera real dels agents és la del lock de cada connexió
+            return {
+                "size": len(self.connections),
+                "leases": len(self._leases),
+                "lease_wait_total": self.lease_wait_total,
+                "lease_wait_max": self.lease_wait_max,
+                "lock_wait_total": sum(c["lock_wait_total"] for c in connections),
+                "lock_wait_max": max(
+                    (c["lock_wait_max"] for c in connections), default=0.0
+                ),
+                "connections": connections,
+            }
@@ -1,27 +1,167 @@
 """
 Mòdul de descobriment reflexiu per a registre automàtic d'agents i estratègies.
 Utilitza les capacitats de reflexió de Python per descobrir i carregar mòduls dinàmicament.
+
+El resultat de cada descobriment es guarda en un manifest (JSON) juntament
+amb la data de modificació i la mida de cada mòdul del paquet. Mentre cap
+mòdul canviï, els arrencaments següents no tornen a escanejar el paquet:
+retornen un `LazyClassMap` que només importa el mòdul d'una classe el primer
+cop que s'hi accedeix.
 """
 
 import importlib
-import inspect
-import pkgutil
+import importlib.util
+import json
 import logging
+import os
+import threading
+from collections.abc import Mapping, Sequence
 
 logger = logging.getLogger(__name__)
 
+MANIFEST_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ".discovery_cache.json",
+)
+
+_manifest = None  # Contingut del manifest, carregat un sol cop per procés
+_manifest_lock = threading.Lock()
+
+
+class LazyClassMap(Mapping):
+    """Mapa nom -> classe que importa cada mòdul només quan es demana la classe."""
+
+    def __init__(self, modules):
+        """
+        Args:
+            modules: Mapa ordenat de nom de classe a nom complet del mòdul
+        """
+        self._modules = dict(modules)
+        self._classes = {}
+
+    def __getitem__(self, name):
+        cls = self._classes.get(name)
+        if cls is None:
+            module = importlib.import_module(self._modules[name])
+            cls = getattr(module, name)
+            self._classes[name] = cls
+        return cls
 
-def discover_classes(package_name, base_class):
+    def __iter__(self):
+        return iter(self._modules)
+
+    def __len__(self):
+        return len(self._modules)
+
+    def module_of(self, name):
+        """Mòdul on es defineix la classe, sense importar-lo."""
+        return self._modules[name]
+
+    def __repr__(self):
+        return f"LazyClassMap({list(self._modules)})"
+
+
+class LazyInstances(Sequence):
+    """
+    Una instància per classe, en l'ordre de `names`, creada el primer cop que
+    es demana: el mòdul de cada classe només s'importa si s'arriba a fer servir.
     """
-    Descobreix i registra automàticament classes que hereten de base_class.
 
-    Args:
-        package_name: Nom del paquet a escannejar
-        base_class: Classe base que han d'heretar les classes descobertes
+    def __init__(self, classes, names):
+        """
+        Args:
+            classes: Mapa nom -> classe (p. ex. un `LazyClassMap`)
+            names: Noms de les classes, en l'ordre de la seqüència
+        """
+        self._classes = classes
+        self.names = list(names)
+        self._instances = {}
+
+    def __getitem__(self, index):
+        name = self.names[index]
+        instance = self._instances.get(name)
+        if instance is None:
+            instance = self._classes[name]()
+            self._instances[name] = instance
+        return instance
+
+    def __len__(self):
+        return len(self.names)
+
+    def loaded(self):
+        """Instàncies ja creades (sense crear-ne cap de nova)."""
+        return [self._instances[n] for n in self.names if n in self._instances]
+
+
+def _fingerprint(package_name):
+    """Data de modificació i mida de cada mòdul públic del paquet."""
+    spec = importlib.util.find_spec(package_name)
+    files = {}
+    for path in spec.submodule_search_locations or ():
+        for entry in sorted(os.scandir(path), key=lambda e: e.name):
+            if entry.name.startswith("_"):
+                continue
+            if entry.name.endswith(".py"):
+                modname, target = entry.name[:-3], entry.path
+            elif entry.is_dir() and os.path.exists(
+                os.path.join(entry.path, "__init__.py")
+            ):
+                modname = entry.name
+                target = os.path.join(entry.path, "__init__.py")
+            else:
+                continue
+            stat = os.stat(target)
+            files[modname] = [stat.st_mtime_ns, stat.st_size]
+    return files
+
+
+def _load_manifest():
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            try:
+                with open(MANIFEST_PATH, encoding="utf-8") as f:
+                    _manifest = json.load(f)
+            except (OSError, ValueError):
+                _manifest = {}
+        return _manifest
+
+
+def _store_manifest(key, entry):
+    manifest = _load_manifest()
+    with _manifest_lock:
+        manifest[key] = entry
+        tmp = f"{MANIFEST_PATH}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=1)
+            os.replace(tmp, MANIFEST_PATH)
+        except OSError as e:
+            # Sense permisos d'escriptura: simplement no hi haurà memòria cau
+            logger.debug(f"No s'ha pogut desar el manifest de descobriment: {e}")
+
+
+def clear_manifest():
+    """Esborra el manifest de descobriment (el proper arrencament escanejarà)."""
+    global _manifest
+    with _manifest_lock:
+        _manifest = None
+        try:
+            os.remove(MANIFEST_PATH)
+        except OSError:
+            pass
+
+
+def _scan(package_name, base_class):
+    """
+    Importa tots els mòduls del paquet i en recull les subclasses.
 
     Returns:
-        dict: Mapa de noms de classes a objectes de classe
+        tuple: (classes descobertes, cert si s'ha pogut escanejar tot el paquet)
     """
+    import inspect
+    import pkgutil
+
     discovered = {}
 
     try:
@@ -52,7 +192,42 @@ def discover_classes(package_name, base_class):
 
     except Exception as e:
         logger.error(f"No s'ha pogut descobrir classes a {package_name}: {e}")
+        return discovered, False
+
+    return discovered, True
+
+
+def discover_classes(package_name, base_class, use_cache=True):
+    """
+    Descobreix i registra automàticament classes que hereten de base_class.
+
+    Args:
+        package_name: Nom del paquet a escannejar
+        base_class: Classe base que han d'heretar les classes descobertes
+        use_cache: Fer servir (i actualitzar) el manifest de descobriment
+
+    Returns:
+        Mapping: Mapa de noms de classes a objectes de classe
+    """
+    key = f"{package_name}:{base_class.__module__}.{base_class.__qualname__}"
+
+    fingerprint = None
+    if use_cache:
+        try:
+            fingerprint = _fingerprint(package_name)
+        except Exception as e:
+            logger.error(f"No s'ha pogut llegir el paquet {package_name}: {e}")
+        entry = _load_manifest().get(key)
+        if fingerprint and entry and entry.get("files") == fingerprint:
+            logger.debug(f"Descobriment de {package_name} des del manifest")
+            return LazyClassMap(entry["classes"])
+
+    discovered, complete = _scan(package_name, base_class)
 
+    # Només es desa un escaneig complet
+    if fingerprint and complete:
+        classes = {name: cls.__module__ for name, cls in discovered.items()}
+        _store_manifest(key, {"files": fingerprint, "classes": classes})
     return discovered
 
 
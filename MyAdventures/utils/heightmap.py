@@ -0,0 +1,220 @@
+"""
+Mapa d'alçades en bloc i detecció de zones planes.
+
+Llegeix (amb `getHeights`, en mode pipeline i per trossos acotats) totes les
+alçades d'una finestra quadrada al voltant d'un punt i busca totes les finestres
+k x k completament planes. La detecció fa servir imatges integrals (sumes
+acumulades) de les alçades i dels seus quadrats: una finestra és plana quan
+la seva variància és zero, és a dir, quan `n * Σh² - (Σh)² == 0`.
+
+Si NumPy està instal·lat el càlcul és vectoritzat; si no, es fa el mateix
+càlcul en Python pur.
+"""
+
+from contextlib import nullcontext
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy és opcional
+    np = None
+
+# Columnes per petició `getHeights`: acota el temps que es té el lock de la
+# connexió, de manera que els altres agents hi poden accedir entre trossos
+FETCH_CHUNK = 1024
+
+
+class HeightMap:
+    """Alçades d'una finestra rectangular del món, indexades per [fila z][columna x]."""
+
+    def __init__(self, origin_x: int, origin_z: int, width: int, depth: int, heights):
+        """
+        Args:
+            origin_x: Coordenada x de la primera columna
+            origin_z: Coordenada z de la primera fila
+            width: Nombre de columnes (eix x)
+            depth: Nombre de files (eix z)
+            heights: Alçades en ordre de files (z exterior, x interior)
+        """
+        self.origin_x = origin_x
+        self.origin_z = origin_z
+        self.width = width
+        self.depth = depth
+        if np is not None:
+            self.heights = np.asarray(heights, dtype=np.int64).reshape(depth, width)
+        else:
+            self.heights = [
+                list(heights[row * width : (row + 1) * width]) for row in range(depth)
+            ]
+
+    def get(self, x: int, z: int) -> int:
+        """Retorna l'alçada de la columna absoluta (x, z)."""
+        return int(self.heights[z - self.origin_z][x - self.origin_x])
+
+    def window_variance(self, width: int, depth: Optional[int] = None):
+        """
+        Variància de l'alçada de totes les finestres width x depth.
+
+        Args:
+            width: Amplada de la finestra (eix x)
+            depth: Fondària de la finestra (eix z); per defecte igual a `width`
+
+        Returns:
+            Graella [fila][columna] indexada per la cantonada de cada finestra
+            (array de NumPy o llista de llistes)
+        """
+        depth = width if depth is None else depth
+        if np is not None:
+            return _box_variance_numpy(self.heights, width, depth)
+        return _box_variance_python(self.heights, width, depth)
+
+    def find_flat_zones(self, size: int = 7) -> List[Tuple[int, int, int]]:
+        """
+        Trobar totes les finestres size x size amb totes les columnes a la mateixa alçada.
+
+        Args:
+            size: Costat de la finestra quadrada
+
+        Returns:
+            list: Centres (x, z, y) de les finestres planes
+        """
+        if size > self.width or size > self.depth:
+            return []
+        variance = self.window_variance(size)
+        if np is not None:
+            rows, cols = np.nonzero(variance == 0)
+            flat = zip(rows.tolist(), cols.tolist())
+        else:
+            flat = [
+                (r, c)
+                for r, row in enumerate(variance)
+                for c, value in enumerate(row)
+                if value == 0
+            ]
+
+        half = size // 2
+        zones = []
+        for row, col in flat:
+            x = self.origin_x + col + half
+            z = self.origin_z + row + half
+            zones.append((x, z, self.get(x, z)))
+        return zones
+
+
+def _box_variance_numpy(heights, width: int, depth: int):
+    """Versió vectoritzada: variància de caixa amb imatges integrals."""
+    n = width * depth
+    values = heights.astype(np.int64)
+
+    def box_sums(grid):
+        integral = np.zeros((grid.shape[0] + 1, grid.shape[1] + 1), dtype=np.int64)
+        integral[1:, 1:] = grid.cumsum(axis=0).cumsum(axis=1)
+        return (
+            integral[depth:, width:]
+            - integral[:-depth, width:]
+            - integral[depth:, :-width]
+            + integral[:-depth, :-width]
+        )
+
+    total = box_sums(values)
+    squares = box_sums(values * values)
+    return (n * squares - total * total) / float(n * n)
+
+
+def _box_variance_python(heights, width: int, depth: int):
+    """Mateix càlcul que `_box_variance_numpy` en Python pur."""
+    rows, cols = len(heights), len(heights[0])
+    n = width * depth
+
+    def integral(transform):
+        table = [[0] * (cols + 1) for _ in range(rows + 1)]
+        for r in range(rows):
+            running = 0
+            row, above, current = heights[r], table[r], table[r + 1]
+            for c in range(cols):
+                running += transform(row[c])
+                current[c + 1] = above[c + 1] + running
+        return table
+
+    total = integral(lambda h: h)
+    squares = integral(lambda h: h * h)
+
+    def box(table, r, c):
+        return (
+            table[r + depth][c + width]
+            - table[r][c + width]
+            - table[r + depth][c]
+            + table[r][c]
+        )
+
+    variance = []
+    for r in range(rows - depth + 1):
+        line = []
+        for c in range(cols - width + 1):
+            s1 = box(total, r, c)
+            line.append((n * box(squares, r, c) - s1 * s1) / float(n * n))
+        variance.append(line)
+    return variance
+
+
+def fetch_heightmap(
+    mc,
+    center_x: int,
+    center_z: int,
+    radius: int,
+    mc_lock=None,
+    chunk_size: int = FETCH_CHUNK,
+) -> HeightMap:
+    """
+    Llegir totes les alçades d'una finestra quadrada centrada en (center_x, center_z).
+
+    Les columnes es demanen en trossos de `chunk_size`; el lock només es té
+    mentre es llegeix cada tros.
+
+    Args:
+        mc: Instància de Minecraft (ha de tenir `getHeights`)
+        center_x: Coordenada x del centre
+        center_z: Coordenada z del centre
+        radius: Distància del centre a la vora de la finestra
+        mc_lock: Lock de la connexió (opcional)
+        chunk_size: Columnes màximes per petició
+
+    Returns:
+        HeightMap: Mapa d'alçades de (2 * radius + 1)² columnes
+    """
+    origin_x, origin_z = center_x - radius, center_z - radius
+    side = 2 * radius + 1
+    columns = [
+        (origin_x + col, origin_z + row) for row in range(side) for col in range(side)
+    ]
+    heights = []
+    for start in range(0, len(columns), max(1, chunk_size)):
+        with mc_lock or nullcontext():
+            heights.extend(mc.getHeights(columns[start : start + chunk_size]))
+    return HeightMap(origin_x, origin_z, side, side, heights)
+
+
+def nearest_flat_zones(
+    heightmap: HeightMap,
+    center: Tuple[int, int],
+    size: int = 7,
+    limit: Optional[int] = None,
+) -> List[Tuple[int, int, int]]:
+    """
+    Zones planes ordenades per distància al centre.
+
+    Args:
+        heightmap: Mapa d'alçades on buscar
+        center: Punt de referència (x, z)
+        size: Costat de la zona plana
+        limit: Nombre màxim de zones a retornar (None: totes)
+
+    Returns:
+        list: Centres (x, z, y) de les zones planes, la més propera primer
+    """
+    cx, cz = center
+    zones = sorted(
+        heightmap.find_flat_zones(size),
+        key=lambda zone: (zone[0] - cx) ** 2 + (zone[1] - cz) ** 2,
+    )
+    return zones[:limit] if limit is not None else zones
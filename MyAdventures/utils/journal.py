@@ -0,0 +1,319 @@
+"""
+Diari persistent dels missatges del bus.
+
+Els missatges que defineixen l'estat del workflow (zona triada, requeriments,
+inventari, posició de la construcció...) s'afegeixen a un diari en disc, una
+línia JSON per missatge.
+Les escriptures s'agrupen: un fil en segon pla escriu i fa `fsync` per lots,
+de manera que publicar no espera el disc.
+
+El diari es divideix en segments. Quan el segment actual supera
+`segment_size` se'n comença un de nou i, si n'hi ha massa de tancats, es
+compacten: només es conserva l'últim missatge de cada (type, source,
+target) posterior a l'últim `workflow.reset` o `build.complete.v1`.
+
+En arrencar, `replay` torna a publicar aquest estat compactat amb la clau
+"replayed", perquè els agents el recuperin sense repetir tot el cicle
+d'exploració i mineria contra el servidor.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Iterable, List
+
+from utils.communication import MessageProtocol
+
+logger = logging.getLogger(__name__)
+
+# Missatges que reconstrueixen l'estat dels agents
+JOURNAL_TYPES = (
+    "map.v1",
+    "plan.selected.v1",
+    "materials.requirements.v1",
+    "inventory.v1",
+    "build.checkpoint.v1",
+    "workflow.reset",
+    "build.complete.v1",
+)
+
+# Missatges després dels quals no queda res a reprendre
+BARRIER_TYPES = ("workflow.reset", "build.complete.v1")
+
+# Missatges que es reprodueixen al final: quan els requeriments arriben al
+# MinerBot, el seu inventari ja s'ha recuperat i no torna a minar el que tenia
+REPLAY_LAST = ("materials.requirements.v1",)
+
+SEGMENT_SUFFIX = ".journal"
+
+
+class MessageJournal:
+    """Diari de missatges en segments, amb fsync per lots i compactació."""
+
+    def __init__(
+        self,
+        directory: str,
+        types: Iterable[str] = JOURNAL_TYPES,
+        segment_size: int = 1 << 20,
+        max_segments: int = 4,
+        batch_size: int = 64,
+        interval: float = 0.2,
+    ):
+        """
+        Args:
+            directory: Carpeta on es guarden els segments
+            types: Tipus de missatge que s'enregistren
+            segment_size: Bytes a partir dels quals es comença un segment nou
+            max_segments: Segments tancats que provoquen una compactació
+            batch_size: Registres pendents que provoquen una escriptura immediata
+            interval: Segons màxims que un registre espera abans del fsync
+        """
+        self.directory = directory
+        self.types = tuple(types)
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self.batch_size = batch_size
+        self.interval = interval
+        os.makedirs(directory, exist_ok=True)
+
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()  # Escriptura, rotació i compactació
+        self._pending: List[str] = []
+        self._file = None
+        self._segment = None
+        self._running = False
+        self._thread = None
+        self.stats = {
+            "appended": 0,
+            "written": 0,
+            "fsyncs": 0,
+            "rotations": 0,
+            "compactions": 0,
+            "replayed": 0,
+        }
+
+    # ------------------------------------------------------------------ #
+    # Segments
+    # ------------------------------------------------------------------ #
+    def segments(self) -> List[str]:
+        """Camins dels segments del diari, del més antic al més nou."""
+        names = sorted(
+            name for name in os.listdir(self.directory) if name.endswith(SEGMENT_SUFFIX)
+        )
+        return [os.path.join(self.directory, name) for name in names]
+
+    def _segment_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"{index:08d}{SEGMENT_SUFFIX}")
+
+    def _open_segment(self):
+        """Obre un segment nou, posterior a tots els existents."""
+        existing = self.segments()
+        index = 1
+        if existing:
+            index = int(os.path.basename(existing[-1])[: -len(SEGMENT_SUFFIX)]) + 1
+        self._segment = self._segment_path(index)
+        self._file = open(self._segment, "a", encoding="utf-8")
+
+    def _close_segment(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    # ------------------------------------------------------------------ #
+    # Escriptura
+    # ------------------------------------------------------------------ #
+    def attach(self, bus) -> None:
+        """Subscriu el diari al bus per enregistrar-ne els missatges d'estat."""
+        self.start()
+        bus.subscribe(self.append, types=self.types)
+
+    def start(self) -> None:
+        """Obre el segment d'escriptura i el fil de fsync per lots."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        with self._io_lock:
+            self._open_segment()
+        self._thread = threading.Thread(
+            target=self._run, name="MessageJournal", daemon=True
+        )
+        self._thread.start()
+
+    def append(self, msg) -> None:
+        """Afegeix un missatge al lot pendent (sense tocar el disc)."""
+        if msg.get("replayed") or msg.get("type") not in self.types:
+            return
+        record = {
+            "type": msg.get("type"),
+            "source": msg.get("source"),
+            "target": msg.get("target"),
+            "payload": msg.get("payload"),
+            "status": msg.get("status"),
+            "context": msg.get("context"),
+        }
+        line = json.dumps(record, default=str, separators=(",", ":"))
+        with self._cond:
+            self._pending.append(line)
+            self.stats["appended"] += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: len(self._pending) >= self.batch_size
+                    or not self._running,
+                    timeout=self.interval,
+                )
+                running = self._running
+            self.flush()
+            if not running:
+                return
+
+    def flush(self) -> int:
+        """Escriu i fa fsync dels registres pendents. Retorna quants n'ha escrit."""
+        with self._cond:
+            lines, self._pending = self._pending, []
+        if not lines:
+            return 0
+        with self._io_lock:
+            if self._file is None:
+                self._open_segment()
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            rotate = self._file.tell() >= self.segment_size
+        with self._cond:
+            self.stats["written"] += len(lines)
+            self.stats["fsyncs"] += 1
+        if rotate:
+            self.rotate()
+        return len(lines)
+
+    def rotate(self) -> None:
+        """Tanca el segment actual i en comença un de nou."""
+        with self._io_lock:
+            self._close_segment()
+            self._open_segment()
+            sealed = len(self.segments()) - 1
+        with self._cond:
+            self.stats["rotations"] += 1
+        if sealed > self.max_segments:
+            self.compact()
+
+    def close(self) -> None:
+        """Escriu el que queda pendent i tanca el segment actual."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.flush()
+        with self._io_lock:
+            self._close_segment()
+
+    # ------------------------------------------------------------------ #
+    # Lectura, compactació i reproducció
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _read(paths: Iterable[str]) -> List[dict]:
+        records = []
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # Última línia a mig escriure d'una caiguda
+                        logger.warning(f"Registre del diari il·legible a {path}")
+        return records
+
+    @staticmethod
+    def _reduce(records: List[dict]) -> List[dict]:
+        """Estat vigent: l'últim de cada clau després de l'última barrera."""
+        latest = {}
+        for record in records:
+            if record.get("type") in BARRIER_TYPES:
+                latest.clear()
+                continue
+            key = (record.get("type"), record.get("source"), record.get("target"))
+            latest.pop(key, None)  # torna a quedar al final (ordre cronològic)
+            latest[key] = record
+        return list(latest.values())
+
+    def state(self) -> List[dict]:
+        """Registres que reconstrueixen l'estat actual, en ordre cronològic."""
+        self.flush()
+        with self._io_lock:
+            return self._reduce(self._read(self.segments()))
+
+    def compact(self) -> int:
+        """
+        Reescriu els segments tancats amb només l'estat vigent.
+
+        Returns:
+            int: Registres conservats
+        """
+        with self._io_lock:
+            sealed = [path for path in self.segments() if path != self._segment]
+            if not sealed:
+                return 0
+            records = self._reduce(self._read(sealed))
+            tmp = os.path.join(self.directory, "compact.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            # El resultat ocupa el lloc del segment tancat més nou
+            os.replace(tmp, sealed[-1])
+            for path in sealed[:-1]:
+                os.remove(path)
+        with self._cond:
+            self.stats["compactions"] += 1
+        logger.info(
+            f"Diari compactat: {len(sealed)} segments -> {len(records)} registres"
+        )
+        return len(records)
+
+    def replay(self, bus) -> int:
+        """
+        Torna a publicar al bus l'estat enregistrat.
+
+        L'ordre és el cronològic, excepte els tipus de `REPLAY_LAST`, que
+        es publiquen després de la resta.
+
+        Returns:
+            int: Missatges reproduïts
+        """
+        records = sorted(self.state(), key=lambda r: r["type"] in REPLAY_LAST)
+        for record in records:
+            msg = MessageProtocol.create_message(
+                record["type"],
+                record["source"],
+                record["target"],
+                record.get("payload") or {},
+                record.get("status") or "SUCCESS",
+                record.get("context"),
+            )
+            msg["replayed"] = True
+            bus.publish(msg)
+        with self._cond:
+            self.stats["replayed"] += len(records)
+        logger.info(f"Diari reproduït: {len(records)} missatges")
+        return len(records)
+
+    def get_stats(self) -> dict:
+        """Retorna els comptadors d'escriptura, rotació i compactació."""
+        with self._cond:
+            stats = dict(self.stats)
+            stats["pending"] = len(self._pending)
+        stats["segments"] = len(self.segments())
+        return stats
+
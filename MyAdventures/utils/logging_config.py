@@ -18,8 +18,16 @@ class StructuredFormatter(logging.Formatter):
         return json.dumps(log_entry)
 
 
-def setup_logging():
-    """Configura logging estructurat per a tots els agents i sistema."""
+LOG_FILE = "minecraft_agents.log"
+
+
+def setup_logging(log_file=LOG_FILE):
+    """
+    Configura logging estructurat per a tots els agents i sistema.
+
+    Args:
+        log_file: Fitxer on s'escriuen els logs en JSON
+    """
     logger = logging.getLogger()
     logger.setLevel(logging.DEBUG)
 
@@ -32,7 +40,7 @@ def setup_logging():
     console_handler.setFormatter(console_formatter)
 
     # Handler per a fitxer amb format estructurat
-    file_handler = logging.FileHandler("minecraft_agents.log")
+    file_handler = logging.FileHandler(log_file)
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(StructuredFormatter())
 
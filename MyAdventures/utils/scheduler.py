@@ -0,0 +1,147 @@
+"""
+Planificador central d'agents.
+
+Substitueix el fil per agent de `BaseAgent.start_loop`: un grup petit de
+fils treballadors executa els cicles percepció-decisió-acció de tots els
+agents segons el seu propi interval de tick. Els agents que no estan en
+RUNNING queden aparcats (no consumeixen cap despertada) fins que un canvi
+d'estat o un missatge els torna a despertar.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from agents.base_agent import AgentState
+
+logger = logging.getLogger(__name__)
+
+
+class AgentScheduler:
+    """Executa els cicles de molts agents amb un nombre fix de fils."""
+
+    def __init__(self, workers: int = 4):
+        """
+        Args:
+            workers: Nombre de fils treballadors (cicles d'agents en paral·lel)
+        """
+        self.workers = workers
+        self._cond = threading.Condition()
+        self._heap = []  # (venciment, seqüència, agent)
+        self._seq = itertools.count()
+        self._intervals: Dict[object, float] = {}
+        self._queued = set()  # Agents amb una entrada vigent al heap
+        self._active = set()  # Agents executant un cicle ara mateix
+        self._threads = []
+        self._running = False
+        self.stats = {"ticks": 0, "wakeups": 0, "parked": 0}
+
+    def add(self, agent, tick_interval: Optional[float] = None) -> None:
+        """Registra un agent (o n'actualitza l'interval) i el desperta."""
+        with self._cond:
+            self._intervals[agent] = tick_interval or agent._tick_interval
+            self._schedule(agent, time.monotonic())
+        agent._scheduler = self
+
+    def remove(self, agent) -> None:
+        """Deixa de planificar un agent."""
+        with self._cond:
+            self._intervals.pop(agent, None)
+            self._queued.discard(agent)
+
+    def is_scheduled(self, agent) -> bool:
+        """Retorna True si l'agent està registrat al planificador."""
+        with self._cond:
+            return agent in self._intervals
+
+    def wake(self, agent) -> None:
+        """Desperta un agent aparcat perquè s'executi com més aviat millor."""
+        with self._cond:
+            if (
+                agent in self._intervals
+                and agent not in self._queued
+                and agent not in self._active
+            ):
+                self.stats["wakeups"] += 1
+                self._schedule(agent, time.monotonic())
+
+    def _schedule(self, agent, due: float) -> None:
+        """Encua l'agent si està RUNNING; si no, queda aparcat. Cal tenir el lock."""
+        if agent.state != AgentState.RUNNING:
+            self.stats["parked"] += 1
+            return
+        heapq.heappush(self._heap, (due, next(self._seq), agent))
+        self._queued.add(agent)
+        self._cond.notify()
+
+    def start(self) -> None:
+        """Inicia els fils treballadors."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker, name=f"AgentScheduler-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Planificador d'agents iniciat amb {self.workers} fils")
+
+    def _next_agent(self):
+        """Espera fins que venci el següent agent. Retorna None en aturar-se."""
+        with self._cond:
+            while self._running:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, _, agent = self._heap[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                if agent not in self._queued:
+                    continue  # Entrada obsoleta d'un agent retirat
+                self._queued.discard(agent)
+                self._active.add(agent)
+                return agent
+            return None
+
+    def _worker(self) -> None:
+        while True:
+            agent = self._next_agent()
+            if agent is None:
+                return
+            try:
+                agent.run_once()
+            except Exception as e:
+                logger.error(f"Error executant el cicle de {agent.name}: {e}")
+            finally:
+                with self._cond:
+                    self._active.discard(agent)
+                    self.stats["ticks"] += 1
+                    interval = self._intervals.get(agent)
+                    if interval is not None:
+                        self._schedule(agent, time.monotonic() + interval)
+
+    def stop(self) -> None:
+        """Atura els fils treballadors i espera que acabin."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+        logger.info("Planificador d'agents aturat.")
+
+    def get_stats(self) -> Dict:
+        """Retorna els comptadors de ticks, despertades i aparcaments."""
+        with self._cond:
+            stats = dict(self.stats)
+            stats["agents"] = len(self._intervals)
+            stats["queued"] = len(self._queued)
+        return stats
@@ -0,0 +1,156 @@
+"""
+Índex de llocs de construcció candidats.
+
+A partir d'un mapa d'alçades avalua totes les parcel·les on cap la planta
+del pla seleccionat i les puntua per planor, marge pla al voltant de la
+planta i distància al jugador. Els millors llocs es guarden en una cua de
+prioritat (heap), de manera que es pot obtenir el millor o, si falla, una
+alternativa immediatament sense tornar a escanejar el terreny.
+"""
+
+import heapq
+import itertools
+import math
+from typing import List, NamedTuple, Optional, Tuple
+
+from utils.heightmap import HeightMap, np
+
+
+class Site(NamedTuple):
+    """Parcel·la candidata: (x, z) és la cantonada on s'ancora el pla."""
+
+    x: int
+    z: int
+    y: int
+    width: int
+    depth: int
+    variance: float
+    distance: float
+    score: float
+
+    def overlaps(self, other: "Site") -> bool:
+        """Cert si les dues parcel·les comparteixen alguna columna."""
+        return (
+            self.x < other.x + other.width
+            and other.x < self.x + self.width
+            and self.z < other.z + other.depth
+            and other.z < self.z + self.depth
+        )
+
+    def to_zone(self) -> dict:
+        """Format de zona del missatge map.v1."""
+        return {"x": self.x, "y": self.y, "z": self.z}
+
+
+class SiteIndex:
+    """Cua de prioritat de llocs de construcció (puntuació més baixa primer)."""
+
+    def __init__(
+        self,
+        heightmap: HeightMap,
+        center: Tuple[int, int],
+        footprint: Tuple[int, int] = (7, 7),
+        max_variance: float = 0.0,
+        margin: int = 1,
+        margin_penalty: float = 0.5,
+        flatness_weight: float = 10.0,
+    ):
+        """
+        Args:
+            heightmap: Mapa d'alçades on buscar
+            center: Posició (x, z) del jugador
+            footprint: Planta (amplada x, fondària z) del pla seleccionat
+            max_variance: Variància màxima d'alçada acceptada dins la planta
+            margin: Blocs de vora que s'haurien de poder trepitjar al voltant
+            margin_penalty: Penalització si la vora no és plana
+            flatness_weight: Pes de la variància a la puntuació
+        """
+        self.heightmap = heightmap
+        self.center = center
+        self.footprint = footprint
+        self.max_variance = max_variance
+        self.margin = margin
+        self.margin_penalty = margin_penalty
+        self.flatness_weight = flatness_weight
+        self._heap = []
+        self._seq = itertools.count()
+        self._taken: List[Site] = []
+        self._build()
+
+    def _build(self) -> None:
+        width, depth = self.footprint
+        hmap = self.heightmap
+        if width > hmap.width or depth > hmap.depth:
+            return
+
+        variance = _as_rows(hmap.window_variance(width, depth))
+        border = None
+        if self.margin > 0:
+            outer = (width + 2 * self.margin, depth + 2 * self.margin)
+            if outer[0] <= hmap.width and outer[1] <= hmap.depth:
+                border = _as_rows(hmap.window_variance(*outer))
+
+        cx, cz = self.center
+        radius = max(hmap.width, hmap.depth) / 2.0
+        for row, line in enumerate(variance):
+            for col, value in enumerate(line):
+                if value > self.max_variance:
+                    continue
+                x, z = hmap.origin_x + col, hmap.origin_z + row
+                # Distància del jugador al centre de la planta
+                distance = math.hypot(x + width / 2.0 - cx, z + depth / 2.0 - cz)
+                score = self.flatness_weight * value + distance / radius
+                b_row, b_col = row - self.margin, col - self.margin
+                if border is not None and (
+                    b_row < 0
+                    or b_col < 0
+                    or b_row >= len(border)
+                    or b_col >= len(border[0])
+                    or border[b_row][b_col] > self.max_variance
+                ):
+                    score += self.margin_penalty
+                site = Site(
+                    x, z, hmap.get(x, z), width, depth, float(value), distance, score
+                )
+                self._heap.append((score, next(self._seq), site))
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def pop(self) -> Optional[Site]:
+        """Treu el millor lloc que no se solapi amb cap dels ja lliurats."""
+        while self._heap:
+            _, _, site = heapq.heappop(self._heap)
+            if any(site.overlaps(taken) for taken in self._taken):
+                continue
+            if site.variance:
+                # Planta no del tot plana: es construeix sobre la columna més alta
+                site = site._replace(y=self._top(site))
+            self._taken.append(site)
+            return site
+        return None
+
+    def _top(self, site: Site) -> int:
+        return max(
+            self.heightmap.get(site.x + dx, site.z + dz)
+            for dx in range(site.width)
+            for dz in range(site.depth)
+        )
+
+    def best(self, count: int) -> List[Site]:
+        """Treu fins a `count` llocs disjunts, el millor primer."""
+        sites = []
+        while len(sites) < count:
+            site = self.pop()
+            if site is None:
+                break
+            sites.append(site)
+        return sites
+
+
+def _as_rows(grid):
+    """Converteix la graella de variàncies a llistes de Python."""
+    if np is not None and isinstance(grid, np.ndarray):
+        return grid.tolist()
+    return grid
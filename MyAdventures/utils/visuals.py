@@ -1,3 +1,17 @@
+"""
+Marcadors visuals dels agents al món.
+
+Hi ha tres nivells de visualització:
+
+- ``off``: cap marcador; els agents no modifiquen el món per visualitzar.
+- ``summary``: només els marcadors principals (anchors, zona triada...).
+- ``full``: a més, un marcador per cada sonda (columna inspeccionada...).
+  Aquests marcadors de detall s'acumulen en un buffer i un fil en segon pla
+  els escriu per lots, fora del camí crític dels agents.
+"""
+
+import logging
+import threading
 from typing import Optional
 
 try:
@@ -5,14 +19,149 @@ try:
 except Exception:  # per si el import falla
     mcblock = None
 
+logger = logging.getLogger(__name__)
+
+VISUAL_LEVELS = ("off", "summary", "full")
+
+_level = "summary"
+
+
+def set_visual_level(level: str) -> None:
+    """Canvia el nivell de visualització (off, summary o full)."""
+    global _level
+    if level not in VISUAL_LEVELS:
+        raise ValueError(f"Nivell de visualització desconegut: {level}")
+    _level = level
+    logger.info(f"Nivell de visualització: {level}")
+
+
+def get_visual_level() -> str:
+    """Retorna el nivell de visualització actual."""
+    return _level
+
+
+def visuals_enabled(level: str = "summary") -> bool:
+    """Cert si el nivell actual mostra els marcadors del nivell indicat."""
+    return VISUAL_LEVELS.index(_level) >= VISUAL_LEVELS.index(level)
+
+
+class MarkerBuffer:
+    """Acumula marcadors de detall i els escriu per lots des d'un fil propi."""
+
+    def __init__(self, batch_size: int = 256, interval: float = 0.2):
+        """
+        Args:
+            batch_size: Marcadors pendents que provoquen una escriptura immediata
+            interval: Segons màxims que un marcador espera al buffer
+        """
+        self.batch_size = batch_size
+        self.interval = interval
+        self._cond = threading.Condition()
+        self._pending = {}  # id(mc) -> (mc, mc_lock, [blocs])
+        self._count = 0
+        self._thread = None
+        self.stats = {"queued": 0, "flushed": 0, "batches": 0, "errors": 0}
+
+    def add(self, mc, block, mc_lock=None) -> None:
+        """Encua un marcador (x, y, z, id, dades) sense tocar el socket."""
+        with self._cond:
+            entry = self._pending.setdefault(id(mc), (mc, mc_lock, []))
+            entry[2].append(block)
+            self._count += 1
+            self.stats["queued"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="MarkerBuffer", daemon=True
+                )
+                self._thread.start()
+            if self._count >= self.batch_size:
+                self._cond.notify()
+
+    def _take(self):
+        with self._cond:
+            pending, self._pending, self._count = self._pending, {}, 0
+        return pending
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._count >= self.batch_size, timeout=self.interval
+                )
+            self.flush()
+
+    def flush(self) -> int:
+        """Escriu ara tots els marcadors pendents. Retorna quants n'ha escrit."""
+        written = 0
+        for mc, mc_lock, blocks in self._take().values():
+            try:
+                if mc_lock:
+                    mc_lock.acquire()
+                try:
+                    if hasattr(mc, "setBlockList"):
+                        mc.setBlockList(blocks)
+                    else:
+                        for block in blocks:
+                            mc.setBlock(*block)
+                finally:
+                    if mc_lock:
+                        mc_lock.release()
+                written += len(blocks)
+                with self._cond:
+                    self.stats["flushed"] += len(blocks)
+                    self.stats["batches"] += 1
+            except Exception as e:
+                logger.error(f"Error escrivint {len(blocks)} marcadors: {e}")
+                with self._cond:
+                    self.stats["errors"] += 1
+        return written
+
+    def get_stats(self) -> dict:
+        """Retorna els comptadors de marcadors encuats i escrits."""
+        with self._cond:
+            stats = dict(self.stats)
+            stats["pending"] = self._count
+        return stats
+
+
+_buffer = MarkerBuffer()
+
+
+def flush_markers() -> int:
+    """Escriu immediatament els marcadors de detall pendents."""
+    return _buffer.flush()
+
+
+def get_marker_stats() -> dict:
+    """Retorna les estadístiques del buffer de marcadors."""
+    return _buffer.get_stats()
+
 
 def mark_bot(
-    mc, x: int, y: int, z: int, wool_color: int = 11, label: Optional[str] = None
+    mc,
+    x: int,
+    y: int,
+    z: int,
+    wool_color: int = 11,
+    label: Optional[str] = None,
+    detail: bool = False,
+    mc_lock=None,
 ):
     """
     Col·locar un bloc de llana de color a la ubicació donada.
     Si s'especifica el label, també es publica un missatge al xat.
+
+    Els marcadors de detall (`detail=True`) només es dibuixen en nivell
+    ``full`` i s'escriuen en diferit; `mc_lock` és el lock que s'agafarà
+    en escriure'ls.
     """
+    if _level == "off":
+        return
+
+    if detail:
+        if _level == "full":
+            _buffer.add(mc, (x, y, z, mcblock.WOOL.id, wool_color), mc_lock=mc_lock)
+        return
 
     mc.setBlock(x, y, z, mcblock.WOOL.id, wool_color)
 
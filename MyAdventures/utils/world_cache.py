@@ -0,0 +1,296 @@
+"""
+Memòria cau del món al costat del client per a la façana de Minecraft.
+
+Guarda IDs de bloc agrupats per chunk i columnes del mapa d'alçades, amb
+expulsió LRU i caducitat (TTL) configurable. Les escriptures fetes a través
+de la façana actualitzen la memòria cau, de manera que els agents no han de
+tornar a llegir blocs que acaben de modificar; els cuboides omplerts amb
+setBlocks només invaliden la zona afectada.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from mcpi.minecraft import intFloor
+
+
+class WorldCache:
+    """Magatzem LRU de blocs (per chunk) i d'alçades (per columna) amb TTL."""
+
+    CHUNK_SIZE = 16
+
+    def __init__(
+        self,
+        max_chunks: int = 256,
+        max_columns: int = 16384,
+        ttl: Optional[float] = 5.0,
+        clock=time.monotonic,
+    ):
+        """
+        Args:
+            max_chunks: Nombre màxim de chunks de blocs en memòria
+            max_columns: Nombre màxim de columnes d'alçada en memòria
+            ttl: Segons de validesa d'una entrada (None: no caduca mai)
+            clock: Funció de temps (injectable per a proves)
+        """
+        self.max_chunks = max_chunks
+        self.max_columns = max_columns
+        self.ttl = ttl
+        self._clock = clock
+        self._chunks = OrderedDict()  # (cx, cz) -> {(x, y, z): (id, temps)}
+        self._heights = OrderedDict()  # (x, z) -> (alçada, temps)
+        self._lock = threading.Lock()
+        self.stats = {
+            "block_hits": 0,
+            "block_misses": 0,
+            "height_hits": 0,
+            "height_misses": 0,
+            "evictions": 0,
+        }
+
+    def _expired(self, stamp: float) -> bool:
+        return self.ttl is not None and self._clock() - stamp > self.ttl
+
+    def _chunk_key(self, x: int, z: int):
+        return (x // self.CHUNK_SIZE, z // self.CHUNK_SIZE)
+
+    def get_block(self, x: int, y: int, z: int) -> Optional[int]:
+        """Retorna l'ID del bloc en memòria o None si no hi és (o ha caducat)."""
+        with self._lock:
+            key = self._chunk_key(x, z)
+            chunk = self._chunks.get(key)
+            entry = chunk.get((x, y, z)) if chunk is not None else None
+            if entry is None or self._expired(entry[1]):
+                self.stats["block_misses"] += 1
+                return None
+            self._chunks.move_to_end(key)
+            self.stats["block_hits"] += 1
+            return entry[0]
+
+    def put_block(self, x: int, y: int, z: int, block_id: int) -> None:
+        """Guarda l'ID d'un bloc."""
+        with self._lock:
+            key = self._chunk_key(x, z)
+            chunk = self._chunks.get(key)
+            if chunk is None:
+                chunk = self._chunks[key] = {}
+                while len(self._chunks) > self.max_chunks:
+                    self._chunks.popitem(last=False)
+                    self.stats["evictions"] += 1
+            else:
+                self._chunks.move_to_end(key)
+            chunk[(x, y, z)] = (block_id, self._clock())
+
+    def get_height(self, x: int, z: int) -> Optional[int]:
+        """Retorna l'alçada de la columna en memòria o None."""
+        with self._lock:
+            entry = self._heights.get((x, z))
+            if entry is None or self._expired(entry[1]):
+                self.stats["height_misses"] += 1
+                return None
+            self._heights.move_to_end((x, z))
+            self.stats["height_hits"] += 1
+            return entry[0]
+
+    def put_height(self, x: int, z: int, height: int) -> None:
+        """Guarda l'alçada d'una columna."""
+        with self._lock:
+            self._heights[(x, z)] = (height, self._clock())
+            self._heights.move_to_end((x, z))
+            while len(self._heights) > self.max_columns:
+                self._heights.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def written(self, x: int, y: int, z: int, block_id: int) -> None:
+        """Actualitza la memòria cau després d'una escriptura pròpia."""
+        self.put_block(x, y, z, block_id)
+        with self._lock:
+            entry = self._heights.get((x, z))
+            if entry is None:
+                return
+            height = entry[0]
+            # Només invalidem si l'escriptura pot canviar la part alta de la columna
+            if (block_id != 0 and y >= height) or (block_id == 0 and y >= height - 1):
+                del self._heights[(x, z)]
+
+    def written_region(
+        self, x0: int, y0: int, z0: int, x1: int, y1: int, z1: int, block_id: int
+    ) -> None:
+        """
+        Invalida la memòria cau després d'omplir un cuboide (coordenades ordenades).
+
+        Es treballa per chunk i per columna, no per bloc: s'esborren les
+        entrades de blocs dins del cuboide i les alçades que l'escriptura pot
+        haver canviat.
+        """
+
+        def inside(x, z):
+            return x0 <= x <= x1 and z0 <= z <= z1
+
+        size = self.CHUNK_SIZE
+        with self._lock:
+            for cx in range(x0 // size, x1 // size + 1):
+                for cz in range(z0 // size, z1 // size + 1):
+                    chunk = self._chunks.get((cx, cz))
+                    if not chunk:
+                        continue
+                    stale = [
+                        (x, y, z)
+                        for x, y, z in chunk
+                        if y0 <= y <= y1 and inside(x, z)
+                    ]
+                    for pos in stale:
+                        del chunk[pos]
+
+            # Recorrem el que sigui més petit: la planta o les columnes en memòria
+            area = (x1 - x0 + 1) * (z1 - z0 + 1)
+            if area <= len(self._heights):
+                columns = [
+                    (x, z)
+                    for x in range(x0, x1 + 1)
+                    for z in range(z0, z1 + 1)
+                    if (x, z) in self._heights
+                ]
+            else:
+                columns = [column for column in self._heights if inside(*column)]
+            top = y1 if block_id != 0 else y1 + 1
+            for column in columns:
+                if top >= self._heights[column][0]:
+                    del self._heights[column]
+
+    def clear(self) -> None:
+        """Buida tota la memòria cau."""
+        with self._lock:
+            self._chunks.clear()
+            self._heights.clear()
+
+    def get_stats(self) -> dict:
+        """Retorna els comptadors d'encerts i errors amb les taxes d'encert."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["chunks"] = len(self._chunks)
+            stats["columns"] = len(self._heights)
+        for kind in ("block", "height"):
+            total = stats[f"{kind}_hits"] + stats[f"{kind}_misses"]
+            stats[f"{kind}_hit_rate"] = stats[f"{kind}_hits"] / total if total else 0.0
+        return stats
+
+
+class CachedMinecraft:
+    """
+    Façana sobre `mcpi.minecraft.Minecraft` que serveix lectures des d'un WorldCache.
+
+    Els mètodes no interceptats (player, events, postToChat...) es deleguen
+    directament a la instància original.
+    """
+
+    def __init__(self, mc, cache: Optional[WorldCache] = None):
+        self.mc = mc
+        self.cache = cache if cache is not None else WorldCache()
+
+    def __getattr__(self, name):
+        return getattr(self.mc, name)
+
+    def getBlock(self, *args):
+        """Get block (x,y,z) => id:int"""
+        x, y, z = intFloor(args)
+        block_id = self.cache.get_block(x, y, z)
+        if block_id is None:
+            block_id = self.mc.getBlock(x, y, z)
+            self.cache.put_block(x, y, z, block_id)
+        return block_id
+
+    def getBlocks(self, *args):
+        """Get a cuboid of blocks (x0,y0,z0,x1,y1,z1) => [id:int]"""
+        x0, y0, z0, x1, y1, z1 = intFloor(args)
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        z0, z1 = min(z0, z1), max(z0, z1)
+        positions = [
+            (x, y, z)
+            for y in range(y0, y1 + 1)
+            for x in range(x0, x1 + 1)
+            for z in range(z0, z1 + 1)
+        ]
+
+        ids = []
+        for x, y, z in positions:
+            block_id = self.cache.get_block(x, y, z)
+            if block_id is None:
+                break
+            ids.append(block_id)
+        else:
+            return ids
+
+        # Falta algun bloc: una sola lectura de tot el cuboide
+        ids = list(self.mc.getBlocks(x0, y0, z0, x1, y1, z1))
+        for (x, y, z), block_id in zip(positions, ids):
+            self.cache.put_block(x, y, z, block_id)
+        return ids
+
+    def getBlockList(self, positions):
+        """Get the blocks at many positions pipelined ([(x,y,z)]) => [id:int]"""
+        positions = [tuple(intFloor(p)) for p in positions]
+        ids = [self.cache.get_block(*p) for p in positions]
+        missing = [i for i, block_id in enumerate(ids) if block_id is None]
+        if missing:
+            fetched = self.mc.getBlockList([positions[i] for i in missing])
+            for i, block_id in zip(missing, fetched):
+                ids[i] = block_id
+                self.cache.put_block(*positions[i], block_id)
+        return ids
+
+    def getHeight(self, *args):
+        """Get the height of the world (x,z) => int"""
+        x, z = intFloor(args)
+        height = self.cache.get_height(x, z)
+        if height is None:
+            height = self.mc.getHeight(x, z)
+            self.cache.put_height(x, z, height)
+        return height
+
+    def getHeights(self, columns):
+        """Get the heights of many columns pipelined ([(x,z)]) => [int]"""
+        columns = [tuple(intFloor(c)) for c in columns]
+        heights = [self.cache.get_height(*c) for c in columns]
+        missing = [i for i, height in enumerate(heights) if height is None]
+        if missing:
+            fetched = self.mc.getHeights([columns[i] for i in missing])
+            for i, height in zip(missing, fetched):
+                heights[i] = height
+                self.cache.put_height(*columns[i], height)
+        return heights
+
+    def setBlock(self, *args):
+        """Set block (x,y,z,id,[data])"""
+        self.mc.setBlock(*args)
+        x, y, z, block_id = intFloor(args)[:4]
+        self.cache.written(x, y, z, block_id)
+
+    def setBlockList(self, blocks):
+        """Set many single blocks with one socket write ([(x,y,z,id,[data])])"""
+        blocks = list(blocks)
+        self.mc.setBlockList(blocks)
+        for block in blocks:
+            x, y, z, block_id = intFloor(block)[:4]
+            self.cache.written(x, y, z, block_id)
+
+    def setBlocks(self, *args):
+        """Set a cuboid of blocks (x0,y0,z0,x1,y1,z1,id,[data])"""
+        self.mc.setBlocks(*args)
+        x0, y0, z0, x1, y1, z1, block_id = intFloor(args)[:7]
+        self.cache.written_region(
+            min(x0, x1),
+            min(y0, y1),
+            min(z0, z1),
+            max(x0, x1),
+            max(y0, y1),
+            max(z0, z1),
+            block_id,
+        )
+
+    def get_stats(self) -> dict:
+        """Retorna les estadístiques de la memòria cau."""
+        return self.cache.get_stats()